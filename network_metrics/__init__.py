@@ -0,0 +1,9 @@
+"""Subgraph Network Dashboard: subgraph and indexer metrics per network on The Graph.
+
+Importing the package has no side effects: configuration is read, directories are
+created and heavy dependencies are imported only when a command actually runs.
+"""
+
+# v1.1.0 / 18-Oct-2026
+# Author: Paolo Diomede
+DASHBOARD_VERSION = "1.1.0"
@@ -0,0 +1,188 @@
+from collections import namedtuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+
+# Data class for network subgraph counts
+@dataclass
+class NetworkSubgraphCount:
+    network_name: str
+    subgraph_count: int
+
+# Data class for network subgraph and unique indexer counts; the token totals (GRT, summed
+# over the network's current deployments) are None when the crawl has no deployment metrics,
+# the stake metrics (see apply_indexer_stake) when there is no indexer table
+NetworkIndexerData = namedtuple(
+    "NetworkIndexerData",
+    [
+        "network_name", "subgraph_count", "unique_indexer_count", "deployment_count",
+        "signalled_tokens", "staked_tokens", "query_fees",
+        "stake_coverage", "stake_hhi", "nakamoto_coefficient",
+    ],
+    defaults=[0, None, None, None, None, None, None],
+)
+
+# Deployment metric keys (see fetch.fetch_deployment_metrics) behind the token totals above
+DEPLOYMENT_METRICS = {"signal": "signalled_tokens", "stake": "staked_tokens", "query_fees": "query_fees"}
+
+# Snapshot keys of the stake metrics
+STAKE_METRICS = {"stake_coverage": "stake_coverage", "stake_hhi": "stake_hhi", "nakamoto": "nakamoto_coefficient"}
+
+# Share of a network's indexer stake the Nakamoto coefficient counts indexers up to
+NAKAMOTO_THRESHOLD = 0.5
+
+
+# Everything one crawl yields: per-network rows plus the sets they were counted from
+@dataclass
+class NetworkAggregate:
+    networks: List[NetworkIndexerData]
+    subgraph_ids: Dict[str, List[str]] = field(default_factory=dict)  # network -> sorted subgraph ids
+    indexers_by_network: Dict[str, Set[str]] = field(default_factory=dict)
+    allocations_by_indexer: Dict[str, Dict[str, int]] = field(default_factory=dict)  # indexer -> {network: active allocations}
+    deployments_by_indexer: Dict[str, Dict[str, str]] = field(default_factory=dict)  # indexer -> {allocated deployment: network}
+    sources: Dict[str, List[NetworkIndexerData]] = field(default_factory=dict)  # per-source rows when several sources are crawled
+    fetched_at: str = None  # when the crawl behind these numbers started ("%Y-%m-%dT%H:%M:%SZ")
+    crawl: Dict[str, dict] = field(default_factory=dict)  # per-source page statistics, see crawl_stats
+
+
+def crawl_stats(pages: list, page_sizes: list) -> dict:
+    """Requested and returned rows of every page and the number of ids seen more than once across pages"""
+    ids = [item["id"] for batch in pages for item in batch]
+    return {"page_sizes": list(page_sizes), "page_rows": [len(batch) for batch in pages], "rows": len(ids), "duplicate_ids": len(ids) - len(set(ids))}
+
+
+def network_token_totals(deployment_ids: set, deployments: dict) -> dict:
+    """Token totals of a network, joined in memory from {deployment id: metrics}"""
+    totals = dict.fromkeys(DEPLOYMENT_METRICS.values(), 0.0)
+    for deployment_id in deployment_ids:
+        metrics = deployments.get(deployment_id)
+        if metrics:
+            for key, field_name in DEPLOYMENT_METRICS.items():
+                totals[field_name] += metrics.get(key, 0.0)
+    return {field_name: round(value, 2) for field_name, value in totals.items()}
+
+
+def aggregate_pages(pages: list, deployments: dict = None) -> NetworkAggregate:
+    """Count subgraphs, deployments and unique indexers per network from raw subgraph pages,
+    with the token totals of `deployments` ({deployment id: metrics}) when given"""
+    counts = {}
+    indexers_by_network = {}
+    deployments_by_network = {}
+    ids_by_network = {}
+    allocations_by_indexer = {}
+    deployments_by_indexer = {}
+    for batch in pages:
+        for item in batch:
+            deployment = item.get("currentVersion", {}).get("subgraphDeployment", {})
+            manifest = deployment.get("manifest")
+            if not manifest:
+                continue
+            network = manifest.get("network")
+            if not network:
+                continue
+            counts[network] = counts.get(network, 0) + 1
+            ids_by_network.setdefault(network, []).append(item["id"])
+            if deployment.get("id"):
+                deployments_by_network.setdefault(network, set()).add(deployment["id"])
+            # Process indexerAllocations
+            allocations = deployment.get("indexerAllocations", [])
+            if network not in indexers_by_network:
+                indexers_by_network[network] = set()
+            for alloc in allocations:
+                indexer = alloc.get("indexer")
+                if indexer and "id" in indexer:
+                    indexers_by_network[network].add(indexer["id"])
+                    networks = allocations_by_indexer.setdefault(indexer["id"], {})
+                    networks[network] = networks.get(network, 0) + 1
+                    if deployment.get("id"):
+                        deployments_by_indexer.setdefault(indexer["id"], {})[deployment["id"]] = network
+
+    result = []
+    for network, subgraph_count in counts.items():
+        unique_indexer_count = len(indexers_by_network.get(network, set()))
+        deployment_count = len(deployments_by_network.get(network, set()))
+        tokens = network_token_totals(deployments_by_network.get(network, set()), deployments) if deployments is not None else {}
+        result.append(NetworkIndexerData(network_name=network, subgraph_count=subgraph_count, unique_indexer_count=unique_indexer_count, deployment_count=deployment_count, **tokens))
+    return NetworkAggregate(
+        networks=result,
+        subgraph_ids={network: sorted(ids) for network, ids in ids_by_network.items()},
+        indexers_by_network=indexers_by_network,
+        allocations_by_indexer=allocations_by_indexer,
+        deployments_by_indexer=deployments_by_indexer,
+    )
+
+
+def stake_concentration(stakes: list):
+    """(HHI on the 0-10,000 scale, Nakamoto coefficient) of the stakes serving one network"""
+    total = sum(stakes)
+    if not total:
+        return None, None
+    hhi = sum((stake / total) ** 2 for stake in stakes) * 10_000
+    cumulative = 0.0
+    for count, stake in enumerate(sorted(stakes, reverse=True), start=1):
+        cumulative += stake
+        if cumulative > total * NAKAMOTO_THRESHOLD:
+            return round(hhi), count
+    return round(hhi), len(stakes)
+
+
+def apply_indexer_stake(aggregate: NetworkAggregate, indexers: dict):
+    """Join the indexer table ({id: {"stake", "delegation"}}) with the per-network indexer sets:
+    share of all allocating stake serving each network, and its concentration"""
+    stakes = {
+        indexer: (indexers[indexer].get("stake") or 0.0) + (indexers[indexer].get("delegation") or 0.0)
+        for indexer in aggregate.allocations_by_indexer if indexer in indexers
+    }
+    total = sum(stakes.values())
+    if not total:
+        return
+    networks = []
+    for entry in aggregate.networks:
+        network_stakes = [stakes[indexer] for indexer in aggregate.indexers_by_network.get(entry.network_name, ()) if indexer in stakes]
+        hhi, nakamoto = stake_concentration(network_stakes)
+        networks.append(entry._replace(stake_coverage=round(sum(network_stakes) / total * 100, 2), stake_hhi=hhi, nakamoto_coefficient=nakamoto))
+    aggregate.networks = networks
+
+
+def total_subgraphs(data: List[NetworkIndexerData]) -> int:
+    return sum(entry.subgraph_count for entry in data)
+
+
+def build_metrics_snapshot(data: List[NetworkIndexerData], timestamp: str) -> dict:
+    """Daily snapshot persisted to reports/metrics (the "networks" map keeps its original meaning)"""
+    snapshot = {
+        "timestamp": timestamp,
+        "total_subgraphs": total_subgraphs(data),
+        "networks": {entry.network_name: entry.subgraph_count for entry in data},
+        "deployments": {entry.network_name: entry.deployment_count for entry in data},
+        "indexers": {entry.network_name: entry.unique_indexer_count for entry in data},
+    }
+    for key, field_name in {**DEPLOYMENT_METRICS, **STAKE_METRICS}.items():
+        values = {entry.network_name: getattr(entry, field_name) for entry in data if getattr(entry, field_name) is not None}
+        if values:
+            snapshot[key] = values
+    return snapshot
+
+
+def build_indexer_index(aggregate: NetworkAggregate, timestamp: str) -> dict:
+    """Inverted index indexer -> {network: active allocations}, ranked by networks served"""
+    indexers = {}
+    for indexer, networks in aggregate.allocations_by_indexer.items():
+        indexers[indexer] = {
+            "network_count": len(networks),
+            "allocations": sum(networks.values()),
+            "networks": dict(sorted(networks.items(), key=lambda item: (-item[1], item[0]))),
+        }
+    ranked = sorted(indexers.items(), key=lambda item: (-item[1]["network_count"], -item[1]["allocations"], item[0]))
+    return {
+        "timestamp": timestamp,
+        "indexer_count": len(indexers),
+        "indexers": dict(ranked),
+    }
+
+
+def network_overlap(aggregate: NetworkAggregate, top_n: int = 12):
+    """(networks, matrix) of shared indexer counts between the top_n networks by unique indexers"""
+    networks = sorted(aggregate.indexers_by_network, key=lambda n: (-len(aggregate.indexers_by_network[n]), n))[:top_n]
+    matrix = [[len(aggregate.indexers_by_network[a] & aggregate.indexers_by_network[b]) for b in networks] for a in networks]
+    return networks, matrix
@@ -0,0 +1,232 @@
+"""Allocation churn per network, from allocation events fetched incrementally.
+
+Instead of re-reading every active allocation, each crawl asks every merge source only for
+the allocations opened (createdAtEpoch) or closed (closedAtEpoch) at or after the highest
+epoch seen so far. The ids already recorded at that epoch are kept with the high-water mark
+in cache/allocations.json and skipped, so an epoch still in progress is safely read again.
+A source without marks starts CHURN_BACKFILL_EPOCHS before its current epoch, and a source
+is asked again at most every CHURN_INTERVAL_HOURS, about once per epoch.
+
+Events are appended to reports/metrics/allocations/allocations_YYYY-MM.jsonl:
+    {"t": "2026-10-18T09:00:12Z", "e": "open" | "close", "id": ..., "indexer": ..., "network": ..., "s": source}
+
+The churn report counts, per network and UTC day of the last CHURN_DAYS, the allocations
+opened and closed and the indexers that entered (opened their first allocation on the
+network) or exited (closed their last one). Entries and exits are found by replaying the
+events backwards from the active allocations of the crawl, so they are approximate for
+allocations on deployments that are no longer a subgraph's current version.
+"""
+import os
+import json
+from datetime import datetime, timezone, timedelta
+
+from .config import ensure_dir, get_settings, load_sources
+from .log import log_message
+
+
+ALLOCATIONS_DIR = "allocations"
+ALLOCATION_PAGE_SIZE = 1000
+# Event kind -> (epoch field the high-water mark follows, timestamp field of the event)
+EVENT_FIELDS = {"open": ("createdAtEpoch", "createdAt"), "close": ("closedAtEpoch", "closedAt")}
+
+
+def allocations_dir() -> str:
+    return os.path.join(get_settings().metrics_dir, ALLOCATIONS_DIR)
+
+
+def load_marks() -> dict:
+    """{source: {"open": {"epoch", "ids"}, "close": {"epoch", "ids"}, "fetched_at": "...Z"}}"""
+    try:
+        with open(get_settings().allocation_state_file, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_marks(marks: dict):
+    from .store import write_json_atomic
+
+    path = get_settings().allocation_state_file
+    ensure_dir(os.path.dirname(path) or ".")
+    write_json_atomic(path, marks, separators=(",", ":"))
+
+
+def query_data(source, scheduler, query_text: str, variables: dict = None):
+    """`data` of one gateway query, None (logged) when it fails"""
+    import requests
+    from .client import QuotaExhausted
+    from .costs import BudgetExceeded
+    from .query import register_query
+
+    try:
+        response = scheduler.query(source, register_query(query_text), variables, phase=f"allocations:{source.name}")
+        payload = response.json() if response.status_code == 200 else {"errors": response.status_code}
+    except (QuotaExhausted, BudgetExceeded, requests.RequestException, ValueError) as e:
+        payload = {"errors": str(e)}
+    if payload.get("errors") or not payload.get("data"):
+        log_message(f"⚠️ [{source.name}] Allocation events request failed: {payload.get('errors')}")
+        return None
+    return payload["data"]
+
+
+def fetch_events(source, scheduler, kind: str, mark: dict):
+    """(events, new mark) of one kind since `mark`, or None when a request fails"""
+    from .query import build_allocation_events_query
+
+    epoch_field, time_field = EVENT_FIELDS[kind]
+    query_text = build_allocation_events_query(epoch_field)
+    seen = set(mark["ids"])
+    epoch, ids = mark["epoch"], set(mark["ids"])
+    events = []
+    last_id = ""
+    while True:
+        data = query_data(source, scheduler, query_text, {"first": ALLOCATION_PAGE_SIZE, "epoch": mark["epoch"], "lastId": last_id})
+        if data is None:
+            return None
+        rows = data.get("allocations") or []
+        for row in rows:
+            row_epoch = row[epoch_field]
+            if row_epoch == mark["epoch"] and row["id"] in seen:
+                continue
+            # Rows come ordered by id: only the ids of the highest epoch are kept with the mark
+            if row_epoch > epoch:
+                epoch, ids = row_epoch, set()
+            if row_epoch == epoch:
+                ids.add(row["id"])
+            network = ((row.get("subgraphDeployment") or {}).get("manifest") or {}).get("network")
+            if network and row.get(time_field):
+                events.append({
+                    "t": datetime.fromtimestamp(int(row[time_field]), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "e": kind,
+                    "id": row["id"],
+                    "indexer": (row.get("indexer") or {}).get("id"),
+                    "network": network,
+                    "s": source.name,
+                })
+        if len(rows) < ALLOCATION_PAGE_SIZE:
+            return events, {"epoch": epoch, "ids": sorted(ids)}
+        last_id = rows[-1]["id"]
+
+
+def append_events(events: list):
+    by_month = {}
+    for event in sorted(events, key=lambda event: event["t"]):
+        by_month.setdefault(event["t"][:7], []).append(event)
+    directory = ensure_dir(allocations_dir())
+    for month, month_events in by_month.items():
+        with open(os.path.join(directory, f"allocations_{month}.jsonl"), "a") as f:
+            for event in month_events:
+                f.write(json.dumps(event, separators=(",", ":"), sort_keys=True) + "\n")
+
+
+def fetch_allocation_events(scheduler, sources: list = None) -> int:
+    """Append the allocations opened/closed on every merge source since its high-water marks"""
+    from .query import CURRENT_EPOCH_QUERY
+
+    marks = load_marks()
+    fetched = 0
+    now = datetime.now(timezone.utc)
+    for source in sources or load_sources():
+        if not source.merge:
+            continue
+        source_marks = marks.get(source.name)
+        if source_marks and source_marks.get("fetched_at"):
+            age_hours = (now - datetime.strptime(source_marks["fetched_at"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)).total_seconds() / 3600
+            if age_hours < get_settings().churn_interval_hours:
+                log_message(f"⏭️ [{source.name}] Allocation events fetched {age_hours:.1f}h ago — next fetch after {get_settings().churn_interval_hours:g}h.")
+                continue
+        if source_marks is None:
+            data = query_data(source, scheduler, CURRENT_EPOCH_QUERY)
+            if data is None or not data.get("graphNetwork"):
+                continue
+            start = max(0, int(data["graphNetwork"]["currentEpoch"]) - get_settings().churn_backfill_epochs)
+            source_marks = {kind: {"epoch": start, "ids": []} for kind in EVENT_FIELDS}
+            log_message(f"🔀 [{source.name}] No allocation high-water marks yet — starting at epoch {start}.")
+
+        events = []
+        new_marks = {}
+        for kind in EVENT_FIELDS:
+            result = fetch_events(source, scheduler, kind, source_marks[kind])
+            if result is None:
+                break
+            events += result[0]
+            new_marks[kind] = result[1]
+        if len(new_marks) < len(EVENT_FIELDS):
+            continue
+        # Events first: a crash before the marks are saved only repeats events, which readers skip
+        append_events(events)
+        marks[source.name] = dict(new_marks, fetched_at=now.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        save_marks(marks)
+        fetched += len(events)
+        opened = sum(1 for event in events if event["e"] == "open")
+        log_message(f"🔀 [{source.name}] {opened} allocations opened and {len(events) - opened} closed since epochs "
+                    f"{source_marks['open']['epoch']}/{source_marks['close']['epoch']} (now {new_marks['open']['epoch']}/{new_marks['close']['epoch']}).")
+    return fetched
+
+
+def iter_events(since: datetime):
+    """Events at or after `since`, each (kind, allocation id) once"""
+    since_t = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+    directory = allocations_dir()
+    if not os.path.isdir(directory):
+        return
+    seen = set()
+    for file in sorted(os.listdir(directory)):
+        if not (file.startswith("allocations_") and file.endswith(".jsonl")) or file[len("allocations_"):][:7] < since_t[:7]:
+            continue
+        with open(os.path.join(directory, file), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write leaves a truncated last line
+                    continue
+                if event["t"] >= since_t and (event["e"], event["id"]) not in seen:
+                    seen.add((event["e"], event["id"]))
+                    yield event
+
+
+def build_churn(aggregate, now: datetime) -> dict:
+    """{"days": [...], "networks": {network: {"daily": [...], "totals": {...}}}} over the last CHURN_DAYS UTC days"""
+    days = max(1, get_settings().churn_days)
+    first_day = (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = [(first_day + timedelta(days=n)).strftime("%Y-%m-%d") for n in range(days)]
+    counters = ("opened", "closed", "indexers_entered", "indexers_exited")
+    networks = {}
+    deltas = {}  # (indexer, network) -> {date: opened - closed}
+
+    def day(network: str, date: str) -> dict:
+        return networks.setdefault(network, {d: dict.fromkeys(counters, 0) for d in dates})[date]
+
+    for event in iter_events(first_day):
+        date = event["t"][:10]
+        if date not in dates:
+            continue
+        opened = event["e"] == "open"
+        day(event["network"], date)["opened" if opened else "closed"] += 1
+        pair = deltas.setdefault((event["indexer"], event["network"]), {})
+        pair[date] = pair.get(date, 0) + (1 if opened else -1)
+
+    # Walk back from the active allocations of the crawl: an indexer entered a network on the
+    # day its allocation count went from zero to positive, and exited when it went back to zero
+    for (indexer, network), by_date in deltas.items():
+        count = aggregate.allocations_by_indexer.get(indexer, {}).get(network, 0)
+        for date in reversed(dates):
+            start = max(0, count - by_date.get(date, 0))
+            if start == 0 and count > 0:
+                day(network, date)["indexers_entered"] += 1
+            elif start > 0 and count == 0:
+                day(network, date)["indexers_exited"] += 1
+            count = start
+
+    return {
+        "generated_at": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "days": dates,
+        "networks": {
+            network: {
+                "daily": [dict(date=date, **by_date[date]) for date in dates],
+                "totals": {counter: sum(by_date[date][counter] for date in dates) for counter in counters},
+            }
+            for network, by_date in sorted(networks.items())
+        },
+    }
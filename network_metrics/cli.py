@@ -0,0 +1,100 @@
+import argparse
+import sys
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="network-metrics", description="Fetch subgraph counts per network and render the dashboard.")
+    parser.add_argument("--render-only", action="store_true", help="Same as the 'render' command (kept for older cron entries)")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("run", help="Fetch from the gateway, save the daily snapshot and render CSV/HTML (default)")
+    subparsers.add_parser("fetch", help="Fetch from the gateway into the journal only, without rendering")
+    subparsers.add_parser("render", help="Rebuild CSV/HTML from the last completed journal without any network I/O")
+    subparsers.add_parser("compact", help="Roll old metric snapshots into monthly archives and refresh the hourly/daily/weekly rollups")
+    export = subparsers.add_parser("export", help="Rebuild the Parquet/Arrow history from every metric snapshot (needs pyarrow)")
+    export.add_argument("--subgraphs", action="store_true", help="Instead, export every subgraph of the last crawl to gzip CSV/NDJSON")
+    subparsers.add_parser("status", help="Check the status endpoints of the indexers allocating in the last completed crawl")
+    deploy = subparsers.add_parser("deploy", help="Upload the changed report files to DEPLOY_TARGET (or --target)")
+    deploy.add_argument("--target", help="file://, s3:// or sftp:// URL, overrides DEPLOY_TARGET")
+    return parser
+
+
+def cmd_fetch(args) -> int:
+    from datetime import datetime, timezone
+
+    from .costs import RunCosts, append_run_costs
+    from .fetch import fetch_network_subgraph_counts
+
+    costs = RunCosts.from_settings()
+    aggregate = fetch_network_subgraph_counts(costs)
+    costs.log_summary()
+    if costs.phases:
+        append_run_costs(costs, datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"), "full" if aggregate else "cached")
+    return 0 if aggregate else 1
+
+
+def cmd_export(args) -> int:
+    if args.subgraphs:
+        from .subgraph_export import export_subgraphs
+
+        return 0 if export_subgraphs() else 1
+
+    from .export import rebuild_history
+
+    return 0 if rebuild_history() else 1
+
+
+def cmd_compact(args) -> int:
+    from .compaction import run_maintenance
+
+    run_maintenance()
+    return 0
+
+
+def cmd_deploy(args) -> int:
+    from .config import get_settings
+    from .deploy import deploy_reports
+
+    if not (args.target or get_settings().deploy_target):
+        print("No deploy target: set DEPLOY_TARGET or pass --target.", file=sys.stderr)
+        return 2
+    return 0 if deploy_reports(args.target) else 1
+
+
+def cmd_status(args) -> int:
+    from .costs import RunCosts
+    from .fetch import load_network_subgraph_counts_from_journal
+    from .indexer_status import check_indexer_status
+
+    aggregate = load_network_subgraph_counts_from_journal()
+    if not aggregate or not aggregate.networks:
+        return 1
+    costs = RunCosts.from_settings()
+    check_indexer_status(aggregate, costs)
+    costs.log_summary()
+    return 0
+
+
+def cmd_run(args, render_only: bool = False) -> int:
+    from .pipeline import run
+
+    return run(render_only=render_only)
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    command = "render" if args.render_only else (args.command or "run")
+    if command == "fetch":
+        return cmd_fetch(args)
+    if command == "compact":
+        return cmd_compact(args)
+    if command == "export":
+        return cmd_export(args)
+    if command == "status":
+        return cmd_status(args)
+    if command == "deploy":
+        return cmd_deploy(args)
+    return cmd_run(args, render_only=command == "render")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
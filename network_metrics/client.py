@@ -0,0 +1,405 @@
+"""Gateway client that spreads requests over several API keys and endpoints.
+
+Every (API key, gateway endpoint) pair is a slot with its own token bucket. A request
+goes to the slot that has a token available, the lowest recent error rate and the
+fewest requests in flight; throttled (429) or failing slots cool down and slow down,
+and the request is retried on another slot. Slots are shared by every source thread.
+
+Every request has a timeout (REQUEST_TIMEOUT_SECONDS). With HEDGE_REQUESTS enabled, a
+request still running after the HEDGE_PERCENTILE latency of its phase gets a duplicate
+on another slot; the first successful response wins and the other one is abandoned.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from .config import get_settings
+from .costs import BudgetExceeded, RunCosts
+from .log import log_message
+from .query import RegisteredQuery, query_payload, unminified_payload_bytes
+
+
+# Statuses worth retrying on another key/endpoint
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Weight of the newest outcome in a slot's error rate
+ERROR_RATE_ALPHA = 0.2
+# Slots above this error rate are used only when no healthier slot is available
+UNHEALTHY_ERROR_RATE = 0.5
+THROTTLE_COOLDOWN_SECONDS = 30
+
+# Successful latencies kept per phase for the hedging percentile, and how many are
+# needed before hedging starts
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 8
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `capacity`; not thread-safe on its own (the scheduler locks)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class KeySlot:
+    def __init__(self, api_key: str, gateway_url: str, rate: float, burst: int, quota: int):
+        self.api_key = api_key
+        self.gateway_url = gateway_url
+        self.bucket = TokenBucket(rate, burst)
+        self.quota = quota
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def label(self) -> str:
+        key = self.api_key or "no-key"
+        return f"{key[:4]}…@{self.gateway_url.split('/')[2] if '//' in self.gateway_url else self.gateway_url}"
+
+    def exhausted(self) -> bool:
+        return self.quota > 0 and self.requests >= self.quota
+
+    def url_for(self, source) -> str:
+        template = source.url or self.gateway_url
+        return template.format(api_key=self.api_key, subgraph_id=source.subgraph_id)
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+def persisted_query_error(response):
+    """"PersistedQueryNotFound"/"PersistedQueryNotSupported" from a (small) GraphQL error response, else None"""
+    if len(response.content) > 4096 or b"PersistedQueryNot" not in response.content:
+        return None
+    for name in ("PersistedQueryNotFound", "PersistedQueryNotSupported"):
+        if name.encode() in response.content:
+            return name
+    return None
+
+
+def answered(response) -> bool:
+    """A 200 GraphQL response with data and no errors"""
+    if response.status_code != 200:
+        return False
+    try:
+        payload = response.json()
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and bool(payload.get("data")) and not payload.get("errors")
+
+
+class LatencyTracker:
+    """Recent successful latencies per phase kind ("crawl", "preflight", ...)"""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(phase.split(":")[0], deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def percentile(self, phase: str, q: float):
+        """Latency below which `q` of the recent requests finished, or None with too few samples"""
+        with self._lock:
+            samples = sorted(self.samples.get(phase.split(":")[0], ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class HedgePool:
+    """Long-lived daemon workers for hedged requests. Each worker keeps its session (and its
+    kept-alive connections) for the whole run, and a request abandoned to its hedge never
+    holds up the exit."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.threads = 0
+        self.tasks = queue.SimpleQueue()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        self.tasks.put((future, fn, args))
+        with self._lock:
+            if self.threads < self.workers:
+                self.threads += 1
+                threading.Thread(target=self.work, daemon=True).start()
+        return future
+
+    def work(self):
+        while True:
+            future, fn, args = self.tasks.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+
+class GatewayScheduler:
+    def __init__(self, slots: list, costs: RunCosts = None, timeout: float = None, hedge_percentile: float = None, workers: int = 4, persisted_queries: bool = False):
+        if not slots:
+            raise ValueError("GatewayScheduler needs at least one API key/endpoint slot")
+        self.slots = slots
+        self.costs = costs or RunCosts(fee_per_query=0.0)
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.latency = LatencyTracker()
+        self.persisted_queries = persisted_queries
+        self.persisted_registered = set()  # query hashes sent with their text and answered
+        self.persisted_known = set()  # query hashes a hash-only request has been answered for
+        # A primary and its hedge per calling thread
+        self.pool = HedgePool(2 * max(1, workers)) if hedge_percentile else None
+        self._lock = threading.Condition()
+        # Primaries outrun by their hedge: {future: (phase, started, won_at)} until they finish
+        self.abandoned = {}
+        self._local = threading.local()
+
+    @classmethod
+    def from_settings(cls, costs: RunCosts = None):
+        settings = get_settings()
+        slots = [
+            KeySlot(api_key, gateway_url, settings.key_rate_per_second, settings.key_burst, settings.key_query_quota)
+            for api_key in settings.api_keys
+            for gateway_url in settings.gateway_urls
+        ]
+        return cls(
+            slots, costs,
+            timeout=settings.request_timeout_seconds or None,
+            hedge_percentile=settings.hedge_percentile if settings.hedge_requests else None,
+            workers=settings.fetch_concurrency,
+            persisted_queries=settings.persisted_queries,
+        )
+
+    def session(self):
+        """One requests.Session per thread, reusing connections across pages. Its default
+        Accept-Encoding only lists what urllib3 can decode here: gzip/deflate, plus br when
+        brotli is installed and zstd when zstandard is (`pip install -e .[brotli,zstd]`)"""
+        import requests
+
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            self._local.session.headers.update({"Content-Type": "application/json"})
+        return self._local.session
+
+    def acquire(self, exclude=()) -> KeySlot:
+        """Block until a slot has a token; prefer healthy, idle slots and skip `exclude` when possible"""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                usable = [slot for slot in self.slots if not slot.exhausted()]
+                if not usable:
+                    raise QuotaExhausted("every API key has used its KEY_QUERY_QUOTA for this run")
+                candidates = [slot for slot in usable if slot not in exclude] or usable
+                ready = []
+                next_ready = None
+                for slot in candidates:
+                    wait = max(slot.bucket.wait_time(now), slot.cooldown_until - now)
+                    if wait <= 0:
+                        ready.append(slot)
+                    elif next_ready is None or wait < next_ready:
+                        next_ready = wait
+                if ready:
+                    slot = min(ready, key=lambda s: (s.error_rate > UNHEALTHY_ERROR_RATE, s.in_flight, s.error_rate, s.requests))
+                    slot.bucket.take()
+                    slot.requests += 1
+                    slot.in_flight += 1
+                    return slot
+                self._lock.wait(timeout=next_ready)
+
+    def release(self, slot: KeySlot, ok: bool, status=None, retry_after=None):
+        with self._lock:
+            slot.in_flight -= 1
+            slot.error_rate = (1 - ERROR_RATE_ALPHA) * slot.error_rate + ERROR_RATE_ALPHA * (0.0 if ok else 1.0)
+            if not ok:
+                slot.errors += 1
+            if status == 429:
+                # Back off this key: pause it and halve its sustained rate
+                slot.throttled += 1
+                slot.cooldown_until = time.monotonic() + (retry_after or THROTTLE_COOLDOWN_SECONDS)
+                slot.bucket.rate = max(0.1, slot.bucket.rate / 2)
+            self._lock.notify_all()
+
+    def send(self, slot: KeySlot, source, payload: dict, phase: str, request_bytes: int):
+        """One POST on an acquired slot, charged to `phase` and reported back to the slot"""
+        import requests
+
+        started = time.monotonic()
+        try:
+            response = self.session().post(slot.url_for(source), json=payload, timeout=self.timeout)
+        except requests.RequestException:
+            self.release(slot, ok=False)
+            self.costs.record(phase, request_bytes, 0)
+            raise
+        if response.status_code == 200:
+            self.latency.add(phase, time.monotonic() - started)
+        # raw.tell() counts the bytes read from the socket, before Content-Encoding is undone
+        self.costs.record(phase, request_bytes, len(response.content), wire_bytes=response.raw.tell() or None)
+        retry_after = response.headers.get("Retry-After")
+        self.release(
+            slot,
+            ok=response.status_code == 200,
+            status=response.status_code,
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+        return response
+
+    def send_hedged(self, slot: KeySlot, tried: list, source, payload: dict, phase: str, request_bytes: int):
+        """Send on `slot`; if no answer within the phase's latency percentile, race a duplicate on another slot"""
+        import requests
+
+        threshold = self.latency.percentile(phase, self.hedge_percentile)
+        if threshold is None:
+            # Too few samples to know what slow means yet: no race, the caller's own session
+            return self.send(slot, source, payload, phase, request_bytes)
+        started = time.monotonic()
+        primary = self.pool.submit(self.send, slot, source, payload, phase, request_bytes)
+        if wait([primary], timeout=threshold).done:
+            return primary.result()
+        try:
+            self.costs.reserve(phase)
+            hedge_slot = self.acquire(exclude=tried)
+        except (QuotaExhausted, BudgetExceeded):
+            return primary.result()
+        tried.append(hedge_slot)
+        hedge = self.pool.submit(self.send, hedge_slot, source, payload, phase, request_bytes)
+        self.costs.record_hedge(phase)
+
+        pending = {primary, hedge}
+        response, error = None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                if response.status_code == 200:
+                    if future is hedge:
+                        self.record_hedge_win(phase, started, primary)
+                    # The loser is not cancellable once sent: its response is dropped when it arrives
+                    return response
+        if response is not None:
+            return response
+        raise error
+
+    def record_hedge_win(self, phase: str, started: float, primary):
+        """Savings of a winning hedge: until the primary answers, or its timeout if it never does"""
+        won_at = time.monotonic()
+        self.costs.record_hedge(phase, won=True)
+        with self._lock:
+            self.abandoned[primary] = (phase, started, won_at)
+        primary.add_done_callback(self.record_hedge_savings)
+
+    def record_hedge_savings(self, primary, closing: bool = False):
+        with self._lock:
+            entry = self.abandoned.pop(primary, None)
+        if entry is None:
+            return
+        phase, started, won_at = entry
+        failed = closing or primary.cancelled() or primary.exception() is not None
+        finished_at = started + self.timeout if failed and self.timeout else time.monotonic()
+        self.costs.record_hedge(phase, saved_seconds=max(0.0, finished_at - won_at))
+
+    def post(self, source, payload: dict, phase: str = "crawl"):
+        """POST a GraphQL payload for `source`, retrying retryable failures on other slots.
+
+        Every attempt (and hedge) is charged to `phase` in the run costs. Returns the last
+        response, or raises the last connection error / QuotaExhausted / BudgetExceeded.
+        """
+        import requests
+
+        attempts = min(3, len(self.slots))
+        tried = []
+        last_error = None
+        response = None
+        request_bytes = len(json.dumps(payload))
+        for _ in range(attempts):
+            self.costs.reserve(phase)
+            slot = self.acquire(exclude=tried)
+            tried.append(slot)
+            try:
+                if self.pool is not None:
+                    response = self.send_hedged(slot, tried, source, payload, phase, request_bytes)
+                else:
+                    response = self.send(slot, source, payload, phase, request_bytes)
+            except requests.RequestException as e:
+                last_error = e
+                continue
+            if response.status_code not in RETRYABLE_STATUSES:
+                return response
+        if response is not None:
+            return response
+        raise last_error
+
+    def close(self):
+        """Count the primaries still outrun by their hedge as saving up to their timeout, without waiting for them"""
+        with self._lock:
+            pending = list(self.abandoned)
+        for primary in pending:
+            self.record_hedge_savings(primary, closing=True)
+
+    def query(self, source, query: RegisteredQuery, variables: dict = None, phase: str = "crawl"):
+        """POST a registered query. With PERSISTED_QUERIES the first request sends text and hash,
+        later ones the hash alone; an endpoint that lost the hash gets the text again. An endpoint
+        that doesn't support persisted queries, or doesn't answer the first hash-only request,
+        gets the text again and turns them off for the rest of the run."""
+        persisted = self.persisted_queries
+        with self._lock:
+            hash_only = persisted and (query.sha256 in self.persisted_known or query.sha256 in self.persisted_registered)
+        payload = query_payload(query, variables, persisted=persisted, include_text=not hash_only)
+        self.costs.record_request_saving(phase, unminified_payload_bytes(query, variables) - len(json.dumps(payload)))
+        response = self.post(source, payload, phase)
+        if not persisted:
+            return response
+
+        error = persisted_query_error(response)
+        if error == "PersistedQueryNotFound":
+            with self._lock:
+                self.persisted_known.discard(query.sha256)
+                self.persisted_registered.discard(query.sha256)
+            response = self.post(source, query_payload(query, variables, persisted=True), phase)
+        elif error == "PersistedQueryNotSupported":
+            log_message("⚠️ Gateway does not support persisted queries — sending query text for the rest of the run.")
+            self.persisted_queries = False
+            response = self.post(source, query_payload(query, variables), phase)
+        elif hash_only and query.sha256 not in self.persisted_known:
+            if answered(response):
+                with self._lock:
+                    self.persisted_known.add(query.sha256)
+            else:
+                log_message("⚠️ Gateway did not answer a persisted-query hash — sending query text for the rest of the run.")
+                self.persisted_queries = False
+                response = self.post(source, query_payload(query, variables), phase)
+        elif not hash_only and response.status_code == 200:
+            with self._lock:
+                self.persisted_registered.add(query.sha256)
+        return response
+
+    def log_summary(self):
+        for slot in self.slots:
+            log_message(f"🔑 {slot.label}: {slot.requests} requests, {slot.errors} errors, {slot.throttled} throttled")
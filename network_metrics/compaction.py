@@ -0,0 +1,159 @@
+"""Compaction, rollups and retention for reports/metrics.
+
+- Loose metric_*.json files of months older than METRIC_COMPACT_AFTER_DAYS are rolled
+  into one gzip archive per month and removed; the index is updated to point at it.
+- rollups.json keeps hourly (from the hourly history, see hourly.py) -> daily -> weekly tiers, each pruned after its own
+  retention window (0 keeps the tier forever). Tiers are updated incrementally:
+  only periods newer than the last stored point are read.
+"""
+import os
+import gzip
+import json
+from datetime import datetime, timezone, timedelta, date as date_type
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+from . import hourly, store
+
+
+ROLLUPS_FILE = "rollups.json"
+TIERS = ("hourly", "daily", "weekly")
+
+
+def compact_metrics(now: datetime = None) -> int:
+    """Move loose snapshots of old months into monthly archives; returns the number of files archived"""
+    now = now or datetime.now(timezone.utc)
+    settings = get_settings()
+    metrics_dir = ensure_dir(settings.metrics_dir)
+    cutoff = (now - timedelta(days=settings.metric_compact_after_days)).strftime("%Y-%m")
+
+    by_month = {}
+    for file in os.listdir(metrics_dir):
+        if store.is_metric_file(file):
+            month = store.snapshot_date(file)[:7]
+            if month < cutoff:
+                by_month.setdefault(month, []).append(file)
+    if not by_month:
+        return 0
+
+    index = store.load_metrics_index()
+    archived = 0
+    for month, files in sorted(by_month.items()):
+        path = store.archive_path(month)
+        ensure_dir(os.path.dirname(path))
+        snapshots = dict(store.read_archive(path)) if os.path.exists(path) else {}
+        for file in files:
+            with open(os.path.join(metrics_dir, file), "r") as f:
+                snapshots[file] = json.load(f)
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as f:
+            json.dump({"month": month, "snapshots": dict(sorted(snapshots.items()))}, f, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
+        relative_path = os.path.relpath(path, metrics_dir).replace(os.sep, "/")
+        for file in files:
+            store.index_add(index, file, archive=relative_path)
+        # Persist the index before deleting, so a crash never leaves it pointing at missing files
+        store.save_metrics_index(index)
+        for file in files:
+            os.remove(os.path.join(metrics_dir, file))
+        archived += len(files)
+        log_message(f"🗜️ Compacted {len(files)} snapshots into {path}")
+    return archived
+
+
+# --- Rollups
+
+def rollup_point(period: str, snapshot: dict) -> dict:
+    return {
+        "period": period,
+        "timestamp": snapshot.get("timestamp"),
+        "total_subgraphs": snapshot.get("total_subgraphs"),
+        "networks": snapshot.get("networks", {}),
+    }
+
+
+def period_start(tier: str, period: str) -> date_type:
+    if tier == "weekly":
+        year, week = period.split("-W")
+        return date_type.fromisocalendar(int(year), int(week), 1)
+    return date_type.fromisoformat(period[:10])
+
+
+def iso_week(day: str) -> str:
+    year, week, _ = date_type.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def load_rollups() -> dict:
+    path = os.path.join(get_settings().metrics_dir, ROLLUPS_FILE)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            rollups = json.load(f)
+    else:
+        rollups = {}
+    for tier in TIERS:
+        rollups.setdefault(tier, [])
+    return rollups
+
+
+def upsert_points(points: list, new_points: list) -> list:
+    merged = {p["period"]: p for p in points}
+    merged.update({p["period"]: p for p in new_points})
+    return [merged[period] for period in sorted(merged)]
+
+
+def hourly_points(since_day: str) -> list:
+    """Last point of every hour since `since_day`, from the append-only hourly history"""
+    since = datetime.fromisoformat(since_day).replace(tzinfo=timezone.utc) if since_day else None
+    points = {}
+    for point in hourly.iter_hourly_points(since=since):
+        period = point["t"][:13]
+        points[period] = {
+            "period": period,
+            "timestamp": point["t"],
+            "total_subgraphs": point["total"],
+            "networks": point["s"],
+        }
+    return list(points.values())
+
+
+def update_rollups(now: datetime = None) -> dict:
+    """Bring every tier up to date, apply retention and persist rollups.json"""
+    now = now or datetime.now(timezone.utc)
+    settings = get_settings()
+    rollups = load_rollups()
+
+    last_hour = rollups["hourly"][-1]["period"][:10] if rollups["hourly"] else None
+    rollups["hourly"] = upsert_points(rollups["hourly"], hourly_points(last_hour))
+
+    last_day = rollups["daily"][-1]["period"] if rollups["daily"] else None
+    daily = [rollup_point(day, snapshot) for day, snapshot in store.iter_daily_snapshots(since=last_day)]
+    rollups["daily"] = upsert_points(rollups["daily"], daily)
+
+    # A week is represented by its last daily point
+    last_week = rollups["weekly"][-1]["period"] if rollups["weekly"] else None
+    weekly = {}
+    for point in rollups["daily"]:
+        week = iso_week(point["period"])
+        if last_week is None or week >= last_week:
+            weekly[week] = dict(point, period=week)
+    rollups["weekly"] = upsert_points(rollups["weekly"], list(weekly.values()))
+
+    retention = {
+        "hourly": settings.rollup_hourly_retention_days,
+        "daily": settings.rollup_daily_retention_days,
+        "weekly": settings.rollup_weekly_retention_days,
+    }
+    for tier in TIERS:
+        if retention[tier] > 0:
+            oldest = (now - timedelta(days=retention[tier])).date()
+            rollups[tier] = [p for p in rollups[tier] if period_start(tier, p["period"]) >= oldest]
+
+    store.write_json_atomic(os.path.join(ensure_dir(settings.metrics_dir), ROLLUPS_FILE), rollups, separators=(",", ":"))
+    log_message(f"📈 Updated rollups: " + ", ".join(f"{len(rollups[tier])} {tier}" for tier in TIERS))
+    return rollups
+
+
+def run_maintenance(now: datetime = None):
+    compact_metrics(now)
+    hourly.downsample_hourly(now)
+    update_rollups(now)
@@ -0,0 +1,252 @@
+import os
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple
+
+
+GATEWAY_URL = "https://gateway.thegraph.com/api/{api_key}/subgraphs/id/{subgraph_id}"
+
+
+# Runtime settings, read from the environment (and the .env file) on first use
+@dataclass(frozen=True)
+class Settings:
+    api_key: str
+    metric_snapshot_hour: int
+    journal_max_age_hours: int
+    report_dir: str
+    log_dir: str
+    metrics_dir: str
+    export_dir: str
+    metric_compact_after_days: int
+    subgraph_export: bool
+    rollup_hourly_retention_days: int
+    rollup_daily_retention_days: int
+    rollup_weekly_retention_days: int
+    idset_retention_days: int
+    journal_dir: str
+    staging_dir: str
+    stale_after_minutes: int
+    sparkline_cache_dir: str
+    sparkline_days: int
+    sparkline_points: int
+    search_index: bool
+    sources_file: str
+    fetch_concurrency: int
+    preflight: bool
+    preflight_max_age_hours: int
+    page_size_start: int
+    page_size_min: int
+    page_target_seconds: float
+    page_target_bytes: int
+    alias_batch_start: int
+    alias_batch_max: int
+    alias_batch_target_bytes: int
+    deployment_metrics: bool
+    allocation_churn: bool
+    allocation_state_file: str
+    churn_days: int
+    churn_backfill_epochs: int
+    churn_interval_hours: float
+    indexer_stake: bool
+    indexer_table_file: str
+    indexer_status: bool
+    indexer_status_file: str
+    indexer_status_concurrency: int
+    indexer_status_timeout_seconds: float
+    indexer_status_max_lag_blocks: int
+    api_keys: Tuple[str, ...]
+    gateway_urls: Tuple[str, ...]
+    persisted_queries: bool
+    request_timeout_seconds: float
+    hedge_requests: bool
+    hedge_percentile: float
+    key_rate_per_second: float
+    key_burst: int
+    key_query_quota: int
+    query_fee_grt: float
+    run_query_budget: int
+    run_grt_budget: float
+    deploy_target: str
+    deploy_manifest_dir: str
+    deploy_concurrency: int
+    deploy_delete: bool
+    s3_endpoint_url: str
+    sftp_key_file: str
+    sftp_password: str
+    sftp_host_key: str
+    sftp_known_hosts: str
+    validation_window_days: int
+    validation_min_points: int
+    validation_z_threshold: float
+    validation_pct_threshold: float
+    validation_block_pct: float
+    validation_min_network_size: int
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load environment variables from the .env file and build the settings once per process"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.getenv("GRAPH_API_KEY")
+    report_dir = os.getenv("REPORT_DIR", "reports")
+    cache_dir = os.getenv("CACHE_DIR", "cache")
+    return Settings(
+        api_key=api_key,
+        # Load metric snapshot target hour from environment, default to 8
+        metric_snapshot_hour=int(os.getenv("METRIC_SNAPSHOT_HOUR", 8)),
+        # A journal older than this is considered stale and a new crawl starts from skip 0
+        journal_max_age_hours=int(os.getenv("JOURNAL_MAX_AGE_HOURS", 6)),
+        report_dir=report_dir,
+        log_dir=os.getenv("LOG_DIR", "logs"),
+        metrics_dir=os.path.join(report_dir, "metrics"),
+        export_dir=os.path.join(report_dir, "exports"),
+        # Stream every subgraph of each fresh crawl to reports/exports/subgraphs/ (see subgraph_export.py)
+        subgraph_export=os.getenv("SUBGRAPH_EXPORT", "false").lower() in ("1", "true", "yes"),
+        # Loose daily snapshots of months older than this are rolled into monthly archives
+        metric_compact_after_days=int(os.getenv("METRIC_COMPACT_AFTER_DAYS", 31)),
+        # Retention per rollup tier in days (0 keeps the tier forever)
+        rollup_hourly_retention_days=int(os.getenv("ROLLUP_HOURLY_RETENTION_DAYS", 7)),
+        rollup_daily_retention_days=int(os.getenv("ROLLUP_DAILY_RETENTION_DAYS", 400)),
+        rollup_weekly_retention_days=int(os.getenv("ROLLUP_WEEKLY_RETENTION_DAYS", 0)),
+        # Days of per-run subgraph id snapshots kept for the added/removed columns (0 keeps them forever)
+        idset_retention_days=int(os.getenv("IDSET_RETENTION_DAYS", 21)),
+        journal_dir=os.path.join(cache_dir, "journal"),
+        # Artifacts are rendered here, then swapped into the report directory
+        staging_dir=os.path.join(cache_dir, "staging"),
+        # The dashboard's freshness badge turns amber when the data is older than this
+        stale_after_minutes=int(os.getenv("STALE_AFTER_MINUTES", 120)),
+        # Dashboard sparklines: history shown, points kept per chart after downsampling, and
+        # the SVG cache keyed by content hash (see sparklines.py)
+        sparkline_cache_dir=os.path.join(cache_dir, "sparklines"),
+        sparkline_days=int(os.getenv("SPARKLINE_DAYS", 90)),
+        sparkline_points=int(os.getenv("SPARKLINE_POINTS", 48)),
+        # Build the client-side subgraph search index in reports/search/ (see search.py)
+        search_index=os.getenv("SEARCH_INDEX", "true").lower() in ("1", "true", "yes"),
+        # Optional JSON list of network subgraphs to crawl (see load_sources)
+        sources_file=os.getenv("NETWORK_SOURCES_FILE", "sources.json"),
+        # Maximum number of sources crawled at the same time
+        fetch_concurrency=int(os.getenv("FETCH_CONCURRENCY", 4)),
+        # One small _meta/counter request per source first; an unchanged source reuses its last crawl,
+        # but never one older than PREFLIGHT_MAX_AGE_HOURS (see fetch.preflight_fingerprint)
+        preflight=os.getenv("PREFLIGHT", "true").lower() in ("1", "true", "yes"),
+        preflight_max_age_hours=int(os.getenv("PREFLIGHT_MAX_AGE_HOURS", 24)),
+        # Rows per page (`first`, at most 1000) adapt to response time and size per page, see fetch.PageSizer
+        page_size_start=int(os.getenv("PAGE_SIZE_START", 1000)),
+        page_size_min=int(os.getenv("PAGE_SIZE_MIN", 100)),
+        page_target_seconds=float(os.getenv("PAGE_TARGET_SECONDS", 10)),
+        page_target_bytes=int(os.getenv("PAGE_TARGET_BYTES", 4_000_000)),
+        # Pages packed into one request with GraphQL aliases: initial and maximum count,
+        # and the response size the batch is tuned towards
+        alias_batch_start=int(os.getenv("ALIAS_BATCH_START", 2)),
+        alias_batch_max=int(os.getenv("ALIAS_BATCH_MAX", 8)),
+        alias_batch_target_bytes=int(os.getenv("ALIAS_BATCH_TARGET_BYTES", 8_000_000)),
+        # Fetch curation signal, allocated stake and query fees of the crawled deployments (a few extra requests per crawl)
+        deployment_metrics=os.getenv("DEPLOYMENT_METRICS", "true").lower() in ("1", "true", "yes"),
+        # Allocations opened/closed since the last run, fetched from per-source epoch high-water marks
+        # (cache/allocations.json) and appended to reports/metrics/allocations/; see churn.py
+        allocation_churn=os.getenv("ALLOCATION_CHURN", "true").lower() in ("1", "true", "yes"),
+        allocation_state_file=os.path.join(cache_dir, "allocations.json"),
+        churn_days=int(os.getenv("CHURN_DAYS", 7)),
+        churn_backfill_epochs=int(os.getenv("CHURN_BACKFILL_EPOCHS", 7)),
+        # Hours between two fetches of allocation events per source (an epoch lasts about a day)
+        churn_interval_hours=float(os.getenv("CHURN_INTERVAL_HOURS", 24)),
+        # Fetch the stake and delegation of the allocating indexers once per crawl (kept in cache/indexers.json)
+        # for the stake-weighted coverage and concentration of every network
+        indexer_stake=os.getenv("INDEXER_STAKE", "true").lower() in ("1", "true", "yes"),
+        indexer_table_file=os.path.join(cache_dir, "indexers.json"),
+        # Optional sync check of every allocating indexer's status endpoint after each crawl (see indexer_status.py):
+        # indexers checked at a time, time allowed per request (connect and whole response), and blocks behind the chain head still counted as synced
+        indexer_status=os.getenv("INDEXER_STATUS", "false").lower() in ("1", "true", "yes"),
+        indexer_status_file=os.path.join(cache_dir, "indexer_status.json"),
+        indexer_status_concurrency=int(os.getenv("INDEXER_STATUS_CONCURRENCY", 32)),
+        indexer_status_timeout_seconds=float(os.getenv("INDEXER_STATUS_TIMEOUT_SECONDS", 5)),
+        indexer_status_max_lag_blocks=int(os.getenv("INDEXER_STATUS_MAX_LAG_BLOCKS", 100)),
+        # Several API keys and gateway endpoints (comma-separated) share the crawl, see client.py
+        api_keys=split_list(os.getenv("GRAPH_API_KEYS")) or (api_key,),
+        gateway_urls=split_list(os.getenv("GATEWAY_URLS")) or (GATEWAY_URL,),
+        # Send registered queries as persisted-query hashes (only for endpoints that support them)
+        persisted_queries=os.getenv("PERSISTED_QUERIES", "false").lower() in ("1", "true", "yes"),
+        # Gateway request timeout (0 = none), and optional hedging: a request slower than the
+        # HEDGE_PERCENTILE of recent ones gets a duplicate on another key/endpoint (see client.py)
+        request_timeout_seconds=float(os.getenv("REQUEST_TIMEOUT_SECONDS", 60)),
+        hedge_requests=os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes"),
+        hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", 0.95)),
+        # Token bucket per key/endpoint: sustained requests per second, burst size,
+        # and maximum requests per run (0 = no quota)
+        key_rate_per_second=float(os.getenv("KEY_RATE_PER_SECOND", 5)),
+        key_burst=int(os.getenv("KEY_BURST", 10)),
+        key_query_quota=int(os.getenv("KEY_QUERY_QUOTA", 0)),
+        # Estimated gateway fee per query, and per-run budgets (0 = unlimited), see costs.py
+        query_fee_grt=float(os.getenv("QUERY_FEE_GRT", 0.0004)),
+        run_query_budget=int(os.getenv("RUN_QUERY_BUDGET", 0)),
+        run_grt_budget=float(os.getenv("RUN_GRT_BUDGET", 0)),
+        # Where reports/ is deployed after every published run (file://, s3:// or sftp://, see deploy.py),
+        # with the content-hash manifest of the last deploy per target and parallel uploads
+        deploy_target=os.getenv("DEPLOY_TARGET", ""),
+        deploy_manifest_dir=os.path.join(cache_dir, "deploy"),
+        deploy_concurrency=int(os.getenv("DEPLOY_CONCURRENCY", 8)),
+        deploy_delete=os.getenv("DEPLOY_DELETE", "false").lower() in ("1", "true", "yes"),
+        s3_endpoint_url=os.getenv("S3_ENDPOINT_URL", ""),
+        sftp_key_file=os.getenv("SFTP_KEY_FILE", ""),
+        sftp_password=os.getenv("SFTP_PASSWORD", ""),
+        # The SFTP server must present this key ("ssh-ed25519 AAAA...", as printed by ssh-keyscan)
+        # or one listed for it in SFTP_KNOWN_HOSTS; unknown servers are never sent credentials
+        sftp_host_key=os.getenv("SFTP_HOST_KEY", ""),
+        sftp_known_hosts=os.path.expanduser(os.getenv("SFTP_KNOWN_HOSTS", "~/.ssh/known_hosts")),
+        # Anomaly checks against the hourly history of the last days, see validate.py:
+        # a change is anomalous when it is both >= the percent threshold and >= the z-score
+        # threshold; an anomalous drop of the total >= VALIDATION_BLOCK_PCT blocks publishing (0 = never)
+        validation_window_days=int(os.getenv("VALIDATION_WINDOW_DAYS", 7)),
+        validation_min_points=int(os.getenv("VALIDATION_MIN_POINTS", 6)),
+        validation_z_threshold=float(os.getenv("VALIDATION_Z_THRESHOLD", 4.0)),
+        validation_pct_threshold=float(os.getenv("VALIDATION_PCT_THRESHOLD", 5.0)),
+        validation_block_pct=float(os.getenv("VALIDATION_BLOCK_PCT", 10.0)),
+        validation_min_network_size=int(os.getenv("VALIDATION_MIN_NETWORK_SIZE", 50)),
+    )
+
+
+def split_list(value: str) -> tuple:
+    return tuple(item.strip() for item in (value or "").split(",") if item.strip())
+
+
+def ensure_dir(path: str) -> str:
+    """Create a directory if it doesn't exist and return it"""
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# A network subgraph to crawl. Sources with merge=True are summed into the dashboard
+# totals; the others (e.g. testnets) are only reported side by side.
+@dataclass(frozen=True)
+class Source:
+    name: str
+    subgraph_id: str = None
+    url: str = None  # full endpoint, may contain {api_key}; overrides subgraph_id
+    merge: bool = True
+
+
+# Graph Network subgraph on Arbitrum, the only source crawled when sources.json is absent
+DEFAULT_SOURCES = [Source(name="arbitrum", subgraph_id="DZz4kDTdmzWLWsV373w2bSmoar3umKKH9y82SUKr5qmp")]
+
+
+@lru_cache(maxsize=None)
+def load_sources() -> List[Source]:
+    """Sources from NETWORK_SOURCES_FILE, e.g.
+    [{"name": "arbitrum", "subgraph_id": "DZz4..."}, {"name": "sepolia", "subgraph_id": "...", "merge": false}]
+    """
+    path = get_settings().sources_file
+    if not os.path.exists(path):
+        return DEFAULT_SOURCES
+    with open(path, "r") as f:
+        entries = json.load(f)
+    sources = [Source(**entry) for entry in entries]
+    names = [source.name for source in sources]
+    if not sources or len(set(names)) != len(names):
+        raise ValueError(f"{path} must list at least one source and source names must be unique")
+    for source in sources:
+        if not (source.subgraph_id or source.url):
+            raise ValueError(f"Source '{source.name}' in {path} needs a subgraph_id or a url")
+    return sources
@@ -0,0 +1,114 @@
+"""Per-run query cost accounting and budget guard.
+
+Every gateway request is recorded under a phase ("crawl:<source>", ...) with its request
+and response bytes and an estimated fee (QUERY_FEE_GRT per query). Totals are logged,
+appended to reports/metrics/costs.jsonl and stored in the daily snapshot.
+
+RUN_QUERY_BUDGET / RUN_GRT_BUDGET cap a run: once reached, further requests are refused
+and the run falls back to cheaper strategies: the pages fetched so far stay in the
+journal and the next run resumes from them (incremental), while this run renders the
+last completed crawl (cached).
+"""
+import os
+import json
+import threading
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+COSTS_FILE = "costs.jsonl"
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class RunCosts:
+    def __init__(self, fee_per_query: float, max_queries: int = 0, max_grt: float = 0.0):
+        self.fee_per_query = fee_per_query
+        self.max_queries = max_queries
+        self.max_grt = max_grt
+        self.phases = {}
+        self.hedging = {"hedged": 0, "won": 0, "saved_seconds": 0.0}
+        self.budget_exceeded = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        settings = get_settings()
+        return cls(settings.query_fee_grt, settings.run_query_budget, settings.run_grt_budget)
+
+    def _phase(self, phase: str) -> dict:
+        return self.phases.setdefault(phase, {"queries": 0, "request_bytes": 0, "request_bytes_saved": 0, "response_bytes": 0, "wire_bytes": 0, "fee_grt": 0.0})
+
+    def reserve(self, phase: str):
+        """Count one query before it is sent; raise BudgetExceeded if it would go over budget"""
+        with self._lock:
+            totals = self.totals()
+            over_queries = self.max_queries > 0 and totals["queries"] + 1 > self.max_queries
+            over_grt = self.max_grt > 0 and totals["fee_grt"] + self.fee_per_query > self.max_grt
+            if over_queries or over_grt:
+                self.budget_exceeded = True
+                raise BudgetExceeded(f"run budget reached ({totals['queries']} queries, {totals['fee_grt']:.4f} GRT)")
+            entry = self._phase(phase)
+            entry["queries"] += 1
+            entry["fee_grt"] += self.fee_per_query
+
+    def record(self, phase: str, request_bytes: int, response_bytes: int, wire_bytes: int = None):
+        """Sizes of one request: payload sent, decoded response and response bytes on the wire (compressed)"""
+        with self._lock:
+            entry = self._phase(phase)
+            entry["request_bytes"] += request_bytes
+            entry["response_bytes"] += response_bytes
+            entry["wire_bytes"] += response_bytes if wire_bytes is None else wire_bytes
+
+    def record_request_saving(self, phase: str, saved_bytes: int):
+        """Payload bytes saved by minifying, variables and persisted queries, see query.register_query"""
+        with self._lock:
+            self._phase(phase)["request_bytes_saved"] += saved_bytes
+
+    def record_hedge(self, phase: str, won: bool = False, saved_seconds: float = None):
+        """A duplicate request sent for `phase`, one that answered first (won=True), or the time it saved"""
+        with self._lock:
+            if saved_seconds is not None:
+                self.hedging["saved_seconds"] += saved_seconds
+            elif won:
+                self.hedging["won"] += 1
+            else:
+                self.hedging["hedged"] += 1
+
+    def totals(self) -> dict:
+        totals = {"queries": 0, "request_bytes": 0, "request_bytes_saved": 0, "response_bytes": 0, "wire_bytes": 0, "fee_grt": 0.0}
+        for entry in self.phases.values():
+            for key in totals:
+                totals[key] += entry[key]
+        return totals
+
+    def as_dict(self) -> dict:
+        return {
+            "totals": dict(self.totals(), fee_grt=round(self.totals()["fee_grt"], 6)),
+            "phases": {phase: dict(entry, fee_grt=round(entry["fee_grt"], 6)) for phase, entry in sorted(self.phases.items())},
+            "budget": {"max_queries": self.max_queries, "max_grt": self.max_grt, "exceeded": self.budget_exceeded},
+            "hedging": dict(self.hedging, saved_seconds=round(self.hedging["saved_seconds"], 2)),
+        }
+
+    def log_summary(self):
+        for phase, entry in sorted(self.phases.items()):
+            log_message(f"💰 {phase}: {entry['queries']} queries, {entry['response_bytes'] / 1e6:.2f} MB received, ~{entry['fee_grt']:.4f} GRT")
+        totals = self.totals()
+        log_message(f"💰 Run total: {totals['queries']} queries, {totals['request_bytes'] / 1e3:.1f} kB sent, {totals['response_bytes'] / 1e6:.2f} MB received, ~{totals['fee_grt']:.4f} GRT")
+        log_message(f"🗜️ Saved {totals['request_bytes_saved'] / 1e3:.1f} kB of query text and {(totals['response_bytes'] - totals['wire_bytes']) / 1e6:.2f} MB of response transfer ({totals['wire_bytes'] / 1e6:.2f} MB on the wire)")
+        if self.hedging["hedged"]:
+            rate = self.hedging["hedged"] / max(1, totals["queries"] - self.hedging["hedged"])
+            log_message(f"🏁 Hedged {self.hedging['hedged']} requests ({rate:.0%}), {self.hedging['won']} answered first, ~{self.hedging['saved_seconds']:.1f}s saved")
+
+
+def costs_path() -> str:
+    return os.path.join(get_settings().metrics_dir, COSTS_FILE)
+
+
+def append_run_costs(costs: RunCosts, timestamp: str, mode: str):
+    path = os.path.join(ensure_dir(get_settings().metrics_dir), COSTS_FILE)
+    with open(path, "a") as f:
+        f.write(json.dumps(dict(costs.as_dict(), t=timestamp, mode=mode), separators=(",", ":")) + "\n")
@@ -0,0 +1,292 @@
+"""Incremental deployment of the report directory to a static host.
+
+DEPLOY_TARGET selects the sink:
+    file:///var/www/subgraphs          local (or mounted) directory
+    s3://bucket/prefix                 S3 or an S3-compatible store such as MinIO
+                                       (S3_ENDPOINT_URL, credentials from the usual AWS_* variables)
+    sftp://user@host:22/var/www/site   SFTP (SFTP_KEY_FILE or SFTP_PASSWORD; the server key must match
+                                       SFTP_HOST_KEY or SFTP_KNOWN_HOSTS)
+
+Only files whose content hash differs from the manifest of the last successful deploy
+to that target (cache/deploy/<target>.json) are uploaded, DEPLOY_CONCURRENCY at a time,
+with index.html last. Files removed from the report directory are deleted remotely
+when DEPLOY_DELETE is set.
+
+S3 needs the optional `boto3` dependency (`pip install -e .[s3]`), SFTP needs
+`paramiko` (`pip install -e .[sftp]`).
+"""
+import os
+import fnmatch
+import hashlib
+import json
+import mimetypes
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import unquote, urlparse
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+from .staging import PUBLISH_LAST
+
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".csv": "text/csv; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".jsonl": "application/x-ndjson",
+    ".svg": "image/svg+xml",
+    ".gz": "application/gzip",
+    ".parquet": "application/vnd.apache.parquet",
+    ".arrow": "application/vnd.apache.arrow.file",
+}
+
+# First matching pattern wins: pages and API endpoints change every run, logos and
+# archived months practically never
+CACHE_CONTROL = [
+    ("*.html", "public, max-age=300, must-revalidate"),
+    ("api/*", "public, max-age=300, must-revalidate"),
+    ("search/index.json", "public, max-age=300, must-revalidate"),
+    ("images/*", "public, max-age=604800"),
+    ("metrics/archive/*", "public, max-age=2592000, immutable"),
+    ("exports/daily/*", "public, max-age=86400"),
+    ("*", "public, max-age=3600"),
+]
+
+
+def content_type(path: str) -> str:
+    return CONTENT_TYPES.get(os.path.splitext(path)[1].lower()) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def cache_control(path: str) -> str:
+    return next(value for pattern, value in CACHE_CONTROL if fnmatch.fnmatch(path, pattern))
+
+
+class LocalSink:
+    def __init__(self, root: str):
+        self.root = root
+
+    def upload(self, local_path: str, remote_path: str, headers: dict):
+        target = os.path.join(self.root, remote_path)
+        ensure_dir(os.path.dirname(target))
+        shutil.copyfile(local_path, f"{target}.tmp")
+        os.replace(f"{target}.tmp", target)
+
+    def delete(self, remote_path: str):
+        path = os.path.join(self.root, remote_path)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class S3Sink:
+    def __init__(self, bucket: str, prefix: str, endpoint_url: str = None):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        # Clients are thread-safe, one is shared by every upload worker
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def key(self, remote_path: str) -> str:
+        return f"{self.prefix}/{remote_path}" if self.prefix else remote_path
+
+    def upload(self, local_path: str, remote_path: str, headers: dict):
+        self.client.upload_file(local_path, self.bucket, self.key(remote_path), ExtraArgs={
+            "ContentType": headers["Content-Type"],
+            "CacheControl": headers["Cache-Control"],
+        })
+
+    def delete(self, remote_path: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(remote_path))
+
+
+class SftpSink:
+    """One SSH connection per upload worker (paramiko SFTP clients are not thread-safe)"""
+
+    def __init__(self, host: str, port: int, username: str, root: str, key_file: str = None, password: str = None,
+                 host_key: str = None, known_hosts: str = None):
+        import paramiko
+
+        self.paramiko = paramiko
+        self.host, self.port, self.username, self.root = host, port, username, root
+        self.key_file, self.password = key_file, password
+        self.host_key = self.expected_host_key(host_key, known_hosts)
+        self.local = threading.local()
+
+    def expected_host_key(self, host_key: str, known_hosts: str):
+        """Key the server must present: SFTP_HOST_KEY, else its first entry in known_hosts"""
+        if host_key:
+            try:
+                entry = self.paramiko.hostkeys.HostKeyEntry.from_line(f"{self.host} {host_key}")
+            except (self.paramiko.hostkeys.InvalidHostKey, self.paramiko.SSHException, ValueError):
+                entry = None
+            if entry is None or entry.key is None:
+                raise ValueError("SFTP_HOST_KEY is not a public key line (\"ssh-ed25519 AAAA...\")")
+            return entry.key
+        name = self.host if self.port == 22 else f"[{self.host}]:{self.port}"
+        try:
+            keys = self.paramiko.HostKeys(known_hosts).lookup(name) if known_hosts else None
+        except IOError:
+            keys = None
+        if not keys:
+            raise ValueError(f"no host key for {name}: set SFTP_HOST_KEY or add it to {known_hosts or 'SFTP_KNOWN_HOSTS'}")
+        return next(iter(keys.values()))
+
+    def sftp(self):
+        if not hasattr(self.local, "sftp"):
+            transport = self.paramiko.Transport((self.host, self.port))
+            key = self.paramiko.PKey.from_path(self.key_file) if self.key_file else None
+            # With hostkey set, paramiko refuses a server presenting any other key before authenticating
+            transport.connect(hostkey=self.host_key, username=self.username, password=self.password, pkey=key)
+            self.local.sftp = self.paramiko.SFTPClient.from_transport(transport)
+        return self.local.sftp
+
+    def makedirs(self, directory: str):
+        sftp = self.sftp()
+        path = ""
+        for part in directory.strip("/").split("/"):
+            path = f"{path}/{part}"
+            try:
+                sftp.stat(path)
+            except IOError:
+                sftp.mkdir(path)
+
+    def upload(self, local_path: str, remote_path: str, headers: dict):
+        # Headers are the web server's business on an SFTP host
+        target = f"{self.root.rstrip('/')}/{remote_path}"
+        self.makedirs(os.path.dirname(target))
+        self.sftp().put(local_path, f"{target}.tmp")
+        self.sftp().posix_rename(f"{target}.tmp", target)
+
+    def delete(self, remote_path: str):
+        try:
+            self.sftp().remove(f"{self.root.rstrip('/')}/{remote_path}")
+        except IOError:
+            pass
+
+
+def open_sink(target: str):
+    """Sink for a DEPLOY_TARGET url, or None (logged) when it can't be used"""
+    settings = get_settings()
+    url = urlparse(target)
+    try:
+        if url.scheme == "s3":
+            return S3Sink(url.netloc, url.path, settings.s3_endpoint_url)
+        if url.scheme == "sftp":
+            return SftpSink(url.hostname, url.port or 22, unquote(url.username or ""), url.path or "/",
+                            settings.sftp_key_file, settings.sftp_password, settings.sftp_host_key, settings.sftp_known_hosts)
+    except ImportError as e:
+        log_message(f"⚠️ {e.name} is not installed — skipping deploy to {target} (pip install -e .[{url.scheme}]).")
+        return None
+    except ValueError as e:
+        log_message(f"⚠️ Skipping deploy to {target}: {e}.")
+        return None
+    if url.scheme in ("", "file"):
+        return LocalSink(unquote(url.path) if url.scheme else target)
+    log_message(f"⚠️ Skipping deploy to {target}: unsupported scheme {url.scheme}:// (use file://, s3:// or sftp://).")
+    return None
+
+
+def manifest_path(target: str) -> str:
+    name = hashlib.sha1(target.encode()).hexdigest()[:16]
+    return os.path.join(get_settings().deploy_manifest_dir, f"{name}.json")
+
+
+def load_manifest(target: str) -> dict:
+    try:
+        with open(manifest_path(target), "r") as f:
+            return json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_manifest(target: str, files: dict):
+    from .store import write_json_atomic
+
+    ensure_dir(get_settings().deploy_manifest_dir)
+    write_json_atomic(manifest_path(target), {"target": target, "files": files}, separators=(",", ":"))
+
+
+def file_hash(path: str, previous: dict = None) -> dict:
+    """{"sha256", "size", "mtime"}; unchanged size and mtime reuse the previous hash"""
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime") == stat.st_mtime_ns:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {"sha256": digest.hexdigest(), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def scan_reports(report_dir: str, manifest: dict) -> dict:
+    files = {}
+    for root, _, names in os.walk(report_dir):
+        for name in names:
+            if name.endswith(".tmp"):
+                continue
+            relative_path = os.path.relpath(os.path.join(root, name), report_dir).replace(os.sep, "/")
+            files[relative_path] = file_hash(os.path.join(root, name), manifest.get(relative_path))
+    return files
+
+
+def deploy_reports(target: str = None, report_dir: str = None) -> bool:
+    """Upload the changed files of the report directory to DEPLOY_TARGET; True when everything was deployed"""
+    settings = get_settings()
+    target = target or settings.deploy_target
+    report_dir = report_dir or settings.report_dir
+    if not target:
+        return True
+    sink = open_sink(target)
+    if sink is None:
+        return False
+
+    manifest = load_manifest(target)
+    local = scan_reports(report_dir, manifest)
+    changed = [path for path, entry in local.items() if manifest.get(path, {}).get("sha256") != entry["sha256"]]
+    removed = [path for path in manifest if path not in local] if settings.deploy_delete else []
+    changed.sort(key=lambda path: (os.path.basename(path) in PUBLISH_LAST, path))
+    last = [path for path in changed if os.path.basename(path) in PUBLISH_LAST]
+    first = changed[:len(changed) - len(last)]
+    log_message(f"📦 Deploying to {target}: {len(changed)} changed, {len(local) - len(changed)} unchanged, {len(removed)} removed")
+
+    uploaded = {path: entry for path, entry in manifest.items() if path in local}
+    done = []
+    failed = 0
+
+    def upload(path: str):
+        headers = {"Content-Type": content_type(path), "Cache-Control": cache_control(path)}
+        sink.upload(os.path.join(report_dir, path), path, headers)
+        return path
+
+    # Entry pages go out only once everything they link to is uploaded
+    for batch in (first, last):
+        with ThreadPoolExecutor(max_workers=max(1, settings.deploy_concurrency)) as pool:
+            futures = {pool.submit(upload, path): path for path in batch}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    future.result()
+                    uploaded[path] = local[path]
+                    done.append(path)
+                except Exception as e:
+                    failed += 1
+                    uploaded.pop(path, None)
+                    log_message(f"⚠️ Upload of {path} failed: {e}")
+        if failed:
+            break
+
+    for path in removed:
+        try:
+            sink.delete(path)
+        except Exception as e:
+            uploaded[path] = manifest[path]
+            log_message(f"⚠️ Delete of {path} failed: {e}")
+    if not settings.deploy_delete:
+        uploaded.update((path, entry) for path, entry in manifest.items() if path not in local)
+    save_manifest(target, uploaded)
+
+    uploaded_bytes = sum(local[path]["size"] for path in done)
+    log_message(f"📦 Deployed {len(done)} files ({uploaded_bytes / 1e6:.2f} MB){f', {failed} failed' if failed else ''}")
+    return failed == 0
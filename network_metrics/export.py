@@ -0,0 +1,102 @@
+"""Columnar export of daily snapshots (Parquet + Arrow IPC) for analytics jobs.
+
+Layout under reports/exports/:
+    daily/network_metrics_YYYY-MM-DD.parquet   one file per day
+    history.parquet                            every day, sorted by (date, network)
+    history.arrow                              same table as an Arrow IPC file (memory-mappable)
+
+Requires the optional `pyarrow` dependency (`pip install -e .[export]`).
+"""
+import os
+from datetime import date as date_type
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+from . import store
+
+
+HISTORY_PARQUET = "history.parquet"
+HISTORY_ARROW = "history.arrow"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        log_message("⚠️ pyarrow is not installed — skipping Parquet/Arrow export (pip install -e .[export]).")
+        return None
+    return pyarrow
+
+
+def history_schema(pa):
+    return pa.schema([
+        ("network", pa.string()),
+        ("date", pa.date32()),
+        ("subgraphs", pa.int32()),
+        ("deployments", pa.int32()),
+        ("indexers", pa.int32()),
+    ])
+
+
+def snapshot_table(pa, snapshot_date: str, snapshot: dict):
+    """One row per network; deployments/indexers are null for snapshots that predate them"""
+    day = date_type.fromisoformat(snapshot_date)
+    networks = sorted(snapshot.get("networks", {}))
+    deployments = snapshot.get("deployments", {})
+    indexers = snapshot.get("indexers", {})
+    return pa.table({
+        "network": networks,
+        "date": [day] * len(networks),
+        "subgraphs": [int(snapshot["networks"][n]) for n in networks],
+        "deployments": [deployments.get(n) for n in networks],
+        "indexers": [indexers.get(n) for n in networks],
+    }, schema=history_schema(pa))
+
+
+def write_history(pa, table):
+    export_dir = ensure_dir(get_settings().export_dir)
+    table = table.sort_by([("date", "ascending"), ("network", "ascending")])
+    parquet_path = os.path.join(export_dir, HISTORY_PARQUET)
+    pa.parquet.write_table(table, f"{parquet_path}.tmp", compression="zstd")
+    os.replace(f"{parquet_path}.tmp", parquet_path)
+    arrow_path = os.path.join(export_dir, HISTORY_ARROW)
+    with pa.OSFile(f"{arrow_path}.tmp", "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(f"{arrow_path}.tmp", arrow_path)
+    log_message(f"🧱 Saved history export ({table.num_rows} rows) to {parquet_path} and {arrow_path}")
+
+
+def rebuild_history() -> bool:
+    """Backfill the cumulative history from every JSON snapshot in reports/metrics"""
+    pa = _import_pyarrow()
+    if pa is None:
+        return False
+    tables = [snapshot_table(pa, day, snapshot) for day, snapshot in store.iter_daily_snapshots()]
+    if not tables:
+        log_message("📭 No metric snapshots to export.")
+        return False
+    write_history(pa, pa.concat_tables(tables))
+    return True
+
+
+def export_snapshot(snapshot_date: str, snapshot: dict) -> bool:
+    """Write the day's Parquet file and upsert its rows into the cumulative history"""
+    pa = _import_pyarrow()
+    if pa is None:
+        return False
+    daily_dir = ensure_dir(os.path.join(get_settings().export_dir, "daily"))
+    table = snapshot_table(pa, snapshot_date, snapshot)
+    daily_path = os.path.join(daily_dir, f"network_metrics_{snapshot_date}.parquet")
+    pa.parquet.write_table(table, daily_path, compression="zstd")
+    log_message(f"🧱 Saved daily export to {daily_path}")
+
+    history_path = os.path.join(get_settings().export_dir, HISTORY_PARQUET)
+    if not os.path.exists(history_path):
+        return rebuild_history()
+    history = pa.parquet.read_table(history_path, memory_map=True).cast(history_schema(pa))
+    keep = pa.compute.not_equal(history["date"], pa.scalar(date_type.fromisoformat(snapshot_date), pa.date32()))
+    write_history(pa, pa.concat_tables([history.filter(keep), table]))
+    return True
@@ -0,0 +1,434 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .aggregate import NetworkAggregate, aggregate_pages, apply_indexer_stake, crawl_stats
+from .client import GatewayScheduler, QuotaExhausted
+from .costs import BudgetExceeded, RunCosts
+from .config import Source, get_settings, load_sources
+from .log import log_message
+from .query import (
+    batch_variables, build_batched_deployments_query, build_batched_indexers_query, build_batched_subgraphs_query, build_preflight_query,
+    chunk_alias, ids_variable, page_alias, register_query,
+)
+from . import store
+
+
+# The gateway's maximum for `first`
+PAGE_SIZE = 1000
+
+# Ids per aliased `id_in` field, and fields per request, of the deployment and indexer lookups
+DEPLOYMENT_CHUNK = 1000
+DEPLOYMENT_CHUNKS_PER_REQUEST = 4
+GRT = 10 ** 18
+
+# Pages of one source's crawl with the `first` each page was requested with, and the token
+# totals of its deployments (None when they were not fetched)
+# reused: the preflight found nothing changed and the last crawl was kept, started at fetched_at
+SourceCrawl = namedtuple("SourceCrawl", ["pages", "page_sizes", "deployments", "reused", "fetched_at"], defaults=[None, False, None])
+
+
+class PageSizer:
+    """Rows requested per page (`first`).
+
+    Pages carry up to 1000 nested allocations each, so their cost varies a lot. After every
+    request the size grows by half while pages come back well under the latency and byte
+    targets, halves when a page is slower or larger than the target, and halves on errors
+    and timeouts once the alias batch is down to a single page.
+    """
+
+    def __init__(self, start: int, minimum: int, maximum: int, target_seconds: float, target_bytes: int):
+        self.minimum = max(1, min(minimum, maximum))
+        self.maximum = maximum
+        self.size = max(self.minimum, min(start, maximum))
+        self.target_seconds = target_seconds
+        self.target_bytes = target_bytes
+
+    def observe(self, seconds_per_page: float, bytes_per_page: int):
+        if seconds_per_page > self.target_seconds or bytes_per_page > self.target_bytes:
+            self.shrink()
+        elif seconds_per_page < self.target_seconds / 2 and bytes_per_page < self.target_bytes / 2:
+            self.size = min(self.maximum, self.size + max(1, self.size // 2))
+
+    def shrink(self) -> bool:
+        """Halve the page; False when already at the minimum"""
+        if self.size == self.minimum:
+            return False
+        self.size = max(self.minimum, self.size // 2)
+        return True
+
+
+class AliasBatchSizer:
+    """Number of pages packed into one request.
+
+    Grows (at most doubling) while responses stay under the byte target, and halves
+    when the gateway rejects or fails a batch, down to one page per request.
+    """
+
+    def __init__(self, start: int, maximum: int, target_bytes: int):
+        self.maximum = max(1, maximum)
+        self.size = max(1, min(start, self.maximum))
+        self.target_bytes = target_bytes
+
+    def observe(self, response_bytes: int, pages: int):
+        per_page = max(1, response_bytes // max(1, pages))
+        self.size = max(1, min(self.maximum, self.size * 2, self.target_bytes // per_page))
+
+    def shrink(self) -> bool:
+        """Halve the batch; False when already at one page"""
+        if self.size == 1:
+            return False
+        self.size = max(1, self.size // 2)
+        return True
+
+
+def preflight_fingerprint(source: Source, scheduler: GatewayScheduler):
+    """What the last completed crawl is compared with to decide whether a new one is needed.
+
+    The block is kept for the log only: it advances with every block, while the counters and
+    the latest subgraph update only move when something the crawl counts changed. With
+    DEPLOYMENT_METRICS the network's token totals are compared too, so changed signal, stake
+    or query fees are fetched again rather than reused.
+    Returns None when the probe fails, which forces a crawl.
+    """
+    import requests
+
+    try:
+        query = register_query(build_preflight_query(token_totals=get_settings().deployment_metrics))
+        response = scheduler.query(source, query, phase=f"preflight:{source.name}")
+        data = response.json().get("data") if response.status_code == 200 else None
+    except (QuotaExhausted, BudgetExceeded, requests.RequestException, ValueError) as e:
+        log_message(f"⚠️ [{source.name}] Preflight failed: {e}")
+        return None
+    if not data or not data.get("graphNetwork"):
+        log_message(f"⚠️ [{source.name}] Preflight returned no data — crawling.")
+        return None
+    latest = data.get("subgraphs") or [{}]
+    return {
+        "block": (data.get("_meta") or {}).get("block", {}).get("number"),
+        "counters": data["graphNetwork"],
+        "latest_update": [latest[0].get("id"), latest[0].get("updatedAt")],
+    }
+
+
+def cached_if_unchanged(source: Source, fingerprint: dict):
+    """The last accepted crawl when its fingerprint still matches, else None"""
+    if fingerprint is None:
+        return None
+    state, crawl = load_source_journal(source)
+    if state is None or not state.get("fingerprint"):
+        return None
+    started_at = datetime.strptime(state["started_at"], "%Y-%m-%d %H:%M:%S UTC").replace(tzinfo=timezone.utc)
+    age_hours = (datetime.now(timezone.utc) - started_at).total_seconds() / 3600
+    if age_hours >= get_settings().preflight_max_age_hours:
+        log_message(f"🔁 [{source.name}] Last full crawl is {age_hours:.0f}h old — crawling again.")
+        return None
+    previous = state["fingerprint"]
+    if previous["counters"] != fingerprint["counters"] or previous["latest_update"] != fingerprint["latest_update"]:
+        return None
+    log_message(f"⏭️ [{source.name}] Nothing changed since the crawl of {state['started_at']} (block {previous['block']} -> {fingerprint['block']}) — reusing it.")
+    return crawl._replace(reused=True, fetched_at=started_at.strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+
+def batch_pages(payload: dict, count: int) -> list:
+    """The `count` aliased pages of a response; a missing or null page raises ValueError so the
+    batch is retried smaller instead of being taken for the (empty) last page"""
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        raise ValueError("response without data")
+    batches = [data.get(page_alias(n)) for n in range(count)]
+    missing = [page_alias(n) for n, batch in enumerate(batches) if not isinstance(batch, list)]
+    if missing:
+        raise ValueError(f"response without page {', '.join(missing)}")
+    return batches
+
+
+def fetch_source_pages(source: Source, scheduler: GatewayScheduler, fingerprint: dict = None) -> SourceCrawl:
+    """Crawl every subgraph page of one source, several pages per request (see AliasBatchSizer),
+    with a page size adapting to the gateway's response times (see PageSizer).
+
+    Every page is checkpointed to the source's journal, so a rerun after a crash or
+    gateway error resumes from the last completed page. Returns None if the crawl did
+    not complete, so partial data is never published. `fingerprint` (taken before the
+    crawl, see preflight_fingerprint) is kept in the journal for the next run's preflight.
+    """
+    import requests
+
+    settings = get_settings()
+    sizer = AliasBatchSizer(settings.alias_batch_start, settings.alias_batch_max, settings.alias_batch_target_bytes)
+    page_sizer = PageSizer(settings.page_size_start, settings.page_size_min, PAGE_SIZE, settings.page_target_seconds, settings.page_target_bytes)
+
+    state = store.journal_load_state(source.name)
+    if store.journal_is_resumable(state):
+        pages = store.journal_load_pages(source.name, state)
+        log_message(f"♻️ [{source.name}] Resuming from journal at skip {state['next_skip']} ({len(pages)} pages already fetched)")
+    else:
+        state = store.journal_reset(source.name)
+        state["fingerprint"] = fingerprint
+        pages = []
+    skip = state["next_skip"]
+    requests_made = 0
+    done = False
+
+    while not done:
+        page_size = page_sizer.size
+        skips = [skip + n * page_size for n in range(sizer.size)]
+        query = register_query(build_batched_subgraphs_query(len(skips)))
+        requests_made += 1
+
+        error = None
+        try:
+            response = scheduler.query(source, query, batch_variables(page_size, skips), phase=f"crawl:{source.name}")
+            if response.status_code != 200:
+                error = response.status_code
+            else:
+                payload = response.json()
+                error = payload.get("errors")
+                if not error:
+                    batches = batch_pages(payload, len(skips))
+        except (QuotaExhausted, BudgetExceeded) as e:
+            log_message(f"[{source.name}] Failed to fetch data at skip {skip}: {e}")
+            return None
+        except (requests.RequestException, ValueError) as e:
+            error = e
+
+        if error:
+            if sizer.shrink():
+                log_message(f"⚠️ [{source.name}] Batch of {len(skips)} pages at skip {skip} failed ({error}) — retrying with {sizer.size}")
+                continue
+            if page_sizer.shrink():
+                log_message(f"⚠️ [{source.name}] Page of {page_size} at skip {skip} failed ({error}) — retrying with {page_sizer.size} rows")
+                continue
+            log_message(f"[{source.name}] Failed to fetch data at skip {skip}: {error}")
+            return None
+
+        for page_skip, batch in zip(skips, batches):
+            # An empty last page is journaled too: it proves the page before it was not cut short
+            store.journal_save_page(source.name, state, page_skip, batch, page_size)
+            pages.append(batch)
+            skip = page_skip + page_size
+            # A short or empty page is the last one
+            if len(batch) < page_size:
+                done = True
+                break
+        sizer.observe(len(response.content), len(skips))
+        page_sizer.observe(response.elapsed.total_seconds() / len(skips), len(response.content) // len(skips))
+
+    log_message(f"[{source.name}] Fetched {sum(len(batch) for batch in pages)} subgraphs in {len(pages)} pages ({requests_made} requests, last page size {page_sizer.size}).")
+    deployments = fetch_deployment_metrics(source, scheduler, pages) if settings.deployment_metrics else None
+    if deployments is not None:
+        store.journal_save_deployments(source.name, deployments)
+    store.journal_mark_complete(source.name, state)
+    return SourceCrawl(pages, store.journal_page_sizes(state), deployments)
+
+
+def query_by_ids(source: Source, scheduler: GatewayScheduler, build_query, ids: list, phase: str):
+    """Rows of the entities with the given ids: DEPLOYMENT_CHUNK ids per aliased `id_in` field,
+    DEPLOYMENT_CHUNKS_PER_REQUEST fields per request. None when a request fails."""
+    import requests
+
+    chunks = [ids[start:start + DEPLOYMENT_CHUNK] for start in range(0, len(ids), DEPLOYMENT_CHUNK)]
+    rows = []
+    for start in range(0, len(chunks), DEPLOYMENT_CHUNKS_PER_REQUEST):
+        batch = chunks[start:start + DEPLOYMENT_CHUNKS_PER_REQUEST]
+        query = register_query(build_query(len(batch)))
+        variables = {ids_variable(n): chunk for n, chunk in enumerate(batch)}
+        try:
+            response = scheduler.query(source, query, variables, phase=phase)
+            payload = response.json() if response.status_code == 200 else {"errors": response.status_code}
+        except (QuotaExhausted, BudgetExceeded, requests.RequestException, ValueError) as e:
+            payload = {"errors": str(e)}
+        if payload.get("errors") or not payload.get("data"):
+            log_message(f"⚠️ [{source.name}] {phase} request failed: {payload.get('errors')}")
+            return None
+        for n in range(len(batch)):
+            rows.extend(payload["data"].get(chunk_alias(n)) or [])
+    return rows
+
+
+def fetch_deployment_metrics(source: Source, scheduler: GatewayScheduler, pages: list):
+    """{deployment id: {"signal", "stake", "query_fees"}} in GRT for the current deployments of the crawled subgraphs.
+
+    ~12k deployments cost a handful of requests (see query_by_ids). Returns None when a
+    request fails: the crawl is still published, without token totals.
+    """
+    ids = set()
+    for batch in pages:
+        for item in batch:
+            deployment_id = ((item.get("currentVersion") or {}).get("subgraphDeployment") or {}).get("id")
+            if deployment_id:
+                ids.add(deployment_id)
+    rows = query_by_ids(source, scheduler, build_batched_deployments_query, sorted(ids), f"deployments:{source.name}")
+    if rows is None:
+        log_message(f"⚠️ [{source.name}] Deployment metrics unavailable — publishing counts without token totals.")
+        return None
+    deployments = {
+        row["id"]: {
+            "signal": int(row.get("signalledTokens") or 0) / GRT,
+            "stake": int(row.get("stakedTokens") or 0) / GRT,
+            "query_fees": int(row.get("queryFeesAmount") or 0) / GRT,
+        }
+        for row in rows
+    }
+    log_message(f"[{source.name}] Fetched token totals of {len(deployments):,} deployments.")
+    return deployments
+
+
+def fetch_indexer_table(scheduler: GatewayScheduler, indexer_ids) -> dict:
+    """{indexer id: {"url", "stake", "delegation"}} (GRT) from the network subgraph, asking each
+    merge source for the ids still missing; saved to cache/indexers.json for later stages and renders"""
+    ids = sorted(indexer_ids)
+    indexers = {}
+    complete = True
+    for source in load_sources():
+        missing = [indexer for indexer in ids if indexer not in indexers]
+        if not source.merge or not missing:
+            continue
+        rows = query_by_ids(source, scheduler, build_batched_indexers_query, missing, f"indexers:{source.name}")
+        complete = complete and rows is not None
+        for row in rows or []:
+            indexers[row["id"]] = {
+                "url": row.get("url"),
+                "stake": int(row.get("stakedTokens") or 0) / GRT,
+                "delegation": int(row.get("delegatedTokens") or 0) / GRT,
+            }
+    # Ids of a failed request are left out of not_found, so the next lookup asks for them again
+    store.save_indexer_table(indexers, [indexer for indexer in ids if indexer not in indexers] if complete else [])
+    log_message(f"Fetched {len(indexers):,} of {len(ids):,} indexers from the indexer table.")
+    return indexers
+
+
+def indexer_table(indexer_ids, costs: RunCosts = None, scheduler: GatewayScheduler = None) -> dict:
+    """The cached indexer table when it has every id (or knows it has no entry), else a fresh one"""
+    cached = store.load_indexer_table()
+    if cached and all(indexer in cached["indexers"] or indexer in cached["not_found"] for indexer in indexer_ids):
+        return cached["indexers"]
+    if scheduler is not None:
+        return fetch_indexer_table(scheduler, indexer_ids)
+    scheduler = GatewayScheduler.from_settings(costs)
+    try:
+        return fetch_indexer_table(scheduler, indexer_ids)
+    finally:
+        scheduler.close()
+
+
+def combine_sources(sources: list, crawls: dict) -> NetworkAggregate:
+    """Aggregate merge sources together and keep per-source rows for side-by-side reporting.
+
+    A failed merge source fails the whole run (its journal lets the next run resume);
+    a failed side-by-side source is only left out.
+    """
+    pages_by_source = {name: crawl.pages for name, crawl in crawls.items() if crawl is not None}
+    merged_pages = []
+    # Token totals are only joined in when every merged source has them
+    merged_deployments = {}
+    for source in sources:
+        if pages_by_source.get(source.name) is None:
+            if source.merge:
+                log_message(f"[{source.name}] Crawl incomplete — not publishing merged totals.")
+                return None
+            log_message(f"⚠️ [{source.name}] Crawl incomplete — left out of the side-by-side report.")
+        elif source.merge:
+            merged_pages.extend(pages_by_source[source.name])
+            deployments = crawls[source.name].deployments
+            merged_deployments = None if deployments is None or merged_deployments is None else {**merged_deployments, **deployments}
+
+    result = aggregate_pages(merged_pages, merged_deployments)
+    result.crawl = {name: crawl_stats(crawl.pages, crawl.page_sizes) for name, crawl in crawls.items() if crawl is not None}
+    if len(sources) > 1:
+        result.sources = {
+            source.name: aggregate_pages(pages_by_source[source.name], crawls[source.name].deployments).networks
+            for source in sources if pages_by_source.get(source.name) is not None
+        }
+    return result
+
+
+def refresh_source(source: Source, scheduler: GatewayScheduler) -> SourceCrawl:
+    """The last crawl of a source when the preflight shows nothing changed, else a new crawl"""
+    fingerprint = preflight_fingerprint(source, scheduler) if get_settings().preflight else None
+    crawl = cached_if_unchanged(source, fingerprint)
+    if crawl is not None:
+        return crawl
+    return fetch_source_pages(source, scheduler, fingerprint)
+
+
+def fetch_network_subgraph_counts(costs: RunCosts = None) -> NetworkAggregate:
+    """Fetch network names and count subgraphs and unique indexers per network, crawling every configured source concurrently"""
+    started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    sources = load_sources()
+    scheduler = GatewayScheduler.from_settings(costs)
+    with ThreadPoolExecutor(max_workers=max(1, min(len(sources), get_settings().fetch_concurrency))) as pool:
+        results = pool.map(lambda source: refresh_source(source, scheduler), sources)
+        crawls = dict(zip([source.name for source in sources], results))
+
+    result = combine_sources(sources, crawls)
+    # The indexer table is fetched again when a source was crawled, else the cached one is kept;
+    # it is reused by the status check and later renders
+    if result is not None and get_settings().indexer_stake:
+        if any(crawl is not None and not crawl.reused for crawl in crawls.values()):
+            indexers = fetch_indexer_table(scheduler, result.allocations_by_indexer)
+        else:
+            indexers = indexer_table(result.allocations_by_indexer, scheduler=scheduler)
+        apply_indexer_stake(result, indexers)
+    # Allocations opened/closed since the last crawl, for the churn report (see churn.py)
+    if result is not None and get_settings().allocation_churn:
+        from .churn import fetch_allocation_events
+
+        fetch_allocation_events(scheduler, sources)
+    scheduler.close()
+    scheduler.log_summary()
+
+    if result is not None:
+        # Numbers are as old as the oldest crawl behind them, reused ones included
+        result.fetched_at = min([started_at] + [crawl.fetched_at for crawl in crawls.values() if crawl is not None and crawl.fetched_at])
+        log_message(f"Fetched subgraph and indexer counts for {len(result.networks)} networks from {len(sources)} source(s).")
+    return result
+
+
+def reject_crawl(sources: list = None):
+    """Mark the current journals as rejected by validation, so the cached render keeps the previous crawl"""
+    for source in sources or load_sources():
+        state = store.journal_load_state(source.name)
+        if state and state.get("complete"):
+            store.journal_mark_rejected(source.name, state)
+
+
+def accepted_journal(source: Source):
+    """(journal name, state) of the last accepted crawl of a source: the current journal, else the previous one"""
+    for name in (source.name, store.previous_journal_source(source.name)):
+        state = store.journal_load_state(name)
+        if state and state.get("complete") and not state.get("rejected"):
+            return name, state
+    return None, None
+
+
+def load_source_journal(source: Source):
+    """(state, SourceCrawl) of the last accepted crawl of a source"""
+    name, state = accepted_journal(source)
+    if state is None:
+        return None, None
+    return state, SourceCrawl(store.journal_load_pages(name, state), store.journal_page_sizes(state), store.journal_load_deployments(name))
+
+
+def load_network_subgraph_counts_from_journal() -> NetworkAggregate:
+    """Rebuild the per-network counts from the last completed journals, without any network I/O"""
+    sources = load_sources()
+    crawls = {}
+    started_at = []
+    for source in sources:
+        state, crawl = load_source_journal(source)
+        if state is None:
+            log_message(f"📭 [{source.name}] No completed journal found — run a fetch first.")
+            continue
+        log_message(f"[{source.name}] Using journal started at {state['started_at']}.")
+        crawls[source.name] = crawl
+        started_at.append(datetime.strptime(state["started_at"], "%Y-%m-%d %H:%M:%S UTC").strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+    result = combine_sources(sources, crawls)
+    cached_indexers = store.load_indexer_table() if get_settings().indexer_stake else None
+    if result is not None and cached_indexers:
+        apply_indexer_stake(result, cached_indexers["indexers"])
+    if result is not None:
+        result.fetched_at = min(started_at)
+        log_message(f"Loaded subgraph and indexer counts for {len(result.networks)} networks from journal.")
+    return result
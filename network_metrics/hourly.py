@@ -0,0 +1,99 @@
+"""Hourly-resolution history: every fetch appends one compact line, whatever the hour.
+
+reports/metrics/hourly/hourly_YYYY-MM.jsonl is append-only, one JSON object per run:
+    {"t": "2026-10-18T09:00:12Z", "total": 12460, "s": {network: subgraphs}, "i": {network: indexers}}
+
+Months that are entirely older than ROLLUP_HOURLY_RETENTION_DAYS are downsampled to the
+last point of each day and gzipped (hourly_YYYY-MM.daily.jsonl.gz).
+"""
+import os
+import gzip
+import json
+from datetime import datetime, timezone, timedelta
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+HOURLY_DIR = "hourly"
+
+
+def hourly_dir() -> str:
+    return os.path.join(get_settings().metrics_dir, HOURLY_DIR)
+
+
+def append_hourly_point(data, now: datetime = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    point = {
+        "t": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "total": sum(entry.subgraph_count for entry in data),
+        "s": {entry.network_name: entry.subgraph_count for entry in data},
+        "i": {entry.network_name: entry.unique_indexer_count for entry in data},
+    }
+    path = os.path.join(ensure_dir(hourly_dir()), f"hourly_{now.strftime('%Y-%m')}.jsonl")
+    with open(path, "a") as f:
+        f.write(json.dumps(point, separators=(",", ":"), sort_keys=True) + "\n")
+    log_message(f"🕐 Appended hourly point to {path}")
+    return point
+
+
+def _month_files():
+    """{month: path}, preferring the raw log over a downsampled archive of the same month"""
+    files = {}
+    if not os.path.isdir(hourly_dir()):
+        return files
+    for file in sorted(os.listdir(hourly_dir()), reverse=True):
+        if file.startswith("hourly_") and (file.endswith(".jsonl") or file.endswith(".jsonl.gz")):
+            files.setdefault(file[len("hourly_"):len("hourly_") + 7], os.path.join(hourly_dir(), file))
+    return files
+
+
+def _read_lines(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A run killed mid-write leaves a truncated last line; skip it
+                    continue
+
+
+def iter_hourly_points(since: datetime = None):
+    """Yield points oldest first, opening only the monthly files that can contain t >= since"""
+    since_t = since.strftime("%Y-%m-%dT%H:%M:%SZ") if since else None
+    for month, path in sorted(_month_files().items()):
+        if since_t and month < since_t[:7]:
+            continue
+        for point in _read_lines(path):
+            if since_t is None or point["t"] >= since_t:
+                yield point
+
+
+def point_at_or_after(moment: datetime):
+    """First hourly point at or after `moment`, or None"""
+    return next(iter_hourly_points(since=moment), None)
+
+
+def downsample_hourly(now: datetime = None) -> int:
+    """Keep one point per day (the last) for months older than the hourly retention window"""
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=get_settings().rollup_hourly_retention_days)).strftime("%Y-%m")
+    downsampled = 0
+    for month, path in _month_files().items():
+        if month >= cutoff or not path.endswith(".jsonl"):
+            continue
+        last_per_day = {}
+        for point in _read_lines(path):
+            last_per_day[point["t"][:10]] = point
+        target = os.path.join(hourly_dir(), f"hourly_{month}.daily.jsonl.gz")
+        with gzip.open(f"{target}.tmp", "wt", encoding="utf-8") as f:
+            for day in sorted(last_per_day):
+                f.write(json.dumps(last_per_day[day], separators=(",", ":"), sort_keys=True) + "\n")
+        os.replace(f"{target}.tmp", target)
+        os.remove(path)
+        downsampled += 1
+        log_message(f"🗜️ Downsampled hourly history of {month} to {len(last_per_day)} daily points in {target}")
+    return downsampled
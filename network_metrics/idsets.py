@@ -0,0 +1,208 @@
+"""Per-network subgraph id sets, persisted as delta-encoded snapshots.
+
+reports/metrics/ids/
+    current.json.gz                  full sorted id lists of the latest run
+    ids_YYYYMMDD_HHMMSS.json.gz      one per run: full lists (keyframe) or, per changed
+                                     network, the ids added ("a") and removed ("r")
+                                     against the previous run
+    manifest.json                    ordered list of snapshot files, used to find the
+                                     nearest keyframe when replaying an older state
+
+Every diff is a linear merge of two sorted lists, so comparing ~12k ids costs O(n).
+"""
+import os
+import gzip
+import json
+from datetime import datetime, timezone, timedelta
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+from .store import save_api_json, write_json_atomic
+
+
+IDS_DIR = "ids"
+CURRENT_FILE = "current.json.gz"
+MANIFEST_FILE = "manifest.json"
+# A full copy is stored every KEYFRAME_INTERVAL runs, bounding how many deltas a replay reads
+KEYFRAME_INTERVAL = 168
+
+
+def sorted_merge_diff(old: list, new: list):
+    """Return (added, removed) between two sorted lists in a single linear pass"""
+    added, removed = [], []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if old[i] == new[j]:
+            i += 1
+            j += 1
+        elif old[i] < new[j]:
+            removed.append(old[i])
+            i += 1
+        else:
+            added.append(new[j])
+            j += 1
+    removed.extend(old[i:])
+    added.extend(new[j:])
+    return added, removed
+
+
+def apply_delta(ids: list, added: list, removed: list) -> list:
+    """Inverse of sorted_merge_diff: merge `added` into `ids` and drop `removed`, keeping order"""
+    result = []
+    removed_set = set(removed)
+    i = j = 0
+    while i < len(ids) or j < len(added):
+        if j >= len(added) or (i < len(ids) and ids[i] < added[j]):
+            if ids[i] not in removed_set:
+                result.append(ids[i])
+            i += 1
+        else:
+            result.append(added[j])
+            j += 1
+    return result
+
+
+def ids_dir() -> str:
+    return os.path.join(get_settings().metrics_dir, IDS_DIR)
+
+
+def _read_gz(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_gz(path: str, data: dict):
+    with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+
+
+def load_manifest() -> list:
+    path = os.path.join(ids_dir(), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_current_ids():
+    """(timestamp, {network: sorted ids}) of the latest persisted run, or (None, {})"""
+    path = os.path.join(ids_dir(), CURRENT_FILE)
+    if not os.path.exists(path):
+        return None, {}
+    current = _read_gz(path)
+    return current["t"], current["networks"]
+
+
+def diff_networks(old: dict, new: dict) -> dict:
+    """{network: (added, removed)} for every network whose id set changed"""
+    changes = {}
+    for network in sorted(set(old) | set(new)):
+        added, removed = sorted_merge_diff(old.get(network, []), new.get(network, []))
+        if added or removed:
+            changes[network] = (added, removed)
+    return changes
+
+
+def save_id_snapshot(subgraph_ids: dict, now: datetime = None) -> str:
+    """Persist this run's id lists as a delta against the previous run (or a keyframe)"""
+    now = now or datetime.now(timezone.utc)
+    directory = ensure_dir(ids_dir())
+    manifest = load_manifest()
+    _, previous = load_current_ids()
+    since_keyframe = next((n for n, entry in enumerate(reversed(manifest)) if entry["keyframe"]), None)
+    keyframe = since_keyframe is None or since_keyframe + 1 >= KEYFRAME_INTERVAL
+
+    timestamp = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if keyframe:
+        networks = subgraph_ids
+    else:
+        networks = {network: {"a": added, "r": removed} for network, (added, removed) in diff_networks(previous, subgraph_ids).items()}
+    filename = f"ids_{now.strftime('%Y%m%d_%H%M%S')}.json.gz"
+    _write_gz(os.path.join(directory, filename), {"t": timestamp, "keyframe": keyframe, "networks": networks})
+    _write_gz(os.path.join(directory, CURRENT_FILE), {"t": timestamp, "networks": subgraph_ids})
+    manifest.append({"file": filename, "t": timestamp, "keyframe": keyframe})
+    manifest = prune_manifest(manifest, now)
+    write_json_atomic(os.path.join(directory, MANIFEST_FILE), manifest, indent=1)
+    log_message(f"🧬 Saved subgraph id {'keyframe' if keyframe else 'delta'} to {filename}")
+    return filename
+
+
+def prune_manifest(manifest: list, now: datetime) -> list:
+    """Drop snapshots older than IDSET_RETENTION_DAYS, keeping the keyframe that later deltas replay from"""
+    retention_days = get_settings().idset_retention_days
+    if retention_days <= 0:
+        return manifest
+    cutoff = (now - timedelta(days=retention_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    first_kept = 0
+    for n, entry in enumerate(manifest):
+        if entry["t"] >= cutoff:
+            break
+        if entry["keyframe"]:
+            first_kept = n
+    for entry in manifest[:first_kept]:
+        path = os.path.join(ids_dir(), entry["file"])
+        if os.path.exists(path):
+            os.remove(path)
+    return manifest[first_kept:]
+
+
+def load_ids_at(moment: datetime):
+    """Replay the id lists of the last run at or before `moment`: (timestamp, {network: ids}) or (None, None)"""
+    manifest = load_manifest()
+    target_t = moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+    target = None
+    for n, entry in enumerate(manifest):
+        if entry["t"] > target_t:
+            break
+        target = n
+    if target is None:
+        return None, None
+    start = max(n for n in range(target + 1) if manifest[n]["keyframe"])
+    state = {}
+    for entry in manifest[start:target + 1]:
+        snapshot = _read_gz(os.path.join(ids_dir(), entry["file"]))
+        if snapshot["keyframe"]:
+            state = {network: list(ids) for network, ids in snapshot["networks"].items()}
+            continue
+        for network, delta in snapshot["networks"].items():
+            state[network] = apply_delta(state.get(network, []), delta["a"], delta["r"])
+            if not state[network]:
+                del state[network]
+    return manifest[target]["t"], state
+
+
+def build_changes(subgraph_ids: dict, base_t: str, base_ids: dict, now: datetime) -> dict:
+    """Added/removed subgraphs per network against a base state; ids in both sets moved between networks"""
+    changes = diff_networks(base_ids, subgraph_ids)
+    added_to = {sid: network for network, (added, _) in changes.items() for sid in added}
+    removed_from = {sid: network for network, (_, removed) in changes.items() for sid in removed}
+    networks = {}
+    for network, (added, removed) in changes.items():
+        networks[network] = {
+            "added": added,
+            "removed": removed,
+            "moved_in": {sid: removed_from[sid] for sid in added if sid in removed_from},
+            "moved_out": {sid: added_to[sid] for sid in removed if sid in added_to},
+        }
+    return {
+        "generated_at": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "base": base_t,
+        "networks": networks,
+    }
+
+
+def changes_since(subgraph_ids: dict, moment: datetime, now: datetime = None):
+    """Changes between the last persisted run at or before `moment` and `subgraph_ids`, or None"""
+    now = now or datetime.now(timezone.utc)
+    base_t, base_ids = load_ids_at(moment)
+    if base_t is None:
+        log_message("📭 No subgraph id snapshot old enough to diff against.")
+        return None
+    changes = build_changes(subgraph_ids, base_t, base_ids, now)
+    log_message(f"🔀 Subgraph set changes since {base_t}: {len(changes['networks'])} networks changed")
+    return changes
+
+
+def save_changes_api(changes: dict, output_dir: str = None) -> str:
+    return save_api_json("changes.json", changes, output_dir=output_dir)
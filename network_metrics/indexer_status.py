@@ -0,0 +1,169 @@
+"""Sync health of the indexers allocating to each network, from their public status endpoints.
+
+Indexer urls come from the indexer table fetched with the crawl (see fetch.indexer_table).
+Every indexer's <url>/status endpoint is asked once for the indexing status of all the
+deployments it allocates to, INDEXER_STATUS_CONCURRENCY indexers at a time. Endpoints are
+third-party servers: every request gets INDEXER_STATUS_TIMEOUT_SECONDS to connect and to
+finish its whole response (a read in progress can overrun the deadline by one read timeout),
+and a body larger than MAX_RESPONSE_BYTES is cut off. Every (indexer, deployment) allocation
+is counted per network as:
+    synced       synced and at most INDEXER_STATUS_MAX_LAG_BLOCKS behind the chain head
+    lagging      still syncing or further behind
+    failed       failed, or not indexed at all
+    unreachable  no usable answer (no url, timeout, HTTP or GraphQL error)
+
+The result is kept in cache/indexer_status.json and shown by every render until the
+next check.
+"""
+import os
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .aggregate import NetworkAggregate
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+STATUS_STATES = ("synced", "lagging", "failed", "unreachable")
+# A few hundred bytes per deployment; anything far larger is not a status answer
+MAX_RESPONSE_BYTES = 4_000_000
+READ_CHUNK_BYTES = 64 * 1024
+
+STATUS_QUERY = (
+    "query Statuses($deployments:[String!]!){indexingStatuses(subgraphs:$deployments)"
+    "{subgraph synced health chains{chainHeadBlock{number}latestBlock{number}}}}"
+)
+
+_local = threading.local()
+
+
+def session():
+    """One pooled requests.Session per worker thread"""
+    import requests
+
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.headers.update({"Content-Type": "application/json"})
+    return _local.session
+
+
+def status_url(url: str) -> str:
+    return f"{url.rstrip('/')}/status"
+
+
+class ResponseTooLarge(ValueError):
+    pass
+
+
+def post_status(url: str, deployments: list, timeout: float) -> dict:
+    """Status payload of one endpoint, read in chunks against a wall-clock deadline and a size cap"""
+    import requests
+
+    deadline = time.monotonic() + timeout
+    body = json.dumps({"query": STATUS_QUERY, "variables": {"deployments": deployments}})
+    with session().post(status_url(url), data=body, timeout=(timeout, timeout), stream=True) as response:
+        if response.status_code != 200:
+            return {"errors": f"HTTP {response.status_code}"}
+        if int(response.headers.get("Content-Length") or 0) > MAX_RESPONSE_BYTES:
+            raise ResponseTooLarge(f"{response.headers['Content-Length']} bytes")
+        # read1 (urllib3 2) returns whatever has arrived, so a trickled body is seen chunk by chunk
+        read1 = getattr(response.raw, "read1", None)
+        reads = iter(lambda: read1(READ_CHUNK_BYTES, decode_content=True), b"") if read1 else response.iter_content(READ_CHUNK_BYTES)
+        chunks, size = [], 0
+        for chunk in reads:
+            size += len(chunk)
+            if size > MAX_RESPONSE_BYTES:
+                raise ResponseTooLarge(f"over {MAX_RESPONSE_BYTES} bytes")
+            if time.monotonic() > deadline:
+                raise requests.Timeout(f"no complete answer within {timeout:g}s")
+            chunks.append(chunk)
+    payload = json.loads(b"".join(chunks))
+    if not isinstance(payload, dict):
+        raise ValueError("not a GraphQL response")
+    return payload
+
+
+def block_lag(status: dict):
+    """Blocks behind the chain head, None when the status doesn't say"""
+    try:
+        chain = (status.get("chains") or [{}])[0]
+        head = (chain.get("chainHeadBlock") or {}).get("number")
+        latest = (chain.get("latestBlock") or {}).get("number")
+        return int(head) - int(latest) if head is not None and latest is not None else None
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def classify(status: dict, max_lag_blocks: int) -> str:
+    if status is None or status.get("health") == "failed":
+        return "failed"
+    lag = block_lag(status)
+    if status.get("synced") and (lag is None or lag <= max_lag_blocks):
+        return "synced"
+    return "lagging"
+
+
+def check_indexer(url: str, deployments: list, timeout: float, max_lag_blocks: int):
+    """(error or None, {deployment: state}) of one indexer"""
+    import requests
+
+    if not url:
+        return "no url", dict.fromkeys(deployments, "unreachable")
+    try:
+        payload = post_status(url, deployments, timeout)
+    except (requests.RequestException, ValueError) as e:
+        return type(e).__name__, dict.fromkeys(deployments, "unreachable")
+    data = payload.get("data")
+    statuses = data.get("indexingStatuses") if isinstance(data, dict) else None
+    if payload.get("errors") or not isinstance(statuses, list):
+        return str(payload.get("errors") or "no data")[:200], dict.fromkeys(deployments, "unreachable")
+    by_deployment = {status.get("subgraph"): status for status in statuses if isinstance(status, dict)}
+    return None, {deployment: classify(by_deployment.get(deployment), max_lag_blocks) for deployment in deployments}
+
+
+def check_indexer_status(aggregate: NetworkAggregate, costs=None) -> dict:
+    """Ask every allocating indexer for its sync status and count allocations per network and state"""
+    from .fetch import indexer_table
+    from .store import write_json_atomic
+
+    settings = get_settings()
+    indexers = indexer_table(aggregate.deployments_by_indexer, costs)
+    checked_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def check(indexer: str):
+        deployments = sorted(aggregate.deployments_by_indexer[indexer])
+        url = (indexers.get(indexer) or {}).get("url")
+        return indexer, url, check_indexer(url, deployments, settings.indexer_status_timeout_seconds, settings.indexer_status_max_lag_blocks)
+
+    networks = {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, settings.indexer_status_concurrency)) as pool:
+        for indexer, url, (error, states) in pool.map(check, sorted(aggregate.deployments_by_indexer)):
+            counts = dict.fromkeys(STATUS_STATES, 0)
+            for deployment, state in states.items():
+                counts[state] += 1
+                network = aggregate.deployments_by_indexer[indexer][deployment]
+                by_state = networks.setdefault(network, dict.fromkeys(STATUS_STATES, 0))
+                by_state[state] += 1
+            results[indexer] = dict(counts, url=url, error=error)
+
+    status = {"checked_at": checked_at, "networks": dict(sorted(networks.items())), "indexers": results}
+    ensure_dir(os.path.dirname(settings.indexer_status_file) or ".")
+    write_json_atomic(settings.indexer_status_file, status, separators=(",", ":"))
+    totals = {state: sum(counts[state] for counts in networks.values()) for state in STATUS_STATES}
+    reachable = sum(1 for result in results.values() if result["error"] is None)
+    log_message(f"🩺 Indexer status: {reachable}/{len(results)} endpoints answered; "
+                + ", ".join(f"{totals[state]:,} {state}" for state in STATUS_STATES) + " allocations")
+    return status
+
+
+def load_indexer_status():
+    """Last saved check, or None"""
+    try:
+        with open(get_settings().indexer_status_file, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
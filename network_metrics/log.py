@@ -0,0 +1,22 @@
+import os
+import threading
+from datetime import datetime, timezone
+
+from .config import ensure_dir, get_settings
+
+
+# Sources are crawled from worker threads; keep their lines whole
+_log_lock = threading.Lock()
+
+
+# Function that writes in the log file (one file per UTC day, resolved at write time)
+def log_message(message):
+    now = datetime.now(timezone.utc)
+    timestamped = f"[{now.strftime('%Y-%m-%d %H:%M:%S UTC')}] {message}"
+    log_dir = ensure_dir(get_settings().log_dir)
+    log_file = os.path.join(log_dir, f"metrics_log_{now.strftime('%Y-%m-%d')}.txt")
+    with _log_lock:
+        print(timestamped)
+        with open(log_file, "a") as log:
+            log.write(timestamped + "\n")
+# End Function 'log_message'
@@ -0,0 +1,213 @@
+"""The `run` pipeline: stale-while-revalidate publishing around a fresh crawl.
+
+1. Render the last completed crawl straight away with a "refreshing" badge, so the
+   public page is up to date about its own freshness before any gateway request.
+2. Crawl and validate (validate.py); when the fresh data is complete and plausible,
+   render it into a staging directory, record the run (hourly point, id snapshot, daily
+   snapshot, maintenance) and swap the new artifacts in atomically.
+3. When the crawl fails or validation blocks it, republish the last good data with a
+   "stale" badge instead of leaving the previous page untouched or publishing partial numbers.
+"""
+from datetime import datetime, timezone, timedelta
+
+from .aggregate import NetworkAggregate, build_indexer_index, build_metrics_snapshot, network_overlap, total_subgraphs
+from .config import get_settings
+from .log import log_message
+
+
+def render_artifacts(aggregate: NetworkAggregate, now: datetime, status: str, output_dir: str, warnings: list = None):
+    """Write every public artifact of `aggregate` into `output_dir`"""
+    from .churn import build_churn
+    from .hourly import point_at_or_after
+    from .idsets import changes_since, save_changes_api
+    from .indexer_status import load_indexer_status
+    from .search import build_search_index
+    from .sparklines import build_sparklines
+    from .render import save_indexer_leaderboard_html, save_source_breakdown_csv, save_subgraph_counts_to_csv, save_subgraph_counts_to_html
+    from .store import load_yesterday_metrics, save_api_json
+
+    subgraph_data = aggregate.networks
+    total_subgraphs_yesterday, yesterday_network_counts = load_yesterday_metrics(now)
+
+    # Intraday delta against the first run of the UTC day, from the hourly history
+    midnight_utc = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    first_point_today = point_at_or_after(midnight_utc)
+    total_subgraphs_today_start = first_point_today["total"] if first_point_today else None
+
+    # Which subgraphs appeared/disappeared per network, against the last run at least 24h old
+    changes = changes_since(aggregate.subgraph_ids, now - timedelta(days=1), now)
+    if changes is not None:
+        save_changes_api(changes, output_dir=output_dir)
+
+    # Indexer -> networks index and leaderboard, from the sets the counts were built on
+    indexer_index = build_indexer_index(aggregate, now.strftime("%Y-%m-%d %H:%M:%S UTC"))
+    save_api_json("indexers.json", indexer_index, output_dir=output_dir)
+    save_indexer_leaderboard_html(indexer_index, *network_overlap(aggregate), output_dir=output_dir)
+
+    save_subgraph_counts_to_csv(subgraph_data, changes=changes, output_dir=output_dir)
+    if aggregate.sources:
+        save_api_json("sources.json", {
+            name: {entry.network_name: entry._asdict() for entry in rows} for name, rows in aggregate.sources.items()
+        }, output_dir=output_dir)
+        save_source_breakdown_csv(aggregate.sources, output_dir=output_dir)
+
+    # Trend charts from the snapshot/hourly history, plus the counts being rendered
+    sparklines = build_sparklines(subgraph_data, now, aggregate.fetched_at)
+
+    # Sync health of the allocating indexers, from the last status check
+    indexer_status = load_indexer_status()
+    if indexer_status:
+        save_api_json("indexer_status.json", indexer_status, output_dir=output_dir)
+
+    # Allocations opened/closed and indexers entering/leaving each network over the last days
+    churn = build_churn(aggregate, now) if get_settings().allocation_churn else None
+    if churn and churn["networks"]:
+        save_api_json("allocation_churn.json", churn, output_dir=output_dir)
+
+    # Search shards over the journaled subgraphs behind these counts, fetched by the page on demand
+    search = build_search_index(output_dir) if get_settings().search_index else None
+
+    freshness = {
+        "status": status,
+        "data_as_of": aggregate.fetched_at or now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "stale_after_minutes": get_settings().stale_after_minutes,
+        "warnings": warnings or [],
+    }
+    save_subgraph_counts_to_html(subgraph_data, total_subgraphs_yesterday=total_subgraphs_yesterday, yesterday_network_counts=yesterday_network_counts, total_subgraphs_today_start=total_subgraphs_today_start, changes=changes, freshness=freshness, sparklines=sparklines, search=search, indexer_status=indexer_status, churn=churn, output_dir=output_dir)
+
+
+def stage(aggregate: NetworkAggregate, now: datetime, status: str, warnings: list = None) -> str:
+    from .staging import new_staging_dir
+
+    staging_dir = new_staging_dir(status)
+    render_artifacts(aggregate, now, status, staging_dir, warnings)
+    return staging_dir
+
+
+def swap_in(staging_dir: str):
+    """Publish staged artifacts into the report directory, then deploy the changed files (if DEPLOY_TARGET is set)"""
+    from .deploy import deploy_reports
+    from .search import prune_search_shards
+    from .staging import publish_staged
+
+    publish_staged(staging_dir)
+    prune_search_shards()
+    deploy_reports()
+
+
+def publish(aggregate: NetworkAggregate, now: datetime, status: str, warnings: list = None):
+    swap_in(stage(aggregate, now, status, warnings))
+
+
+def record_run(aggregate: NetworkAggregate, now: datetime, costs, validation):
+    """Persist the history of a fresh crawl: hourly point, id snapshot, daily snapshot and maintenance"""
+    from .compaction import run_maintenance
+    from .export import export_snapshot
+    from .hourly import append_hourly_point
+    from .idsets import save_id_snapshot
+    from .store import load_yesterday_metrics, save_metrics_snapshot
+
+    settings = get_settings()
+    subgraph_data = aggregate.networks
+    append_hourly_point(subgraph_data, now)
+    save_id_snapshot(aggregate.subgraph_ids, now)
+
+    # Only write metrics at the configured UTC hour
+    if settings.metric_snapshot_hour <= now.hour < settings.metric_snapshot_hour + 1:
+        total_subgraphs_yesterday, _ = load_yesterday_metrics(now)
+        # Save metrics snapshot
+        total = total_subgraphs(subgraph_data)
+        # --- Logging total subgraphs today/yesterday
+        log_message(f"📅 Total Subgraphs Today: {total}")
+        if total_subgraphs_yesterday is not None:
+            log_message(f"📆 Total Subgraphs Yesterday: {total_subgraphs_yesterday}")
+        else:
+            log_message("📆 Total Subgraphs Yesterday: unavailable")
+
+        metrics_snapshot = build_metrics_snapshot(subgraph_data, now.strftime("%Y-%m-%d %H:%M:%S UTC"))
+        metrics_snapshot["costs"] = costs.as_dict()
+        metrics_snapshot["validation"] = validation.as_dict()
+        save_metrics_snapshot(metrics_snapshot, now)
+        export_snapshot(now.strftime("%Y-%m-%d"), metrics_snapshot)
+    else:
+        log_message(f"⏩ Skipped metric snapshot creation — not {settings.metric_snapshot_hour:02d}:00 UTC.")
+
+    if settings.subgraph_export:
+        from .subgraph_export import export_subgraphs
+
+        export_subgraphs()
+    run_maintenance(now)
+
+
+def run(render_only: bool = False) -> int:
+    from .costs import RunCosts, append_run_costs
+    from .fetch import fetch_network_subgraph_counts, load_network_subgraph_counts_from_journal, reject_crawl
+    from .staging import remove_stale_staging_dirs
+    from .validate import append_validation, validate_run
+
+    settings = get_settings()
+    log_message("Starting network subgraph metrics script...")
+    log_message(f"🕒 Configured METRIC_SNAPSHOT_HOUR: {settings.metric_snapshot_hour}")
+    remove_stale_staging_dirs()
+
+    if render_only:
+        log_message("🖨️ Render-only run: using journal data, no gateway requests.")
+        aggregate = load_network_subgraph_counts_from_journal()
+        if not aggregate or not aggregate.networks:
+            log_message("No data retrieved.")
+            return 1
+        log_message("⏩ Skipped metric snapshot creation — render-only run.")
+        publish(aggregate, datetime.now(timezone.utc), "fresh")
+        return 0
+
+    # Stale: publish the last good data right away, flagged as refreshing
+    cached = load_network_subgraph_counts_from_journal()
+    if cached and cached.networks:
+        publish(cached, datetime.now(timezone.utc), "refreshing")
+
+    # Revalidate
+    costs = RunCosts.from_settings()
+    fresh = fetch_network_subgraph_counts(costs)
+    if fresh and fresh.networks and settings.indexer_status:
+        from .indexer_status import check_indexer_status
+
+        check_indexer_status(fresh, costs)
+    costs.log_summary()
+    now = datetime.now(timezone.utc)
+    if costs.phases:
+        append_run_costs(costs, now.strftime("%Y-%m-%dT%H:%M:%SZ"), "full" if fresh else "cached")
+
+    validation = None
+    if fresh and fresh.networks:
+        validation = validate_run(fresh, now)
+        append_validation(validation, now.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        if validation.blocked:
+            # Keep the rejected crawl out of the cached fallback
+            reject_crawl()
+        else:
+            staging_dir = stage(fresh, now, "fresh", validation.flagged)
+            # The crawl passed validation: publish it even when its history can't be recorded
+            try:
+                record_run(fresh, now, costs, validation)
+            except Exception as e:
+                log_message(f"⚠️ Recording the run failed, publishing the crawl anyway: {e}")
+                swap_in(staging_dir)
+                return 1
+            swap_in(staging_dir)
+            return 0
+
+    if cached and cached.networks:
+        if validation is not None:
+            log_message("⛔ Fresh crawl blocked by validation — republishing the last completed crawl as stale.")
+            publish(cached, now, "rejected", validation.blocked)
+            return 1
+        if costs.budget_exceeded:
+            # Cheaper strategy: progress stays in the journal for the next run
+            log_message("💸 Run budget exceeded — keeping the last completed crawl published.")
+        else:
+            log_message("⚠️ Fresh crawl failed — republishing the last completed crawl as stale.")
+        publish(cached, now, "stale")
+        return 0 if costs.budget_exceeded else 1
+
+    log_message("No data retrieved.")
+    return 1
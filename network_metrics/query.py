@@ -0,0 +1,177 @@
+"""GraphQL query builders for the network subgraph crawl.
+
+Queries are registered once (see register_query): minified, hashed, and sent with their
+values as variables, so the text of a query only depends on its shape (e.g. the number of
+aliased pages) and can be sent as a persisted-query hash where the endpoint supports it.
+"""
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass
+
+# Fields fetched for every subgraph of a page
+SUBGRAPH_FIELDS = """
+                id
+                metadata {
+                    displayName
+                }
+                currentVersion {
+                    subgraphDeployment {
+                        id
+                        manifest {
+                            network
+                        }
+                        indexerAllocations(first: 1000, where: { status: Active }) {
+                            indexer {
+                                id
+                            }
+                        }
+                    }
+                }"""
+
+
+def page_alias(n: int) -> str:
+    return f"p{n}"
+
+
+def skip_variable(n: int) -> str:
+    return f"skip{n}"
+
+
+def subgraphs_field(alias: str, skip_var: str) -> str:
+    return f"""
+            {alias}: subgraphs(first: $first, skip: ${skip_var}, where: {{ currentVersion_not: null }}) {{{SUBGRAPH_FIELDS}
+            }}"""
+
+
+def build_batched_subgraphs_query(pages: int) -> str:
+    """Pack several pages into one request with field aliases: p0: subgraphs(skip: $skip0), p1: subgraphs(skip: $skip1), ..."""
+    definitions = ", ".join(["$first: Int!"] + [f"${skip_variable(n)}: Int!" for n in range(pages)])
+    fields = "".join(subgraphs_field(page_alias(n), skip_variable(n)) for n in range(pages))
+    return f"query Pages({definitions}) {{{fields}\n        }}"
+
+
+def batch_variables(page_size: int, skips: list) -> dict:
+    return dict({"first": page_size}, **{skip_variable(n): skip for n, skip in enumerate(skips)})
+
+
+# Per-deployment token totals joined into the per-network counts (BigInt strings, in wei)
+DEPLOYMENT_FIELDS = "id signalledTokens stakedTokens queryFeesAmount"
+
+# Indexer table entries, looked up for the indexers the crawl found allocating
+INDEXER_FIELDS = "id url stakedTokens delegatedTokens"
+
+
+def ids_variable(n: int) -> str:
+    return f"ids{n}"
+
+
+def chunk_alias(n: int) -> str:
+    return f"c{n}"
+
+
+def build_batched_id_query(name: str, entity: str, fields: str, chunks: int) -> str:
+    """c0: <entity>(where: { id_in: $ids0 }), c1: ... — one aliased field per chunk of ids"""
+    definitions = ", ".join(f"${ids_variable(n)}: [String!]!" for n in range(chunks))
+    selections = "".join(
+        f"""
+            {chunk_alias(n)}: {entity}(first: 1000, where: {{ id_in: ${ids_variable(n)} }}) {{ {fields} }}"""
+        for n in range(chunks)
+    )
+    return f"query {name}({definitions}) {{{selections}\n        }}"
+
+
+def build_batched_deployments_query(chunks: int) -> str:
+    return build_batched_id_query("Deployments", "subgraphDeployments", DEPLOYMENT_FIELDS, chunks)
+
+
+def build_batched_indexers_query(chunks: int) -> str:
+    return build_batched_id_query("Indexers", "indexers", INDEXER_FIELDS, chunks)
+
+
+# Allocations opened (createdAtEpoch) or closed (closedAtEpoch) from an epoch on, paged by id (see churn.py)
+def build_allocation_events_query(epoch_field: str) -> str:
+    return f"""query AllocationEvents($first: Int!, $epoch: Int!, $lastId: String!) {{
+            allocations(first: $first, orderBy: id, where: {{ {epoch_field}_gte: $epoch, id_gt: $lastId }}) {{
+                id
+                createdAtEpoch
+                closedAtEpoch
+                createdAt
+                closedAt
+                indexer {{
+                    id
+                }}
+                subgraphDeployment {{
+                    manifest {{
+                        network
+                    }}
+                }}
+            }}
+        }}"""
+
+
+CURRENT_EPOCH_QUERY = """{
+            graphNetwork(id: "1") { currentEpoch }
+        }"""
+
+
+# One small request telling whether anything the crawl counts has changed: the indexed
+# block, the network-wide subgraph/deployment/allocation counters (and token totals) and the most
+# recent subgraph update (new versions move subgraphs between networks without changing counts)
+PREFLIGHT_COUNTERS = "subgraphCount activeSubgraphCount subgraphDeploymentCount allocationCount activeAllocationCount"
+# Network-wide token totals move with the per-deployment signal, stake and query fees (DEPLOYMENT_METRICS)
+PREFLIGHT_TOKEN_TOTALS = "totalTokensSignalled totalTokensAllocated totalQueryFees"
+
+
+def build_preflight_query(token_totals: bool = False) -> str:
+    counters = f"{PREFLIGHT_COUNTERS} {PREFLIGHT_TOKEN_TOTALS}" if token_totals else PREFLIGHT_COUNTERS
+    return f"""{{
+            _meta {{ block {{ number hash }} }}
+            graphNetwork(id: "1") {{ {counters} }}
+            subgraphs(first: 1, orderBy: updatedAt, orderDirection: desc) {{ id updatedAt }}
+        }}"""
+
+
+@dataclass(frozen=True)
+class RegisteredQuery:
+    text: str            # minified query text
+    sha256: str          # persisted-query id
+    original_bytes: int  # size of the query as written, to report what minifying saves
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def minify_query(text: str) -> str:
+    """Collapse whitespace and drop it around punctuation (our queries have no string literals with spaces)"""
+    text = re.sub(r"\s+", " ", text).strip()
+    return re.sub(r" ?([{}():,!$=\[\]]) ?", r"\1", text)
+
+
+def register_query(text: str) -> RegisteredQuery:
+    """Minify and hash a query once; later calls with the same text reuse the entry"""
+    with _registry_lock:
+        registered = _registry.get(text)
+        if registered is None:
+            minified = minify_query(text)
+            registered = RegisteredQuery(minified, hashlib.sha256(minified.encode()).hexdigest(), len(text.encode()))
+            _registry[text] = registered
+        return registered
+
+
+def query_payload(query: RegisteredQuery, variables: dict = None, persisted: bool = False, include_text: bool = True) -> dict:
+    """Request body; persisted queries follow the automatic persisted query convention
+    (extensions.persistedQuery.sha256Hash, text omitted once the server knows the hash)"""
+    payload = {"query": query.text} if include_text else {}
+    if variables:
+        payload["variables"] = variables
+    if persisted:
+        payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": query.sha256}}
+    return payload
+
+
+def unminified_payload_bytes(query: RegisteredQuery, variables: dict = None) -> int:
+    """Size of the same request sent the old way: full query text, no persisted hash"""
+    return query.original_bytes + len(json.dumps({"query": "", "variables": variables} if variables else {"query": ""}))
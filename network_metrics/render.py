@@ -0,0 +1,783 @@
+import os
+import csv
+import html
+from datetime import datetime, timezone
+from typing import List
+
+from . import DASHBOARD_VERSION
+from .aggregate import NetworkIndexerData, total_subgraphs
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+# Mapping of network names to local logo image paths
+NETWORK_LOGOS = {
+    "abstract": "images/abstract.png",
+    "arbitrum-nova": "images/arbitrum-nova.png",
+    "arbitrum-one": "images/arbitrum.png",
+    "aurora": "images/aurora.png",
+    "avalanche": "images/avalanche.png",
+    "base": "images/base.png",
+    "berachain": "images/berachain.png",
+    "blast": "images/blast.png",
+    "boba": "images/boba.png",
+    "bsc": "images/bsc.png",
+    "celo": "images/celo.png",
+    "chiliz": "images/chiliz.png",
+    "corn": "images/corn.png",
+    "eos": "images/eos.png",
+    "etherlink": "images/etherlink.png",
+    "fantom": "images/fantom.png",
+    "fraxtal": "images/fraxtal.png",
+    "fuji": "images/fuji.png",
+    "fuse": "images/fuse.png",
+    "gnosis": "images/gnosis.png",
+    "harmony": "images/harmony.png",
+    "hemi": "images/hemi.png",
+    "injective": "images/injective.png",
+    "ink": "images/ink.png",
+    "iotex": "images/iotex.png",
+    "kaia": "images/kaia.png",
+    "kroma": "images/kroma.png",
+    "kylin": "images/kylin.png",
+    "lens": "images/lens.png",
+    "lens-2": "images/lens-2.png",
+    "linea": "images/linea.png",
+    "mainnet": "images/ethereum.png",
+    "mantle": "images/mantle.png",
+    "matic": "images/polygon.png",
+    "monad": "images/monad.png",
+    "moonbeam": "images/moonbeam.png",
+    "near": "images/near.png",
+    "optimism": "images/optimism.png",
+    "polygon-zkevm": "images/polygon-zkevm.png",
+    "redstone": "images/redstone.png",
+    "rootstock": "images/rootstock.png",
+    "scroll": "images/scroll.png",
+    "sei": "images/sei.png",
+    "sepolia": "images/sepolia.png",
+    "soneium": "images/soneium.png",
+    "sonic": "images/abstract.png",
+    "unichain": "images/unichain.png",
+    "vana": "images/vana.png",
+    "wax": "images/wax.png",
+    "zkfair": "images/zkfair.png",
+    "zksync-era": "images/zksync-era.png",
+    "zetachain": "images/zetachain.png"
+}
+
+# Shared look of every generated page (dark/light theme, tables, tooltips, footer)
+PAGE_STYLE = """
+            :root {
+                --bg-color: #111;
+                --text-color: #fff;
+                --table-bg: #1e1e1e;
+                --header-bg: #333;
+                --link-color: #fff;
+                --table-border-color: #444;
+                --row-border-color: rgba(255, 255, 255, 0.08); /* Default for dark mode */
+            }
+            .light-mode {
+                --bg-color: #f0f2f5;
+                --text-color: #000;
+                --table-bg: #ffffff;
+                --header-bg: #ddd;
+                --link-color: #0000EE;
+                --table-border-color: #ccc;
+                --row-border-color: rgba(0, 0, 0, 0.3); /* Increased opacity for better visibility in light mode */
+            }
+            /* Lighter border and shadow for light mode */
+            .light-mode table {
+                border-color: #ccc;
+                box-shadow: 0 0 0 1px #ccc, 0 0 8px rgba(0, 0, 0, 0.08);
+            }
+            .light-mode .home-link {
+                color: var(--text-color);
+            }
+            body {
+                background-color: var(--bg-color);
+                color: var(--text-color);
+                font-family: Arial, sans-serif;
+                padding: 10px 20px 20px 20px;
+                margin-top: 0;
+                transition: all 0.3s ease;
+            }
+            .header-container {
+                display: flex;
+                justify-content: space-between;
+                align-items: center;
+                margin-bottom: 15px;
+                line-height: 1;
+            }
+            .breadcrumb {
+                font-size: 0.9em;
+                margin: 0;
+                padding: 0;
+                display: flex;
+                align-items: center;
+            }
+            .toggle-container {
+                display: flex;
+                align-items: center;
+                margin: 0;
+                padding: 0;
+            }
+            .toggle-switch {
+                position: relative;
+                width: 50px;
+                height: 24px;
+                margin-right: 10px;
+            }
+            .toggle-switch input {
+                opacity: 0;
+                width: 0;
+                height: 0;
+            }
+            .toggle-switch .slider {
+                position: absolute;
+                top: 0; left: 0;
+                right: 0; bottom: 0;
+                background: #ccc;
+                transition: 0.4s;
+                border-radius: 34px;
+            }
+            .toggle-switch .slider:before {
+                position: absolute;
+                content: "";
+                height: 18px;
+                width: 18px;
+                left: 4px;
+                bottom: 3px;
+                background: white;
+                transition: 0.4s;
+                border-radius: 50%;
+            }
+            .toggle-switch input:checked + .slider {
+                background: #2196F3;
+            }
+            .toggle-switch input:checked + .slider:before {
+                transform: translateX(24px);
+            }
+            #toggle-icon {
+                font-size: 1.5rem;
+                line-height: 1;
+            }
+            .divider {
+                border: 0;
+                height: 2px;
+                background: linear-gradient(to right, rgba(255, 255, 255, 0), rgba(255, 255, 255, 0.5), rgba(255, 255, 255, 0));
+                margin: 15px 0;
+            }
+            .light-mode .divider {
+                background: linear-gradient(to right, rgba(0, 0, 0, 0), rgba(0, 0, 0, 0.7), rgba(0, 0, 0, 0));
+            }
+            table {
+                width: 100%;
+                border-collapse: separate;
+                border-spacing: 0;
+                background: var(--table-bg);
+                border: 1px solid var(--table-border-color);
+                box-shadow: 0 0 0 1px var(--table-border-color);
+                border-radius: 12px;
+                overflow: hidden;
+            }
+            th, td {
+                padding: 8px 12px;
+                border: none;
+                text-align: left;
+            }
+            td {
+                border-bottom: 1px solid var(--row-border-color);
+            }
+            th {
+                background-color: var(--header-bg);
+                color: var(--text-color);
+            }
+            tr:last-child td {
+                border-bottom: none;
+            }
+            .download-button {
+                padding: 5px 10px;
+                background-color: #4CAF50;
+                color: white;
+                border: none;
+                border-radius: 3px;
+                cursor: pointer;
+            }
+            .download-button:hover {
+                background-color: #45a049;
+            }
+            .tooltip-header {
+                position: relative;
+                cursor: help;
+            }
+            .tooltip-header .tooltip-text {
+                visibility: hidden;
+                background-color: #333;
+                color: #ffeb3b;
+                text-align: left;
+                padding: 6px 10px;
+                border-radius: 4px;
+                position: absolute;
+                z-index: 9999;
+                top: 135%;
+                right: auto;
+                left: 50%;
+                transform: translateX(-50%);
+                opacity: 0;
+                transition: opacity 0.3s;
+                width: max-content;
+                max-width: 220px;
+                font-size: 13px;
+                pointer-events: none;
+                overflow: visible;
+                white-space: normal;
+                word-wrap: break-word;
+                box-sizing: border-box;
+            }
+            .tooltip-header:hover .tooltip-text {
+                visibility: visible;
+                opacity: 1;
+            }
+            a {
+                color: var(--link-color);
+                text-decoration: none;
+            }
+            a:hover {
+                text-decoration: underline;
+            }
+            .footer {
+                text-align: center;
+                margin: 10px 0 40px;
+                font-size: 0.9rem;
+                opacity: 0.9;
+            }
+            .footer a {
+                color: #80bfff;
+                text-decoration: none;
+                transition: color 0.3s ease;
+            }
+            .footer a:hover {
+                color: #4d94ff;
+            }
+            .light-mode .footer a {
+                color: #0066cc;
+            }
+            .light-mode .footer a:hover {
+                color: #0033ff;
+            }
+            .footer-divider {
+                border: none;
+                border-bottom: 1px solid rgba(200, 200, 200, 0.2);
+                margin: 40px 0 10px;
+                opacity: 0.8;
+            }
+            .current-page-title {
+                color: #00bcd4;
+                font-weight: bold;
+            }
+            .light-mode .current-page-title {
+                color: #1a73e8;
+            }
+"""
+
+PAGE_HEADER = """
+        <!-- Header with breadcrumb and toggle -->
+
+        <div class="header-container">
+            <div class="breadcrumb" style="font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; font-weight: 500; font-size: 0.85em; letter-spacing: 0.3px; text-shadow: 0 1px 2px rgba(0,0,0,0.15);">
+                <a href="https://graphtools.pro" class="home-link" style="text-decoration: none;">🏠 Home</a>&nbsp;&nbsp;&raquo;&nbsp;&nbsp;
+                <span class="current-page-title">{title}</span>    
+            </div>
+
+            <div class="toggle-container">
+                <label class="toggle-switch">
+                    <input type="checkbox" onclick="toggleTheme()">
+                    <span class="slider"></span>
+                </label>
+                <span id="toggle-icon">🌙</span>
+            </div>
+
+        </div>
+"""
+
+PAGE_FOOTER = """
+            <hr class="footer-divider">
+            <div class="footer">
+                ©<script>document.write(new Date().getFullYear())</script> 
+                <a href="https://graphtools.pro">Graph Tools Pro</a> :: Made with ❤️ by 
+                <a href="https://x.com/graphtronauts_c" target="_blank">Graphtronauts</a>
+                for <a href="https://x.com/graphprotocol" target="_blank">The Graph</a> ecosystem 👨‍🚀
+                <div style="margin-top: 4px;">
+                    <span style="font-size: 0.8rem;">For Info: <a href="https://x.com/pdiomede" target="_blank">@pdiomede</a> & <a href="https://x.com/PaulBarba12" target="_blank">@PaulBarba12</a></span>
+                </div>
+            </div>
+        
+        </div>
+"""
+
+
+def page_header(title: str) -> str:
+    return PAGE_HEADER.replace("{title}", title)
+
+
+def display_name(network_name: str, title: bool = False) -> str:
+    if network_name.lower() == "mainnet":
+        return "Ethereum (Mainnet)"
+    elif network_name.lower() == "matic":
+        return "Polygon (Matic)"
+    return network_name.title() if title else network_name
+
+
+def change_counts(changes, network_name: str):
+    """(added, removed) subgraph counts for a network from the changes document, or (None, None)"""
+    if changes is None:
+        return None, None
+    network_changes = changes["networks"].get(network_name)
+    if not network_changes:
+        return 0, 0
+    return len(network_changes["added"]), len(network_changes["removed"])
+
+
+FRESHNESS_LABELS = {
+    "fresh": "🟢 Live data",
+    "refreshing": "🔄 Refreshing — showing data",
+    "stale": "🟠 Last refresh failed — showing data",
+    "rejected": "🟠 Last refresh held back by validation — showing data",
+}
+
+
+def freshness_badge(freshness) -> str:
+    """Badge with the age of the data; the age is recomputed in the browser, so a page that
+    stops being refreshed turns amber on its own after `stale_after_minutes`"""
+    if not freshness:
+        return ""
+    label = FRESHNESS_LABELS.get(freshness["status"], "")
+    warnings = freshness.get("warnings") or []
+    warning = f' <span title="{html.escape(chr(10).join(warnings))}" style="cursor: help;">⚠️ {len(warnings)} validation warning(s)</span>' if warnings else ""
+    return f"""<div id="freshness" data-as-of="{freshness['data_as_of']}" data-status="{freshness['status']}" data-stale-after="{freshness['stale_after_minutes']}" style="font-size: 0.8em; margin: -20px 0 25px;">
+                {label} as of {freshness['data_as_of'].replace('T', ' ').replace('Z', ' UTC')} <span id="freshness-age"></span>{warning}
+            </div>
+            <script>
+                (function () {{
+                    const badge = document.getElementById('freshness');
+                    const minutes = Math.round((Date.now() - Date.parse(badge.dataset.asOf)) / 60000);
+                    document.getElementById('freshness-age').textContent = minutes < 60 ? `(${{minutes}} min ago)` : `(${{Math.round(minutes / 60)}} h ago)`;
+                    if (badge.dataset.status !== 'fresh' || minutes > Number(badge.dataset.staleAfter)) {{
+                        badge.style.color = '#ff9800';
+                    }}
+                }})();
+            </script>"""
+
+
+def format_grt(value) -> str:
+    """Compact GRT amount for table cells: 1.2M, 345.6K, 12"""
+    if value is None:
+        return ""
+    for threshold, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            return f"{value / threshold:.1f}{suffix}"
+    return f"{value:.0f}"
+
+
+def token_cell(value):
+    return f"{value or 0:.2f}", format_grt(value), f"{value or 0:,.2f} GRT"
+
+
+def plain_cell(value, text_format: str):
+    if value is None:
+        return "", "", ""
+    return value, text_format.format(value), ""
+
+
+def status_cell(counts):
+    allocations = sum(counts.values()) if counts else 0
+    if not allocations:
+        return "", "", ""
+    synced_pct = counts["synced"] / allocations * 100
+    return f"{synced_pct:.1f}", f"{synced_pct:.0f}%", f"{counts['synced']} synced, {counts['lagging']} lagging, {counts['failed']} failed, {counts['unreachable']} unreachable"
+
+
+def churn_cell(network_churn):
+    if not network_churn:
+        return 0, "", ""
+    totals = network_churn["totals"]
+    return (totals["opened"] + totals["closed"], f"+{totals['opened']}/−{totals['closed']}",
+            f"{totals['opened']} opened, {totals['closed']} closed; {totals['indexers_entered']} indexers entered, {totals['indexers_exited']} exited")
+
+
+def optional_columns(data: List[NetworkIndexerData], indexer_status=None, churn=None) -> list:
+    """(label, tooltip, cell) of the sortable columns after Unique Indexers, for the metrics this
+    render has data for; cell(entry) gives the (sort value, text, title) of a row"""
+    columns = []
+    # Token totals only when the crawl came with deployment metrics
+    if any(entry.signalled_tokens is not None for entry in data):
+        columns += [
+            ("Signal", "Curation signal (GRT) on the current deployments of this network's subgraphs", lambda entry: token_cell(entry.signalled_tokens)),
+            ("Stake", "Tokens (GRT) allocated by indexers to these deployments", lambda entry: token_cell(entry.staked_tokens)),
+            ("Query Fees", "Query fees (GRT) collected by these deployments since they were created", lambda entry: token_cell(entry.query_fees)),
+        ]
+    # Stake-weighted coverage and concentration when the indexer table was available
+    if any(entry.stake_coverage is not None for entry in data):
+        columns += [
+            ("Stake Cov.", "Share of the stake (own + delegated) of all allocating indexers held by indexers serving this network",
+             lambda entry: plain_cell(entry.stake_coverage, "{:.1f}%")),
+            ("HHI", "Herfindahl-Hirschman index of the stake serving this network (0-10,000, higher = more concentrated)",
+             lambda entry: plain_cell(entry.stake_hhi, "{:,}")),
+            ("Nakamoto", "Fewest indexers holding more than half of the stake serving this network",
+             lambda entry: plain_cell(entry.nakamoto_coefficient, "{}")),
+        ]
+    # Share of allocations whose indexer reports the deployment as synced, from the last status check
+    status_networks = (indexer_status or {}).get("networks", {})
+    if status_networks:
+        checked_at = indexer_status["checked_at"].replace("T", " ").replace("Z", " UTC")
+        columns.append(("Synced", f"Allocations whose indexer reports the deployment as synced (status check of {checked_at})",
+                        lambda entry: status_cell(status_networks.get(entry.network_name))))
+    # Allocation churn from the incrementally fetched allocation events
+    churn_networks = (churn or {}).get("networks", {})
+    if churn_networks:
+        columns.append((f"Churn ({len(churn['days'])}d)", f"Allocations opened/closed over the last {len(churn['days'])} days (see api/allocation_churn.json)",
+                        lambda entry: churn_cell(churn_networks.get(entry.network_name))))
+    return columns
+
+
+def search_box(search) -> str:
+    """Search input over the prebuilt index (search.py); its script and shards load on first focus"""
+    if not search:
+        return ""
+    return f"""        <div style="max-width: 600px; margin: 0 auto 15px auto;">
+            <input id="subgraphSearch" type="search" autocomplete="off" placeholder="🔍 Search {search['docs']:,} subgraphs by name, id, network or deployment"
+                   style="width: 100%; box-sizing: border-box; padding: 6px 10px; background: var(--table-bg); color: var(--text-color); border: 1px solid var(--table-border-color); border-radius: 4px;"
+                   onfocus="if (!this.dataset.loaded) {{ this.dataset.loaded = 1; const s = document.createElement('script'); s.src = 'search/search.js?v={search['build']}'; document.head.appendChild(s); }}">
+            <div id="subgraphSearchResults"></div>
+        </div>"""
+
+
+def save_subgraph_counts_to_csv(data: List[NetworkIndexerData], filename: str = "network_subgraph_counts.csv", changes=None, output_dir: str = None):
+    path = os.path.join(ensure_dir(output_dir or get_settings().report_dir), filename)
+    # Sort data in descending order by subgraph_count before writing
+    sorted_data = sorted(data, key=lambda x: x.subgraph_count, reverse=True)
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Network", "Subgraph Count", "Unique Indexers", "Added (24h)", "Removed (24h)", "Curation Signal (GRT)", "Allocated Stake (GRT)", "Query Fees (GRT)", "Stake Coverage (%)", "Stake HHI", "Nakamoto Coefficient"])
+        for entry in sorted_data:
+            name = display_name(entry.network_name)
+            added, removed = change_counts(changes, entry.network_name)
+            tokens = ["" if value is None else f"{value:.2f}" for value in (entry.signalled_tokens, entry.staked_tokens, entry.query_fees)]
+            stake = ["" if value is None else value for value in (entry.stake_coverage, entry.stake_hhi, entry.nakamoto_coefficient)]
+            writer.writerow([name, f"{entry.subgraph_count:,}", entry.unique_indexer_count, "" if added is None else added, "" if removed is None else removed] + tokens + stake)
+    log_message(f"Saved CSV report to {path}")
+
+
+def save_source_breakdown_csv(sources: dict, filename: str = "network_subgraph_counts_by_source.csv", output_dir: str = None):
+    """Per-source counts side by side, one row per network and one column pair per source"""
+    path = os.path.join(ensure_dir(output_dir or get_settings().report_dir), filename)
+    names = list(sources)
+    by_network = {}
+    for name, rows in sources.items():
+        for entry in rows:
+            by_network.setdefault(entry.network_name, {})[name] = entry
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Network"] + [f"{name} {column}" for name in names for column in ("Subgraphs", "Unique Indexers")])
+        for network in sorted(by_network, key=lambda n: -sum(e.subgraph_count for e in by_network[n].values())):
+            row = [display_name(network)]
+            for name in names:
+                entry = by_network[network].get(name)
+                row += [entry.subgraph_count, entry.unique_indexer_count] if entry else [0, 0]
+            writer.writerow(row)
+    log_message(f"Saved per-source CSV report to {path}")
+
+
+def save_subgraph_counts_to_html(data: List[NetworkIndexerData], filename: str = "index.html", total_subgraphs_yesterday=None, yesterday_network_counts=None, total_subgraphs_today_start=None, changes=None, freshness=None, sparklines=None, search=None, indexer_status=None, churn=None, output_dir: str = None):
+    path = os.path.join(ensure_dir(output_dir or get_settings().report_dir), filename)
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    total = total_subgraphs(data)
+    sorted_data = sorted(data, key=lambda x: x.subgraph_count, reverse=True)
+    sparklines = sparklines or {}
+    trend_days = get_settings().sparkline_days
+    columns = optional_columns(data, indexer_status, churn)
+    column_headers = "".join(f"""
+                <th onclick="sortTable({n})" style="cursor:pointer;" data-sort-direction="desc" data-numeric>
+                    <span class="tooltip-header" style="position: relative; display: inline-block;">
+                        {label}
+                        <span class="tooltip-text">{tooltip}</span>
+                    </span>
+                </th>""" for n, (label, tooltip, _) in enumerate(columns, start=4))
+
+    html = f"""
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <meta name="description" content="Explore a real-time dashboard showing the number of subgraphs published on The Graph Network across supported blockchain networks.">
+        <meta name="robots" content="index, follow">
+
+        <meta property="og:title" content="Graph Tools Pro :: Subgraphs per Network">
+        <meta property="og:description" content="Visualize how many subgraphs are deployed per chain on The Graph Network with this interactive dashboard.">
+        <meta property="og:url" content="https://graphtools.pro/delegators/">
+        <meta property="og:type" content="website">
+        <meta property="og:image" content="https://graphtools.pro/graphtoolsprologo.jpg">
+        
+        <meta name="twitter:card" content="summary_large_image">
+        <meta name="twitter:title" content="Graph Tools Pro :: Delegators Activity Log">
+        <meta name="twitter:description" content="See how The Graph Network is utilized across different chains through a live subgraph deployment tracker.">
+        <meta name="twitter:image" content="https://graphtools.pro/graphtoolsprologo.jpg">
+        
+        <title>Graph Tools Pro: Subgraphs Network Dashboard</title>
+        <link rel="icon" type="image/png" href="https://graphtools.pro/favicon.ico">
+        
+        <style>           
+{PAGE_STYLE}
+        </style>
+    </head>
+
+    <body>
+
+{page_header("📊 Subgraphs Network Dashboard")}
+
+        <hr class="divider">
+            <div style="text-align: center;">    
+            <h1 style="margin-bottom: 4px;">Subgraphs Network Dashboard</h1>
+            <div style="text-align: center; font-size: 0.8em; color: var(--text-color); margin-top: 0; margin-bottom: 30px;">
+                Generated on: {timestamp} - (updated every day at 8am UTC) - v{DASHBOARD_VERSION}
+            </div>
+            {freshness_badge(freshness)}
+        </div>
+
+        <div style="display: flex; justify-content: space-between; align-items: center; max-width: 600px; margin: 0 auto 10px auto; font-size: 1em;">
+            <div style="color: #4CAF50;"><strong>Total Subgraphs:</strong> {total:,}{f" ({total - total_subgraphs_yesterday:+,} since yesterday)" if total_subgraphs_yesterday is not None else ""}{f" ({total - total_subgraphs_today_start:+,} today)" if total_subgraphs_today_start is not None else ""}</div>
+            <div><a href="indexers.html" style="font-size: 0.85em; margin-right: 10px;">🏆 Indexers</a><button class="download-button" onclick="downloadCSV()">Download CSV</button></div>
+        </div>
+        <div style="max-width: 600px; margin: 0 auto 15px auto;" title="Total subgraphs, last {trend_days} days">{sparklines.get("total", "")}</div>
+{search_box(search)}
+        <div style="overflow-x:auto; max-width: 600px; margin: 0 auto;">
+        <table id="networkTable" style="width: 100%;">
+            <tr>
+                <th onclick="sortTable(0)" style="cursor:pointer;" data-sort-direction="desc">
+                    <span class="tooltip-header" style="position: relative; display: inline-block;">
+                        Network
+                    </span>
+                </th>
+                <th onclick="sortTable(1)" style="cursor:pointer;" data-sort-direction="desc" data-numeric>
+                    <span class="tooltip-header" style="position: relative; display: inline-block;">
+                        Subgraph Count
+                        <span class="tooltip-text">Total number of subgraphs currently deployed on this network</span>
+                    </span>
+                </th>
+                <th onclick="sortTable(2)" style="cursor:pointer;" data-sort-direction="desc">
+                    <span class="tooltip-header" style="position: relative; display: inline-block;">
+                        Var (24h)
+                        <span class="tooltip-text">Change in subgraph count compared to the previous day</span>
+                    </span>
+                </th>
+                <th onclick="sortTable(3)" style="cursor:pointer;" data-sort-direction="desc" data-numeric>
+                    <span class="tooltip-header" style="position: relative; display: inline-block;">
+                        Unique Indexers
+                        <span class="tooltip-text">Number of unique indexers actively allocating to this network</span>
+                    </span>
+                </th>{column_headers}
+                <th>
+                    <span class="tooltip-header" style="position: relative; display: inline-block;">
+                        Trend
+                        <span class="tooltip-text">Subgraph count over the last {trend_days} days</span>
+                    </span>
+                </th>
+            </tr>"""
+
+    for entry in sorted_data:
+        logo = NETWORK_LOGOS.get(entry.network_name.lower(), "")
+        logo_html = f"<img src='{logo if logo else 'images/placeholder_logo.png'}' alt='{entry.network_name}' style='width:18px; height:18px; vertical-align:middle; margin-right:6px;' />"
+        name = display_name(entry.network_name, title=True)
+        diff = ""
+        diff_value = ""
+        if yesterday_network_counts:
+            yesterday_val = yesterday_network_counts.get(entry.network_name, 0)
+            change = entry.subgraph_count - yesterday_val
+            if change > 0:
+                diff = f"<span style='color: #4CAF50; font-size: 0.85em;'>{change:+}</span>"
+            elif change < 0:
+                diff = f"<span style='color: #f44336; font-size: 0.85em;'>{change:+}</span>"
+            diff_value = str(change)
+        added, removed = change_counts(changes, entry.network_name)
+        diff_title = f" title='{added} added, {removed} removed (see api/changes.json)'" if added else (f" title='{removed} removed (see api/changes.json)'" if removed else "")
+        column_cells = "".join(
+            f"""
+                <td data-value="{value}" title="{title}">{text}</td>"""
+            for value, text, title in (cell(entry) for _, _, cell in columns)
+        )
+        html += f"""
+            <tr>
+              <td>{logo_html}<a href="https://thegraph.com/explorer?indexedNetwork={entry.network_name}&orderBy=Query+Count&orderDirection=desc" target="_blank" style="color: var(--link-color); text-decoration: none;">{name} <img src="./images/link-icon.png" alt="link icon" style="width: 12px; height: 12px; vertical-align: middle; margin-left: 4px;" /></a></td>
+                <td data-value="{entry.subgraph_count}">{entry.subgraph_count:,}</td>
+                <td data-value="{diff_value}"{diff_title}>{diff}</td>
+                <td data-value="{entry.unique_indexer_count}">{entry.unique_indexer_count}</td>{column_cells}
+                <td style="line-height: 0;">{sparklines.get(entry.network_name, "")}</td>
+            </tr>"""
+
+    html += """
+        </table>
+
+""" + PAGE_FOOTER + """
+        
+        <script>
+            document.addEventListener('DOMContentLoaded', () => {
+                const toggle = document.getElementById('themeToggle');
+                const body = document.body;
+                // Default to dark mode
+                body.classList.add('dark-mode');
+
+                toggle.addEventListener('change', () => {
+                    body.classList.toggle('dark-mode');
+                    body.classList.toggle('light-mode');
+                });
+            });
+
+            function toggleTheme() {
+                document.body.classList.toggle('light-mode');
+                const icon = document.getElementById('toggle-icon');
+                icon.textContent = document.body.classList.contains('light-mode') ? '☀️' : '🌙';
+            }
+                
+            function sortTable(columnIndex) {
+                const table = document.getElementById("networkTable");
+                const rows = Array.from(table.rows).slice(1);
+                const isNumeric = table.rows[0].cells[columnIndex].hasAttribute("data-numeric");
+                const header = table.rows[0].cells[columnIndex];
+                const currentDirection = header.getAttribute("data-sort-direction") || "desc";
+                const newDirection = currentDirection === "asc" ? "desc" : "asc";
+                header.setAttribute("data-sort-direction", newDirection);
+
+                Array.from(table.rows[0].cells).forEach((cell, idx) => {
+                    if (idx != columnIndex) {
+                        cell.removeAttribute("data-sort-direction");
+                    }
+                });
+
+                rows.sort((a, b) => {
+                    let aVal = a.cells[columnIndex].getAttribute("data-value") || a.cells[columnIndex].textContent.trim();
+                    let bVal = b.cells[columnIndex].getAttribute("data-value") || b.cells[columnIndex].textContent.trim();
+                    if (isNumeric) {
+                        aVal = parseFloat(aVal.replace(/,/g, '')) || 0;
+                        bVal = parseFloat(bVal.replace(/,/g, '')) || 0;
+                    }
+                    return (newDirection === "asc" ? aVal > bVal : aVal < bVal) ? 1 : -1;
+                });
+
+                rows.forEach(row => table.tBodies[0].appendChild(row));
+            }
+            function downloadCSV() {
+                const link = document.createElement('a');
+                link.href = 'network_subgraph_counts.csv';
+                link.download = 'network_subgraph_counts.csv';
+                document.body.appendChild(link);
+                link.click();
+                document.body.removeChild(link);
+            }
+        </script>
+    </body>
+    </html>
+    """
+
+    with open(path, mode="w", encoding="utf-8") as file:
+        file.write(html)
+
+    log_message(f"Saved HTML report to {path}")
+
+
+THEME_SCRIPT = """
+            function toggleTheme() {
+                document.body.classList.toggle('light-mode');
+                const icon = document.getElementById('toggle-icon');
+                icon.textContent = document.body.classList.contains('light-mode') ? '☀️' : '🌙';
+            }
+"""
+
+
+def short_address(address: str) -> str:
+    return f"{address[:6]}…{address[-4:]}" if len(address) > 12 else address
+
+
+def save_indexer_leaderboard_html(index: dict, overlap_networks: list, overlap_matrix: list, filename: str = "indexers.html", top: int = 100, output_dir: str = None):
+    """Indexer leaderboard (networks served, allocations) and per-network indexer overlap"""
+    path = os.path.join(ensure_dir(output_dir or get_settings().report_dir), filename)
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+    rows = ""
+    for rank, (indexer, info) in enumerate(list(index["indexers"].items())[:top], start=1):
+        top_networks = ", ".join(display_name(n, title=True) for n in list(info["networks"])[:5])
+        more = f" +{info['network_count'] - 5}" if info["network_count"] > 5 else ""
+        rows += f"""
+            <tr>
+                <td data-value="{rank}">{rank}</td>
+                <td><a href="https://thegraph.com/explorer/profile/{indexer}?view=Indexing" target="_blank" title="{indexer}">{short_address(indexer)}</a></td>
+                <td data-value="{info['network_count']}">{info['network_count']}</td>
+                <td data-value="{info['allocations']}">{info['allocations']:,}</td>
+                <td style="font-size: 0.85em;">{top_networks}{more}</td>
+            </tr>"""
+
+    overlap_head = "".join(f"<th style='font-size: 0.75em;'>{display_name(n, title=True)}</th>" for n in overlap_networks)
+    overlap_rows = ""
+    for network, counts in zip(overlap_networks, overlap_matrix):
+        own = max(max(counts), 1)
+        cells = "".join(
+            f"<td style='text-align: center; background: rgba(33, 150, 243, {count / own * 0.6:.2f});'>{count}</td>"
+            for count in counts
+        )
+        overlap_rows += f"<tr><td style='font-size: 0.85em;'>{display_name(network, title=True)}</td>{cells}</tr>"
+
+    html = f"""
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Graph Tools Pro: Indexer Leaderboard</title>
+        <link rel="icon" type="image/png" href="https://graphtools.pro/favicon.ico">
+        <style>
+{PAGE_STYLE}
+        </style>
+    </head>
+
+    <body>
+{page_header('<a href="index.html" style="text-decoration: none;">📊 Subgraphs Network Dashboard</a>&nbsp;&nbsp;&raquo;&nbsp;&nbsp;🏆 Indexer Leaderboard')}
+        <hr class="divider">
+        <div style="text-align: center;">
+            <h1 style="margin-bottom: 4px;">Indexer Leaderboard</h1>
+            <div style="font-size: 0.8em; margin-bottom: 30px;">
+                Generated on: {timestamp} - {index['indexer_count']:,} indexers with active allocations - v{DASHBOARD_VERSION}
+            </div>
+        </div>
+
+        <div style="overflow-x:auto; max-width: 800px; margin: 0 auto;">
+        <table>
+            <tr>
+                <th>#</th>
+                <th>Indexer</th>
+                <th><span class="tooltip-header" style="position: relative; display: inline-block;">Networks<span class="tooltip-text">Number of networks with at least one active allocation</span></span></th>
+                <th>Allocations</th>
+                <th>Top Networks</th>
+            </tr>{rows}
+        </table>
+        </div>
+
+        <h2 style="text-align: center; margin-top: 40px;">Indexer Overlap</h2>
+        <div style="text-align: center; font-size: 0.8em; margin-bottom: 15px;">Indexers shared between the {len(overlap_networks)} networks with the most unique indexers (diagonal = network's own count)</div>
+        <div style="overflow-x:auto; max-width: 1000px; margin: 0 auto;">
+        <table>
+            <tr><th></th>{overlap_head}</tr>
+            {overlap_rows}
+        </table>
+        </div>
+        <div style="text-align: center; margin-top: 15px; font-size: 0.85em;"><a href="api/indexers.json">Download indexer index (JSON)</a></div>
+{PAGE_FOOTER}
+        <script>
+{THEME_SCRIPT}
+        </script>
+    </body>
+    </html>
+    """
+
+    with open(path, mode="w", encoding="utf-8") as file:
+        file.write(html)
+
+    log_message(f"Saved indexer leaderboard to {path}")
@@ -0,0 +1,270 @@
+"""Client-side search over the subgraph catalogue, prebuilt at render time.
+
+The index covers every subgraph of the last accepted crawl (display name, subgraph id,
+network, deployment hash) and is written to reports/search/ as gzip shards that the
+dashboard only fetches once the search box gets focus:
+    index.json       document count, term shards and a build hash for cache busting
+    t-<c>.json.gz    trigram -> doc numbers (delta-encoded) for the keys starting with <c>
+    d-<n>.json.gz    documents n*DOC_SHARD_SIZE onwards as [id, name, network, deployment]
+    search.js        the search box logic
+
+Words are indexed with all their trigrams plus a "^ab" word-start key, so names match by
+substring and one or two typed characters match by word prefix. Ids and deployment
+hashes are only indexed on their first HASH_PREFIX characters and match by prefix.
+Shards are gzipped without a timestamp: an unchanged shard is byte-identical and is not
+uploaded again by the incremental deploy. Once a build is published, shards its manifest no
+longer lists are removed (see prune_search_shards).
+"""
+import os
+import gzip
+import hashlib
+import json
+import re
+
+from .config import ensure_dir, get_settings, load_sources
+from .log import log_message
+from . import store
+
+
+SEARCH_DIR = "search"
+DOC_SHARD_SIZE = 1000
+HASH_PREFIX = 8
+HASH_MIN_LENGTH = 20  # tokens this long are ids or deployment hashes
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokens(text: str) -> list:
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def index_keys(token: str) -> set:
+    keys = {f"^{token[:2]}"}
+    if len(token) >= HASH_MIN_LENGTH:
+        token = token[:HASH_PREFIX]
+    keys.update(token[n:n + 3] for n in range(len(token) - 2))
+    return keys
+
+
+def collect_documents() -> list:
+    """[id, name, network, deployment] of every subgraph of the accepted crawls, named ones first by name"""
+    from .fetch import accepted_journal
+
+    documents = {}
+    for source in load_sources():
+        name, state = accepted_journal(source)
+        if state is None:
+            continue
+        for page in store.journal_iter_pages(name, state):
+            for item in page:
+                deployment = (item.get("currentVersion") or {}).get("subgraphDeployment") or {}
+                network = (deployment.get("manifest") or {}).get("network")
+                if not network:
+                    continue
+                display_name = (item.get("metadata") or {}).get("displayName") or ""
+                documents.setdefault(item["id"], [item["id"], display_name.strip(), network, deployment.get("id") or ""])
+    return sorted(documents.values(), key=lambda doc: (not doc[1], doc[1].lower(), doc[0]))
+
+
+def build_postings(documents: list) -> dict:
+    """{shard character: {key: delta-encoded doc numbers}}"""
+    postings = {}
+    for number, document in enumerate(documents):
+        keys = set()
+        for token in tokens(" ".join(document)):
+            keys |= index_keys(token)
+        for key in keys:
+            postings.setdefault(key, []).append(number)
+    shards = {}
+    for key, numbers in sorted(postings.items()):
+        shards.setdefault(key.lstrip("^")[0], {})[key] = [numbers[0]] + [b - a for a, b in zip(numbers, numbers[1:])]
+    return shards
+
+
+def write_gzip_json(path: str, data) -> bytes:
+    compressed = gzip.compress(json.dumps(data, separators=(",", ":")).encode(), mtime=0)
+    with open(path, "wb") as f:
+        f.write(compressed)
+    return compressed
+
+
+def build_search_index(output_dir: str) -> dict:
+    """Write the search shards into output_dir/search/; returns the manifest, or None without documents"""
+    documents = collect_documents()
+    if not documents:
+        log_message("📭 No accepted crawl to build the search index from.")
+        return None
+    directory = ensure_dir(os.path.join(output_dir, SEARCH_DIR))
+    build = hashlib.sha1()
+    term_bytes = doc_bytes = 0
+
+    shards = build_postings(documents)
+    for character, keys in shards.items():
+        compressed = write_gzip_json(os.path.join(directory, f"t-{character}.json.gz"), keys)
+        build.update(compressed)
+        term_bytes += len(compressed)
+    doc_shards = range(0, len(documents), DOC_SHARD_SIZE)
+    for start in doc_shards:
+        compressed = write_gzip_json(os.path.join(directory, f"d-{start // DOC_SHARD_SIZE}.json.gz"), documents[start:start + DOC_SHARD_SIZE])
+        build.update(compressed)
+        doc_bytes += len(compressed)
+    build.update(SEARCH_SCRIPT.encode())
+
+    manifest = {
+        "version": 1,
+        "build": build.hexdigest()[:12],
+        "docs": len(documents),
+        "doc_shard_size": DOC_SHARD_SIZE,
+        "hash_prefix": HASH_PREFIX,
+        "term_shards": sorted(shards),
+    }
+    with open(os.path.join(directory, "search.js"), "w", encoding="utf-8") as f:
+        f.write(SEARCH_SCRIPT)
+    with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    log_message(f"🔍 Search index: {len(documents):,} subgraphs, {len(shards)} term shards ({term_bytes / 1e3:.0f} kB), "
+                f"{len(doc_shards)} document shards ({doc_bytes / 1e3:.0f} kB)")
+    return manifest
+
+
+def shard_names(manifest: dict) -> set:
+    doc_shards = -(-manifest["docs"] // manifest["doc_shard_size"])
+    return {f"t-{c}.json.gz" for c in manifest["term_shards"]} | {f"d-{n}.json.gz" for n in range(doc_shards)}
+
+
+def prune_search_shards(report_dir: str = None) -> int:
+    """Remove the published shards that the published manifest doesn't list"""
+    directory = os.path.join(report_dir or get_settings().report_dir, SEARCH_DIR)
+    try:
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            keep = shard_names(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return 0
+    stale = [name for name in os.listdir(directory) if re.fullmatch(r"[td]-\w+\.json\.gz", name) and name not in keep]
+    for name in stale:
+        os.remove(os.path.join(directory, name))
+    if stale:
+        log_message(f"🧹 Removed {len(stale)} stale search shards")
+    return len(stale)
+
+
+# Loaded by the dashboard on first focus of #subgraphSearch; shards are fetched on demand
+SEARCH_SCRIPT = """(function () {
+    const input = document.getElementById('subgraphSearch');
+    const results = document.getElementById('subgraphSearchResults');
+    const limit = 25;
+    const files = new Map();
+    let manifest = null;
+    let sequence = 0;
+
+    async function readJson(response) {
+        if (!response.ok) throw new Error(`${response.url}: ${response.status}`);
+        let bytes = new Uint8Array(await response.arrayBuffer());
+        if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+        }
+        return JSON.parse(new TextDecoder().decode(bytes));
+    }
+
+    function load(name) {
+        if (!files.has(name)) {
+            files.set(name, fetch(`search/${name}?v=${manifest.build}`).then(readJson));
+        }
+        return files.get(name);
+    }
+
+    function decode(deltas) {
+        let n = 0;
+        return deltas.map(delta => (n += delta));
+    }
+
+    function termShard(character) {
+        return manifest.term_shards.includes(character) ? load(`t-${character}.json.gz`) : Promise.resolve({});
+    }
+
+    // Doc numbers matching one typed token: word prefix for 1-2 characters, trigrams otherwise
+    async function candidates(token) {
+        if (token.length < 3) {
+            const keys = await termShard(token[0]);
+            const matches = new Set();
+            for (const key in keys) {
+                if (key.startsWith('^' + token)) decode(keys[key]).forEach(n => matches.add(n));
+            }
+            return matches;
+        }
+        const prefix = token.slice(0, manifest.hash_prefix);
+        let matches = null;
+        for (let i = 0; i + 3 <= prefix.length; i++) {
+            const trigram = prefix.slice(i, i + 3);
+            const keys = await termShard(trigram[0]);
+            const numbers = new Set(decode(keys[trigram] || []));
+            matches = matches === null ? numbers : new Set([...matches].filter(n => numbers.has(n)));
+            if (!matches.size) break;
+        }
+        return matches;
+    }
+
+    async function documentAt(n) {
+        const shard = await load(`d-${Math.floor(n / manifest.doc_shard_size)}.json.gz`);
+        return shard[n % manifest.doc_shard_size];
+    }
+
+    function show(documents, total, more) {
+        results.replaceChildren();
+        if (total === null) return;
+        const summary = document.createElement('div');
+        summary.style.cssText = 'font-size: 0.8em; margin: 6px 0;';
+        summary.textContent = more ? `About ${total.toLocaleString()} matches, showing the first ${limit}`
+            : total ? `${total} match${total === 1 ? '' : 'es'}` : 'No matching subgraph';
+        results.appendChild(summary);
+        for (const [id, name, network, deployment] of documents) {
+            const row = document.createElement('div');
+            row.style.cssText = 'padding: 4px 0; border-bottom: 1px solid var(--row-border-color); font-size: 0.9em;';
+            const link = document.createElement('a');
+            link.href = `https://thegraph.com/explorer/subgraphs/${encodeURIComponent(id)}`;
+            link.target = '_blank';
+            link.style.color = 'var(--link-color)';
+            link.textContent = name || id;
+            const details = document.createElement('span');
+            details.style.cssText = 'opacity: 0.7; font-size: 0.85em; margin-left: 8px;';
+            details.textContent = `${network} · ${id.slice(0, 10)}… · ${deployment.slice(0, 10)}…`;
+            row.append(link, details);
+            results.appendChild(row);
+        }
+    }
+
+    async function search(query) {
+        const run = ++sequence;
+        const typed = (query.toLowerCase().match(/[a-z0-9]+/g) || []);
+        if (!typed.length) return show([], null);
+        manifest = manifest || await fetch('search/index.json', {cache: 'no-cache'}).then(readJson);
+        let matches = null;
+        for (const token of typed) {
+            const found = await candidates(token);
+            matches = matches === null ? found : new Set([...matches].filter(n => found.has(n)));
+            if (!matches.size) break;
+        }
+        // Trigram candidates are checked against the documents, which are only fetched up to the first page of results
+        const documents = [];
+        let more = false;
+        for (const n of [...matches].sort((a, b) => a - b)) {
+            const doc = await documentAt(n);
+            const haystack = doc.join(' ').toLowerCase();
+            if (!typed.every(token => haystack.includes(token))) continue;
+            if (documents.length === limit) {
+                more = true;
+                break;
+            }
+            documents.push(doc);
+        }
+        if (run === sequence) show(documents, more ? matches.size : documents.length, more);
+    }
+
+    let timer = null;
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => search(input.value).catch(e => { results.textContent = `Search unavailable (${e.message})`; }), 120);
+    });
+    if (input.value) search(input.value);
+})();
+"""
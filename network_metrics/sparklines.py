@@ -0,0 +1,154 @@
+"""Inline SVG sparklines for the dashboard, rendered server-side.
+
+Series come from the daily metric snapshots and the hourly history of the last
+SPARKLINE_DAYS. Every series is downsampled with Largest-Triangle-Three-Buckets to at
+most SPARKLINE_POINTS points, so a chart stays a few hundred bytes whatever the
+history length. SVGs are cached in cache/sparklines/ under the hash of the downsampled
+points and chart options: an unchanged series is read back instead of drawn again, and
+entries no run used are pruned.
+"""
+import os
+import hashlib
+import json
+from datetime import datetime, timezone, timedelta
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+# Bump when the SVG markup changes, so cached charts are redrawn
+SVG_VERSION = 1
+
+
+def lttb(points: list, threshold: int) -> list:
+    """Largest-Triangle-Three-Buckets: keep `threshold` of the (x, y) points, the first and
+    last included, choosing in each bucket the point forming the largest triangle with the
+    previously kept point and the average of the next bucket"""
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    kept = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_bucket = points[end:next_end] or points[-1:]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+        ax, ay = points[kept]
+        best, best_area = start, -1.0
+        for n in range(start, end):
+            x, y = points[n]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = n, area
+        sampled.append(points[best])
+        kept = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def load_series(now: datetime) -> dict:
+    """{"total": [(epoch, count)], network: [(epoch, count)]}, oldest first: daily snapshots
+    until the hourly history starts, then every hourly point"""
+    from .hourly import iter_hourly_points
+    from .store import iter_daily_snapshots
+
+    since = now - timedelta(days=get_settings().sparkline_days)
+    hourly = [
+        (datetime.strptime(point["t"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp(), point["total"], point["s"])
+        for point in iter_hourly_points(since=since)
+    ]
+    first_hourly = hourly[0][0] if hourly else None
+    rows = []
+    for _, snapshot in iter_daily_snapshots(since=since.strftime("%Y-%m-%d")):
+        t = datetime.strptime(snapshot["timestamp"], "%Y-%m-%d %H:%M:%S UTC").replace(tzinfo=timezone.utc).timestamp()
+        if first_hourly is None or t < first_hourly:
+            networks = snapshot.get("networks", {})
+            rows.append((t, snapshot.get("total_subgraphs", sum(networks.values())), networks))
+    rows.extend(hourly)
+
+    series = {"total": [(t, total) for t, total, _ in rows]}
+    for t, _, networks in rows:
+        for network, count in networks.items():
+            series.setdefault(network, []).append((t, count))
+    return series
+
+
+def draw_svg(points: list, width: int, height: int, color: str, fill: bool) -> str:
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    x0, x_span = xs[0], (xs[-1] - xs[0]) or 1
+    y0, y_span = min(ys), (max(ys) - min(ys)) or 1
+    pad = 2
+    coords = [
+        (pad + (x - x0) / x_span * (width - 2 * pad), height - pad - (y - y0) / y_span * (height - 2 * pad))
+        for x, y in points
+    ]
+    line = " ".join(f"{x:.1f},{y:.1f}" for x, y in coords)
+    area = f'<polygon points="{coords[0][0]:.1f},{height} {line} {coords[-1][0]:.1f},{height}" fill="{color}" fill-opacity="0.15"/>' if fill else ""
+    last_x, last_y = coords[-1]
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" style="max-width: 100%; height: auto;" role="img">'
+        f"<title>{min(ys):,} – {max(ys):,}</title>{area}"
+        f'<polyline points="{line}" fill="none" stroke="{color}" stroke-width="1.5" stroke-linejoin="round"/>'
+        f'<circle cx="{last_x:.1f}" cy="{last_y:.1f}" r="2" fill="{color}"/></svg>'
+    )
+
+
+class SparklineCache:
+    """SVGs by content hash in cache/sparklines/; `prune` drops the entries this run did not use"""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or get_settings().sparkline_cache_dir
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def svg(self, points: list, width: int, height: int, color: str = "#4CAF50", fill: bool = False) -> str:
+        if len(points) < 2:
+            return ""
+        sampled = lttb(points, get_settings().sparkline_points)
+        key = hashlib.sha1(json.dumps([SVG_VERSION, width, height, color, fill, sampled]).encode()).hexdigest()
+        path = os.path.join(ensure_dir(self.directory), f"{key}.svg")
+        self.used.add(f"{key}.svg")
+        if os.path.exists(path):
+            self.hits += 1
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        self.misses += 1
+        svg = draw_svg(sampled, width, height, color, fill)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(svg)
+        os.replace(f"{path}.tmp", path)
+        return svg
+
+    def prune(self):
+        if not os.path.isdir(self.directory):
+            return
+        for file in os.listdir(self.directory):
+            if file not in self.used:
+                os.remove(os.path.join(self.directory, file))
+        log_message(f"📈 Sparklines: {self.hits} cached, {self.misses} drawn")
+
+
+def build_sparklines(data: list, now: datetime, data_as_of: str = None) -> dict:
+    """{"total": big chart, network: small sparkline} for the dashboard, "" where history is too short.
+
+    The rendered counts are appended as the last point when they are newer than the history
+    (the hourly point of a fresh run is only written after rendering).
+    """
+    series = load_series(now)
+    if data_as_of:
+        t = datetime.strptime(data_as_of, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+        if not series["total"] or series["total"][-1][0] < t:
+            series["total"].append((t, sum(entry.subgraph_count for entry in data)))
+            for entry in data:
+                series.setdefault(entry.network_name, []).append((t, entry.subgraph_count))
+    cache = SparklineCache()
+    charts = {"total": cache.svg(series["total"], 600, 60, fill=True)}
+    for entry in data:
+        charts[entry.network_name] = cache.svg(series.get(entry.network_name, []), 80, 20)
+    cache.prune()
+    return charts
@@ -0,0 +1,65 @@
+"""Stage rendered artifacts and swap them into the report directory.
+
+Artifacts of a run are written to cache/staging/<run>/ first. Publishing moves every
+file into place with an atomic rename (index.html last), so visitors only ever see a
+complete previous page or a complete new one. Staging directories left behind by a run
+that died before publishing are removed by the next run.
+"""
+import os
+import shutil
+from datetime import datetime, timezone, timedelta
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+# Entry pages are swapped last, once everything they link to is in place
+PUBLISH_LAST = ("index.html",)
+# A staging directory only lives while one render is written, older ones are leftovers
+STAGING_MAX_AGE = timedelta(hours=1)
+
+
+def new_staging_dir(label: str) -> str:
+    name = f"{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{label}"
+    return ensure_dir(os.path.join(get_settings().staging_dir, name))
+
+
+def remove_stale_staging_dirs() -> int:
+    """Drop staging directories of runs that never published them"""
+    staging_dir = get_settings().staging_dir
+    if not os.path.isdir(staging_dir):
+        return 0
+    cutoff = (datetime.now(timezone.utc) - STAGING_MAX_AGE).strftime("%Y%m%d_%H%M%S")
+    stale = [name for name in os.listdir(staging_dir) if name[:15] < cutoff]
+    for name in stale:
+        shutil.rmtree(os.path.join(staging_dir, name), ignore_errors=True)
+    if stale:
+        log_message(f"🧹 Removed {len(stale)} leftover staging directories from {staging_dir}")
+    return len(stale)
+
+
+def atomic_move(source_path: str, target_path: str):
+    """Rename into place; across filesystems copy next to the target first, then rename"""
+    ensure_dir(os.path.dirname(target_path) or ".")
+    try:
+        os.replace(source_path, target_path)
+    except OSError:
+        tmp_path = f"{target_path}.tmp"
+        shutil.copy2(source_path, tmp_path)
+        os.replace(tmp_path, target_path)
+        os.remove(source_path)
+
+
+def publish_staged(staging_dir: str, report_dir: str = None) -> list:
+    """Swap every staged file into the report directory and drop the staging directory"""
+    report_dir = report_dir or get_settings().report_dir
+    files = []
+    for root, _, names in os.walk(staging_dir):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(root, name), staging_dir))
+    files.sort(key=lambda f: (os.path.basename(f) in PUBLISH_LAST, f))
+    for relative_path in files:
+        atomic_move(os.path.join(staging_dir, relative_path), os.path.join(report_dir, relative_path))
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    log_message(f"🚀 Published {len(files)} artifacts to {report_dir}")
+    return files
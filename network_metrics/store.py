@@ -0,0 +1,311 @@
+import os
+import gzip
+import json
+import shutil
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+# Function that writes a JSON file atomically (temp file + rename)
+def write_json_atomic(path, data, **kwargs):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, path)
+# End Function 'write_json_atomic'
+
+
+def save_api_json(name: str, data, output_dir: str = None) -> str:
+    """Publish a static JSON endpoint under reports/api/"""
+    path = os.path.join(ensure_dir(os.path.join(output_dir or get_settings().report_dir, "api")), name)
+    write_json_atomic(path, data, separators=(",", ":"))
+    log_message(f"Saved {name} to {path}")
+    return path
+
+
+def save_indexer_table(indexers: dict, not_found: list):
+    """Indexer table of the last crawl ({id: {"url", "stake", "delegation"}}) and the ids it has no entry for"""
+    path = get_settings().indexer_table_file
+    ensure_dir(os.path.dirname(path) or ".")
+    fetched_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    write_json_atomic(path, {"fetched_at": fetched_at, "indexers": indexers, "not_found": sorted(not_found)}, separators=(",", ":"))
+
+
+def load_indexer_table():
+    try:
+        with open(get_settings().indexer_table_file, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# --- Page journal (checkpoints of the current crawl, never published; one directory per source)
+
+def journal_dir(source: str) -> str:
+    return os.path.join(get_settings().journal_dir, source)
+
+
+def journal_state_file(source: str) -> str:
+    return os.path.join(journal_dir(source), "state.json")
+
+
+def journal_page_path(source: str, skip: int) -> str:
+    return os.path.join(journal_dir(source), f"page_{skip:08d}.json")
+
+
+# Token totals of the crawl's deployments (see fetch.fetch_deployment_metrics)
+JOURNAL_DEPLOYMENTS_FILE = "deployments.json"
+
+
+def previous_journal_source(source: str) -> str:
+    """Journal name holding the last completed crawl of `source`, kept as a cached fallback"""
+    return f"{source}.previous"
+
+
+def journal_reset(source: str) -> dict:
+    """Start a fresh journal at skip 0; a completed journal is kept as `<source>.previous`
+    unless validation rejected it"""
+    state = journal_load_state(source)
+    if state and state.get("complete") and not state.get("rejected"):
+        previous = journal_dir(previous_journal_source(source))
+        if os.path.isdir(previous):
+            shutil.rmtree(previous)
+        os.replace(journal_dir(source), previous)
+    directory = ensure_dir(journal_dir(source))
+    for file in os.listdir(directory):
+        if file.startswith("page_") or file.endswith(".tmp") or file == JOURNAL_DEPLOYMENTS_FILE:
+            os.remove(os.path.join(directory, file))
+    state = {
+        "started_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "next_skip": 0,
+        "pages": [],
+        "page_sizes": [],
+        "complete": False,
+    }
+    write_json_atomic(journal_state_file(source), state)
+    return state
+
+
+def journal_load_state(source: str):
+    path = journal_state_file(source)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        log_message(f"⚠️ Failed to read journal state of {source}, starting over: {e}")
+        return None
+
+
+def journal_save_page(source: str, state: dict, skip: int, batch: list, page_size: int):
+    """Checkpoint one fetched page (requested with `first: page_size`), then advance the cursor"""
+    write_json_atomic(journal_page_path(source, skip), batch)
+    state["pages"].append(skip)
+    state["page_sizes"].append(page_size)
+    state["next_skip"] = skip + page_size
+    write_json_atomic(journal_state_file(source), state)
+
+
+def journal_save_deployments(source: str, deployments: dict):
+    write_json_atomic(os.path.join(journal_dir(source), JOURNAL_DEPLOYMENTS_FILE), deployments, separators=(",", ":"))
+
+
+def journal_load_deployments(source: str):
+    """{deployment id: {"signal", "stake", "query_fees"}} of the journaled crawl, None when it has none"""
+    try:
+        with open(os.path.join(journal_dir(source), JOURNAL_DEPLOYMENTS_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def journal_mark_complete(source: str, state: dict):
+    state["complete"] = True
+    write_json_atomic(journal_state_file(source), state)
+
+
+def journal_mark_rejected(source: str, state: dict):
+    state["rejected"] = True
+    write_json_atomic(journal_state_file(source), state)
+
+
+def journal_iter_pages(source: str, state: dict):
+    """Journaled pages one at a time, so a consumer holds a single page in memory"""
+    for skip in state["pages"]:
+        with open(journal_page_path(source, skip), "r") as f:
+            yield json.load(f)
+
+
+def journal_load_pages(source: str, state: dict) -> list:
+    return list(journal_iter_pages(source, state))
+
+
+def journal_page_sizes(state: dict) -> list:
+    """`first` of every journaled page (journals written before adaptive page sizes had one fixed size)"""
+    return state.get("page_sizes") or [state.get("page_size", 1000)] * len(state["pages"])
+
+
+def journal_is_resumable(state) -> bool:
+    # Journals without per-page sizes predate adaptive page sizes and start over
+    if not state or state.get("complete") or "page_sizes" not in state:
+        return False
+    started_at = datetime.strptime(state["started_at"], "%Y-%m-%d %H:%M:%S UTC").replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - started_at < timedelta(hours=get_settings().journal_max_age_hours)
+
+
+# --- Daily metric snapshots (reports/metrics/metric_YYYYMMDD_HHMMSS.json)
+#
+# Recent snapshots are loose JSON files; older months are compacted into
+# reports/metrics/archive/metrics_YYYY-MM.json.gz (see compaction.py).
+# reports/metrics/index.json maps every day to its snapshot files and the archive
+# holding them, so a lookup opens at most one archive instead of scanning the directory.
+
+METRICS_INDEX = "index.json"
+ARCHIVE_DIR = "archive"
+
+
+def snapshot_date(filename: str) -> str:
+    """'metric_20250514_135146.json' -> '2025-05-14'"""
+    day = filename[len("metric_"):len("metric_") + 8]
+    return f"{day[:4]}-{day[4:6]}-{day[6:]}"
+
+
+def is_metric_file(filename: str) -> bool:
+    return filename.startswith("metric_") and filename.endswith(".json")
+
+
+def metrics_index_path() -> str:
+    return os.path.join(get_settings().metrics_dir, METRICS_INDEX)
+
+
+def archive_path(month: str) -> str:
+    return os.path.join(get_settings().metrics_dir, ARCHIVE_DIR, f"metrics_{month}.json.gz")
+
+
+def read_archive(path: str) -> dict:
+    """Return {filename: snapshot} stored in a monthly archive"""
+    return _read_archive_cached(path, os.path.getmtime(path))
+
+
+@lru_cache(maxsize=2)
+def _read_archive_cached(path: str, mtime: float) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f).get("snapshots", {})
+
+
+def index_add(index: dict, filename: str, archive: str = None):
+    entries = index["days"].setdefault(snapshot_date(filename), [])
+    entries[:] = [e for e in entries if e["file"] != filename]
+    entry = {"file": filename}
+    if archive:
+        entry["archive"] = archive
+    entries.append(entry)
+    entries.sort(key=lambda e: e["file"])
+
+
+def rebuild_metrics_index() -> dict:
+    """Scan loose snapshots and archives once and persist the index"""
+    metrics_dir = ensure_dir(get_settings().metrics_dir)
+    index = {"version": 1, "days": {}}
+    archive_dir = os.path.join(metrics_dir, ARCHIVE_DIR)
+    if os.path.isdir(archive_dir):
+        for archive in sorted(os.listdir(archive_dir)):
+            if archive.endswith(".json.gz"):
+                for filename in read_archive(os.path.join(archive_dir, archive)):
+                    index_add(index, filename, archive=f"{ARCHIVE_DIR}/{archive}")
+    for file in os.listdir(metrics_dir):
+        if is_metric_file(file):
+            index_add(index, file)
+    save_metrics_index(index)
+    log_message(f"🗂️ Rebuilt metrics index ({len(index['days'])} days)")
+    return index
+
+
+def load_metrics_index() -> dict:
+    path = metrics_index_path()
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            log_message(f"⚠️ Failed to read metrics index, rebuilding: {e}")
+    return rebuild_metrics_index()
+
+
+def save_metrics_index(index: dict):
+    ensure_dir(get_settings().metrics_dir)
+    index["days"] = dict(sorted(index["days"].items()))
+    write_json_atomic(metrics_index_path(), index, indent=1)
+
+
+def read_snapshot_entry(entry: dict) -> dict:
+    metrics_dir = get_settings().metrics_dir
+    if entry.get("archive"):
+        return read_archive(os.path.join(metrics_dir, entry["archive"]))[entry["file"]]
+    with open(os.path.join(metrics_dir, entry["file"]), "r") as f:
+        return json.load(f)
+
+
+def load_snapshot_for_date(date: str, index: dict = None):
+    """First snapshot of a day ('YYYY-MM-DD'), or None"""
+    index = index if index is not None else load_metrics_index()
+    entries = index["days"].get(date)
+    if not entries:
+        return None
+    return read_snapshot_entry(entries[0])
+
+
+def load_yesterday_metrics(now: datetime):
+    """Return (total_subgraphs, {network: count}) from yesterday's snapshot, or (None, None)"""
+    yesterday_date = (now - timedelta(days=1)).strftime('%Y-%m-%d')
+    try:
+        yesterday_data = load_snapshot_for_date(yesterday_date)
+    except Exception as e:
+        log_message(f"⚠️ Failed to load yesterday's metric file: {e}")
+        return None, None
+
+    if yesterday_data is None:
+        log_message("📭 No metric file found for yesterday.")
+        return None, None
+
+    total_subgraphs_yesterday = int(yesterday_data.get("total_subgraphs", 0))
+    log_message(f"✅ Parsed total_subgraphs_yesterday as {total_subgraphs_yesterday}")
+    return total_subgraphs_yesterday, yesterday_data.get("networks", {})
+
+
+def save_metrics_snapshot(snapshot: dict, now: datetime) -> str:
+    metrics_dir = ensure_dir(get_settings().metrics_dir)
+    index = load_metrics_index()
+    metric_filename = f"metric_{now.strftime('%Y%m%d_%H%M%S')}.json"
+    metric_path = os.path.join(metrics_dir, metric_filename)
+    with open(metric_path, "w") as metric_file:
+        json.dump(snapshot, metric_file, indent=2)
+    index_add(index, metric_filename)
+    save_metrics_index(index)
+    log_message(f"📁 Saved metrics snapshot to {metric_path}")
+    return metric_path
+
+
+def iter_snapshots(since: str = None, first_per_day: bool = True, index: dict = None):
+    """Yield (date, filename, snapshot) oldest first, optionally only for days >= since"""
+    index = index if index is not None else load_metrics_index()
+    for date, entries in index["days"].items():
+        if since and date < since:
+            continue
+        for entry in entries[:1] if first_per_day else entries:
+            try:
+                snapshot = read_snapshot_entry(entry)
+            except Exception as e:
+                log_message(f"⚠️ Skipping unreadable metric snapshot {entry['file']}: {e}")
+                continue
+            yield date, entry["file"], snapshot
+
+
+def iter_daily_snapshots(since: str = None):
+    """Yield (date, snapshot) for the first metric snapshot of every day, oldest first"""
+    for date, _, snapshot in iter_snapshots(since=since):
+        yield date, snapshot
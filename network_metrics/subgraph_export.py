@@ -0,0 +1,65 @@
+"""Per-subgraph export of the last accepted crawl, for analysing the full catalogue offline.
+
+Layout under reports/exports/subgraphs/:
+    subgraphs.csv.gz       source, id, deployment, network, allocations, indexers
+    subgraphs.ndjson.gz    the same rows as one JSON object per line
+
+Rows are streamed from the journaled pages one page at a time into both gzip files, so
+memory stays at one page whatever the catalogue size. Files are written next to their
+target and renamed into place.
+"""
+import os
+import csv
+import gzip
+import json
+
+from .config import ensure_dir, get_settings, load_sources
+from .log import log_message
+from . import store
+
+
+SUBGRAPH_EXPORT_DIR = "subgraphs"
+EXPORT_COLUMNS = ["source", "id", "deployment", "network", "allocations", "indexers"]
+
+
+def subgraph_rows(source: str, page: list):
+    for item in page:
+        deployment = (item.get("currentVersion") or {}).get("subgraphDeployment") or {}
+        allocations = deployment.get("indexerAllocations") or []
+        indexers = {alloc["indexer"]["id"] for alloc in allocations if (alloc.get("indexer") or {}).get("id")}
+        yield {
+            "source": source,
+            "id": item["id"],
+            "deployment": deployment.get("id"),
+            "network": (deployment.get("manifest") or {}).get("network"),
+            "allocations": len(allocations),
+            "indexers": len(indexers),
+        }
+
+
+def export_subgraphs(output_dir: str = None) -> int:
+    """Stream every subgraph of the last accepted crawl of each source to gzip CSV and NDJSON"""
+    from .fetch import accepted_journal
+
+    directory = ensure_dir(output_dir or os.path.join(get_settings().export_dir, SUBGRAPH_EXPORT_DIR))
+    csv_path = os.path.join(directory, "subgraphs.csv.gz")
+    ndjson_path = os.path.join(directory, "subgraphs.ndjson.gz")
+    rows = 0
+    with gzip.open(f"{csv_path}.tmp", "wt", encoding="utf-8", newline="") as csv_file, \
+            gzip.open(f"{ndjson_path}.tmp", "wt", encoding="utf-8") as ndjson_file:
+        writer = csv.DictWriter(csv_file, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for source in load_sources():
+            name, state = accepted_journal(source)
+            if state is None:
+                log_message(f"📭 [{source.name}] No completed journal to export.")
+                continue
+            for page in store.journal_iter_pages(name, state):
+                for row in subgraph_rows(source.name, page):
+                    writer.writerow(row)
+                    ndjson_file.write(json.dumps(row, separators=(",", ":")) + "\n")
+                    rows += 1
+    os.replace(f"{csv_path}.tmp", csv_path)
+    os.replace(f"{ndjson_path}.tmp", ndjson_path)
+    log_message(f"🗂️ Exported {rows:,} subgraphs to {csv_path} ({os.path.getsize(csv_path) / 1e6:.2f} MB) and {ndjson_path} ({os.path.getsize(ndjson_path) / 1e6:.2f} MB)")
+    return rows
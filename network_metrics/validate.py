@@ -0,0 +1,120 @@
+"""Checks a fresh crawl before it is published.
+
+Completeness: every page but the last of each source must be full and the last one short
+(otherwise the crawl stopped early or the journal has a gap). Ids seen on two pages mean
+skip pagination shifted while the crawl was running.
+
+Anomalies: the total and every network count are compared with the hourly history of the
+last VALIDATION_WINDOW_DAYS. A value is anomalous when its change against the last run is
+at least VALIDATION_PCT_THRESHOLD percent *and* its z-score against the window is at least
+VALIDATION_Z_THRESHOLD (a flat series has no spread, so the percent change decides alone).
+An anomalous drop of the total by VALIDATION_BLOCK_PCT percent or more blocks the run
+(0 only flags it, e.g. to accept a genuine drop).
+
+Blocking reasons keep the run from being published or recorded; flags are published
+with a warning on the dashboard. Both are logged and appended to
+reports/metrics/validation.jsonl.
+"""
+import os
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from statistics import fmean, pstdev
+from typing import List
+
+from .aggregate import NetworkAggregate
+from .config import ensure_dir, get_settings
+from .log import log_message
+
+
+VALIDATION_FILE = "validation.jsonl"
+
+
+@dataclass
+class ValidationResult:
+    blocked: List[str] = field(default_factory=list)
+    flagged: List[str] = field(default_factory=list)
+
+    @property
+    def status(self) -> str:
+        return "blocked" if self.blocked else "flagged" if self.flagged else "ok"
+
+    def as_dict(self) -> dict:
+        return dict(asdict(self), status=self.status)
+
+
+def check_completeness(aggregate: NetworkAggregate, result: ValidationResult):
+    for source, stats in sorted(aggregate.crawl.items()):
+        rows, sizes = stats["page_rows"], stats["page_sizes"]
+        if not rows:
+            result.blocked.append(f"{source}: no pages")
+            continue
+        short = [n for n, (count, size) in enumerate(zip(rows[:-1], sizes)) if count != size]
+        if short:
+            result.blocked.append(f"{source}: page(s) {short} returned fewer rows than requested before the last page")
+        if rows[-1] >= sizes[-1]:
+            result.blocked.append(f"{source}: last page is full, the crawl stopped before the end")
+        if stats["duplicate_ids"]:
+            result.flagged.append(f"{source}: {stats['duplicate_ids']} subgraph id(s) seen on two pages (pagination shifted during the crawl)")
+
+
+def series_change(history: list, value: int, z_threshold: float, pct_threshold: float):
+    """(percent change against the last point, z-score against the window, anomalous?)"""
+    last = history[-1]
+    pct = (value - last) / last * 100 if last else float("inf") if value else 0.0
+    spread = pstdev(history)
+    z = (value - fmean(history)) / spread if spread else None
+    anomalous = abs(pct) >= pct_threshold and (z is None or abs(z) >= z_threshold)
+    return pct, z, anomalous
+
+
+def describe(name: str, last: int, value: int, pct: float, z) -> str:
+    z_text = "flat history" if z is None else f"z={z:+.1f}"
+    return f"{name}: {last:,} -> {value:,} ({pct:+.1f}%, {z_text})"
+
+
+def check_history(aggregate: NetworkAggregate, now: datetime, result: ValidationResult):
+    from .hourly import iter_hourly_points
+
+    settings = get_settings()
+    points = list(iter_hourly_points(since=now - timedelta(days=settings.validation_window_days)))
+    if len(points) < settings.validation_min_points:
+        log_message(f"🔎 Only {len(points)} runs in the last {settings.validation_window_days} days — skipping anomaly checks.")
+        return
+
+    total = sum(entry.subgraph_count for entry in aggregate.networks)
+    totals = [point["total"] for point in points]
+    pct, z, anomalous = series_change(totals, total, settings.validation_z_threshold, settings.validation_pct_threshold)
+    if anomalous:
+        reason = describe("total subgraphs", totals[-1], total, pct, z)
+        blocking = settings.validation_block_pct > 0 and pct <= -settings.validation_block_pct
+        (result.blocked if blocking else result.flagged).append(reason)
+
+    counts = {entry.network_name: entry.subgraph_count for entry in aggregate.networks}
+    for network in sorted(set(counts) | set(points[-1]["s"])):
+        history = [point["s"].get(network, 0) for point in points]
+        value = counts.get(network, 0)
+        if max(history[-1], value) < settings.validation_min_network_size:
+            continue
+        pct, z, anomalous = series_change(history, value, settings.validation_z_threshold, settings.validation_pct_threshold)
+        if anomalous:
+            result.flagged.append(describe(network, history[-1], value, pct, z))
+
+
+def validate_run(aggregate: NetworkAggregate, now: datetime) -> ValidationResult:
+    result = ValidationResult()
+    check_completeness(aggregate, result)
+    check_history(aggregate, now, result)
+    for reason in result.blocked:
+        log_message(f"⛔ Validation: {reason}")
+    for reason in result.flagged:
+        log_message(f"⚠️ Validation: {reason}")
+    if result.status == "ok":
+        log_message("✅ Validation passed.")
+    return result
+
+
+def append_validation(result: ValidationResult, timestamp: str):
+    path = os.path.join(ensure_dir(get_settings().metrics_dir), VALIDATION_FILE)
+    with open(path, "a") as f:
+        f.write(json.dumps(dict(result.as_dict(), t=timestamp), separators=(",", ":")) + "\n")
@@ -0,0 +1,71 @@
+"""Stake concentration (HHI, Nakamoto coefficient) and its join onto the per-network rows.
+
+Run with `python -m unittest discover tests` (or pytest).
+"""
+import unittest
+
+from network_metrics.aggregate import aggregate_pages, apply_indexer_stake, stake_concentration
+
+
+def subgraph(subgraph_id: str, network: str, indexers: list) -> dict:
+    return {
+        "id": subgraph_id,
+        "currentVersion": {"subgraphDeployment": {
+            "id": f"dep-{subgraph_id}",
+            "manifest": {"network": network},
+            "indexerAllocations": [{"indexer": {"id": indexer}} for indexer in indexers],
+        }},
+    }
+
+
+PAGES = [[
+    subgraph("s1", "mainnet", ["a", "b"]),
+    subgraph("s2", "mainnet", ["c"]),
+    subgraph("s3", "base", ["a"]),
+    subgraph("s4", "gnosis", []),
+]]
+
+
+class StakeConcentrationTest(unittest.TestCase):
+    def test_no_stake(self):
+        self.assertEqual(stake_concentration([]), (None, None))
+        self.assertEqual(stake_concentration([0.0, 0.0]), (None, None))
+
+    def test_single_indexer(self):
+        self.assertEqual(stake_concentration([42.0]), (10000, 1))
+        self.assertEqual(stake_concentration([42.0, 0.0, 0.0]), (10000, 1))
+
+    def test_equal_stakes(self):
+        # Exactly half is not a majority: one more indexer is needed
+        self.assertEqual(stake_concentration([5.0, 5.0]), (5000, 2))
+        self.assertEqual(stake_concentration([1.0] * 4), (2500, 3))
+
+    def test_dominant_indexer(self):
+        self.assertEqual(stake_concentration([20.0, 60.0, 20.0]), (4400, 1))
+
+
+class ApplyIndexerStakeTest(unittest.TestCase):
+    def rows(self, aggregate) -> dict:
+        return {entry.network_name: (entry.stake_coverage, entry.stake_hhi, entry.nakamoto_coefficient) for entry in aggregate.networks}
+
+    def test_joins_stake_per_network(self):
+        aggregate = aggregate_pages(PAGES)
+        indexers = {"a": {"stake": 50.0, "delegation": 10.0}, "b": {"stake": 20.0, "delegation": None}, "c": {"stake": 20.0}, "unrelated": {"stake": 1000.0}}
+        apply_indexer_stake(aggregate, indexers)
+        self.assertEqual(self.rows(aggregate), {
+            "mainnet": (100.0, 4400, 1),
+            "base": (60.0, 10000, 1),
+            "gnosis": (0.0, None, None),
+        })
+
+    def test_zero_total_stake_leaves_rows_unchanged(self):
+        for indexers in ({}, {"a": {"stake": 0.0, "delegation": 0.0}, "b": {}}):
+            aggregate = aggregate_pages(PAGES)
+            before = list(aggregate.networks)
+            apply_indexer_stake(aggregate, indexers)
+            self.assertEqual(aggregate.networks, before)
+            self.assertEqual(set(self.rows(aggregate).values()), {(None, None, None)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""Allocation events fetched from epoch high-water marks, and the churn replay over them.
+
+Run with `python -m unittest discover tests` (or pytest).
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from network_metrics import churn
+from network_metrics.aggregate import NetworkAggregate
+from network_metrics.config import Source, get_settings
+
+
+def allocation(allocation_id: str, created: int, closed: int = None, indexer: str = "0xidx", network: str = "mainnet") -> dict:
+    """Allocation row with one epoch per day since 2026-10-01"""
+    start = int(datetime(2026, 10, 1, tzinfo=timezone.utc).timestamp())
+    return {
+        "id": allocation_id,
+        "createdAtEpoch": created,
+        "closedAtEpoch": closed,
+        "createdAt": start + created * 86400 + 60,
+        "closedAt": start + closed * 86400 + 120 if closed is not None else None,
+        "indexer": {"id": indexer},
+        "subgraphDeployment": {"manifest": {"network": network}} if network else None,
+    }
+
+
+ALLOCATIONS = [
+    allocation("0xa1", 10),
+    allocation("0xa2", 10, 11),
+    allocation("0xa3", 11, indexer="0xother", network="base"),
+    allocation("0xa4", 12, 12),
+    allocation("0xa5", 12),
+    allocation("0xa6", 12, network=None),
+]
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: dict = None):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class FakeScheduler:
+    """Answers the allocation events query like the network subgraph: ordered by id, `first` rows"""
+
+    def __init__(self, rows: list, fail: bool = False):
+        self.rows = sorted(rows, key=lambda row: row["id"])
+        self.fail = fail
+        self.requests = []
+
+    def query(self, source, query, variables=None, phase=None):
+        self.requests.append(variables)
+        if self.fail:
+            return FakeResponse(500)
+        epoch_field = re.search(r"(\w+)_gte", query.text).group(1)
+        rows = [row for row in self.rows if row[epoch_field] is not None and row[epoch_field] >= variables["epoch"] and row["id"] > variables["lastId"]]
+        return FakeResponse(200, {"data": {"allocations": rows[:variables["first"]]}})
+
+
+class ChurnTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {
+            "REPORT_DIR": os.path.join(self.tmp, "reports"),
+            "CACHE_DIR": os.path.join(self.tmp, "cache"),
+            "LOG_DIR": os.path.join(self.tmp, "logs"),
+            "CHURN_DAYS": "3",
+        })
+        self.env.start()
+        get_settings.cache_clear()
+        self.source = Source(name="main", subgraph_id="network")
+
+    def tearDown(self):
+        self.env.stop()
+        get_settings.cache_clear()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+class FetchEventsTest(ChurnTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page_size = mock.patch.object(churn, "ALLOCATION_PAGE_SIZE", 2)
+        self.page_size.start()
+
+    def tearDown(self):
+        self.page_size.stop()
+        super().tearDown()
+
+    def test_opened_since_mark(self):
+        scheduler = FakeScheduler(ALLOCATIONS)
+        events, mark = churn.fetch_events(self.source, scheduler, "open", {"epoch": 10, "ids": ["0xa1"]})
+        # 0xa1 was recorded at the mark epoch; 0xa6 has no network but still moves the mark
+        self.assertEqual([event["id"] for event in events], ["0xa2", "0xa3", "0xa4", "0xa5"])
+        self.assertEqual(mark, {"epoch": 12, "ids": ["0xa4", "0xa5", "0xa6"]})
+        self.assertEqual(events[0], {"t": "2026-10-11T00:01:00Z", "e": "open", "id": "0xa2", "indexer": "0xidx", "network": "mainnet", "s": "main"})
+        # Six rows at two per page: the fourth, empty page ends the loop
+        self.assertEqual([variables["lastId"] for variables in scheduler.requests], ["", "0xa2", "0xa4", "0xa6"])
+
+        # Nothing new: the same mark comes back and no event repeats
+        self.assertEqual(churn.fetch_events(self.source, scheduler, "open", mark), ([], mark))
+
+    def test_closed_since_mark(self):
+        events, mark = churn.fetch_events(self.source, FakeScheduler(ALLOCATIONS), "close", {"epoch": 0, "ids": []})
+        self.assertEqual([(event["id"], event["e"], event["t"]) for event in events], [("0xa2", "close", "2026-10-12T00:02:00Z"), ("0xa4", "close", "2026-10-13T00:02:00Z")])
+        self.assertEqual(mark, {"epoch": 12, "ids": ["0xa4"]})
+
+    def test_replay_across_epochs(self):
+        # Allocations opened while the mark's epoch is still in progress and in the next one
+        scheduler = FakeScheduler(ALLOCATIONS[:3])
+        first, mark = churn.fetch_events(self.source, scheduler, "open", {"epoch": 9, "ids": []})
+        self.assertEqual(mark, {"epoch": 11, "ids": ["0xa3"]})
+        scheduler.rows += [allocation("0xa0", 11), allocation("0xa7", 13)]
+        second, mark = churn.fetch_events(self.source, scheduler, "open", mark)
+        self.assertEqual([event["id"] for event in first], ["0xa1", "0xa2", "0xa3"])
+        self.assertEqual([event["id"] for event in second], ["0xa0", "0xa7"])
+        self.assertEqual(mark, {"epoch": 13, "ids": ["0xa7"]})
+
+    def test_failed_request(self):
+        self.assertIsNone(churn.fetch_events(self.source, FakeScheduler(ALLOCATIONS, fail=True), "open", {"epoch": 0, "ids": []}))
+
+
+class BuildChurnTest(ChurnTestCase):
+    def event(self, t: str, kind: str, allocation_id: str, indexer: str, network: str = "mainnet") -> dict:
+        return {"t": t, "e": kind, "id": allocation_id, "indexer": indexer, "network": network, "s": "main"}
+
+    def test_replay(self):
+        events = [
+            self.event("2026-10-10T08:00:00Z", "open", "0xold", "0xz", "base"),
+            self.event("2026-10-17T08:00:00Z", "open", "0xa1", "0xx"),
+            self.event("2026-10-17T09:00:00Z", "open", "0xa2", "0xy"),
+            self.event("2026-10-18T10:00:00Z", "close", "0xa2", "0xy"),
+            self.event("2026-10-18T11:00:00Z", "close", "0xb1", "0xz", "base"),
+        ]
+        churn.append_events(events)
+        # A repeated fetch appends the same events again, and a killed run leaves a truncated line
+        churn.append_events(events[1:3])
+        with open(os.path.join(churn.allocations_dir(), "allocations_2026-10.jsonl"), "a") as f:
+            f.write('{"t":"2026-10-19T')
+
+        # 0xx is still allocated on mainnet; 0xz keeps one of its two base allocations
+        aggregate = NetworkAggregate(networks=[], allocations_by_indexer={"0xx": {"mainnet": 1}, "0xz": {"base": 1}})
+        report = churn.build_churn(aggregate, datetime(2026, 10, 19, 12, tzinfo=timezone.utc))
+
+        self.assertEqual(report["days"], ["2026-10-17", "2026-10-18", "2026-10-19"])
+        mainnet = report["networks"]["mainnet"]["daily"]
+        self.assertEqual(mainnet[0], {"date": "2026-10-17", "opened": 2, "closed": 0, "indexers_entered": 2, "indexers_exited": 0})
+        self.assertEqual(mainnet[1], {"date": "2026-10-18", "opened": 0, "closed": 1, "indexers_entered": 0, "indexers_exited": 1})
+        self.assertEqual(report["networks"]["base"]["totals"], {"opened": 0, "closed": 1, "indexers_entered": 0, "indexers_exited": 0})
+
+    def test_no_events(self):
+        report = churn.build_churn(NetworkAggregate(networks=[]), datetime(2026, 10, 19, tzinfo=timezone.utc))
+        self.assertEqual(report["networks"], {})
+        self.assertEqual(len(report["days"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Delta-encoded subgraph id snapshots: diff/apply, replay and retention pruning.
+
+Run with `python -m unittest discover tests` (or pytest).
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone, timedelta
+from unittest import mock
+
+from network_metrics import idsets
+from network_metrics.config import get_settings
+
+
+def random_ids(rng: random.Random, count: int) -> list:
+    return sorted(rng.sample([f"0x{n:04x}" for n in range(400)], count))
+
+
+class DiffApplyTest(unittest.TestCase):
+    def test_round_trip(self):
+        rng = random.Random(31)
+        for _ in range(500):
+            old = random_ids(rng, rng.randint(0, 60))
+            new = random_ids(rng, rng.randint(0, 60))
+            added, removed = idsets.sorted_merge_diff(old, new)
+            self.assertEqual(added, sorted(set(new) - set(old)))
+            self.assertEqual(removed, sorted(set(old) - set(new)))
+            self.assertEqual(idsets.apply_delta(old, added, removed), new)
+
+    def test_edges(self):
+        self.assertEqual(idsets.sorted_merge_diff([], []), ([], []))
+        self.assertEqual(idsets.sorted_merge_diff([], ["a"]), (["a"], []))
+        self.assertEqual(idsets.sorted_merge_diff(["a"], []), ([], ["a"]))
+        self.assertEqual(idsets.apply_delta(["a", "c"], ["b", "d"], ["a"]), ["b", "c", "d"])
+
+    def test_diff_networks(self):
+        changes = idsets.diff_networks({"base": ["a", "b"], "gone": ["x"]}, {"base": ["b", "c"], "new": ["y"]})
+        self.assertEqual(changes, {"base": (["c"], ["a"]), "gone": ([], ["x"]), "new": (["y"], [])})
+
+
+class SnapshotTest(unittest.TestCase):
+    """save_id_snapshot/load_ids_at against a temporary report directory"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {
+            "REPORT_DIR": os.path.join(self.tmp, "reports"),
+            "CACHE_DIR": os.path.join(self.tmp, "cache"),
+            "LOG_DIR": os.path.join(self.tmp, "logs"),
+            "IDSET_RETENTION_DAYS": "2",
+        })
+        self.env.start()
+        get_settings.cache_clear()
+        self.keyframes = mock.patch.object(idsets, "KEYFRAME_INTERVAL", 4)
+        self.keyframes.start()
+        self.start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        self.keyframes.stop()
+        self.env.stop()
+        get_settings.cache_clear()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def save_runs(self, count: int, every: timedelta) -> list:
+        """Save `count` runs of random id lists; returns [(moment, {network: ids})]"""
+        rng = random.Random(7)
+        runs = []
+        for n in range(count):
+            moment = self.start + n * every
+            state = {network: random_ids(rng, rng.randint(1, 40)) for network in ("mainnet", "base", "gnosis") if rng.random() < 0.9}
+            idsets.save_id_snapshot(state, moment)
+            runs.append((moment, state))
+        return runs
+
+    def test_replay_every_run(self):
+        runs = self.save_runs(10, timedelta(hours=1))
+        for moment, state in runs:
+            self.assertEqual(idsets.load_ids_at(moment + timedelta(minutes=30)), (moment.strftime("%Y-%m-%dT%H:%M:%SZ"), state))
+        self.assertEqual(idsets.load_ids_at(self.start - timedelta(hours=1)), (None, None))
+
+    def test_replay_across_pruned_base(self):
+        # 5 days of runs every 6 hours with IDSET_RETENTION_DAYS=2
+        runs = self.save_runs(20, timedelta(hours=6))
+        manifest = idsets.load_manifest()
+        self.assertTrue(manifest[0]["keyframe"])
+        self.assertLess(len(manifest), len(runs))
+        kept = {entry["file"] for entry in manifest}
+        on_disk = {name for name in os.listdir(idsets.ids_dir()) if name.startswith("ids_")}
+        self.assertEqual(on_disk, kept)
+
+        first_kept = datetime.strptime(manifest[0]["t"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        for moment, state in runs:
+            _, replayed = idsets.load_ids_at(moment)
+            self.assertEqual(replayed, state if moment >= first_kept else None)
+
+    def test_retention_keeps_the_base_keyframe(self):
+        now = self.start + timedelta(days=10)
+        manifest = [
+            {"file": f"ids_{n}.json.gz", "t": (now - timedelta(days=5) + timedelta(hours=12 * n)).strftime("%Y-%m-%dT%H:%M:%SZ"), "keyframe": n % 4 == 0}
+            for n in range(10)
+        ]
+        # Cutoff at now - 2 days falls on run 6; run 4 is the keyframe its deltas replay from
+        self.assertEqual([entry["file"] for entry in idsets.prune_manifest(manifest, now)], [f"ids_{n}.json.gz" for n in range(4, 10)])
+
+        with mock.patch.dict(os.environ, {"IDSET_RETENTION_DAYS": "0"}):
+            get_settings.cache_clear()
+            self.assertEqual(idsets.prune_manifest(manifest, now), manifest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""check_indexer against a local status endpoint stub (no network access).
+
+Run with `python -m unittest discover tests` (or pytest).
+"""
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from network_metrics import indexer_status
+
+
+def status(deployment: str, synced: bool = True, health: str = "healthy", lag: int = 0) -> dict:
+    return {
+        "subgraph": deployment,
+        "synced": synced,
+        "health": health,
+        "chains": [{"chainHeadBlock": {"number": "1000"}, "latestBlock": {"number": str(1000 - lag)}}],
+    }
+
+
+# Stub indexer path -> body of its /status answer for deployment "Qm1"
+ANSWERS = {
+    "synced": {"data": {"indexingStatuses": [status("Qm1", lag=3)]}},
+    "lagging": {"data": {"indexingStatuses": [status("Qm1", lag=500)]}},
+    "syncing": {"data": {"indexingStatuses": [status("Qm1", synced=False)]}},
+    "failed": {"data": {"indexingStatuses": [status("Qm1", health="failed")]}},
+    "not-indexed": {"data": {"indexingStatuses": []}},
+    "graphql-error": {"errors": [{"message": "unknown field"}]},
+    "garbled-status": {"data": {"indexingStatuses": [{"subgraph": "Qm1", "synced": True, "chains": [{"latestBlock": {"number": "x"}}]}]}},
+}
+
+
+class StubIndexer(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def answer(self, body: bytes, status_code: int = 200):
+        self.send_response(status_code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        name = self.path.strip("/").split("/")[0]
+        if name in ANSWERS:
+            self.answer(json.dumps(ANSWERS[name]).encode())
+        elif name == "invalid":
+            self.answer(b"<html>not json</html>")
+        elif name == "not-an-object":
+            self.answer(b"[1, 2, 3]")
+        elif name == "http-error":
+            self.answer(b"", 502)
+        elif name == "too-large":
+            self.answer(b" " * (indexer_status.MAX_RESPONSE_BYTES + 1))
+        elif name == "trickle":
+            # Each byte well within the read timeout, the whole body far beyond the deadline
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            try:
+                for _ in range(1000):
+                    self.wfile.write(b" ")
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except OSError:
+                pass
+
+
+class CheckIndexerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubIndexer)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def check(self, name: str, timeout: float = 2.0):
+        return indexer_status.check_indexer(f"{self.base_url}/{name}", ["Qm1"], timeout, max_lag_blocks=100)
+
+    def test_synced(self):
+        self.assertEqual(self.check("synced"), (None, {"Qm1": "synced"}))
+
+    def test_lagging(self):
+        self.assertEqual(self.check("lagging"), (None, {"Qm1": "lagging"}))
+        self.assertEqual(self.check("syncing"), (None, {"Qm1": "lagging"}))
+
+    def test_failed(self):
+        self.assertEqual(self.check("failed"), (None, {"Qm1": "failed"}))
+        self.assertEqual(self.check("not-indexed"), (None, {"Qm1": "failed"}))
+
+    def test_invalid(self):
+        for name in ("invalid", "not-an-object", "graphql-error", "http-error"):
+            error, states = self.check(name)
+            self.assertIsNotNone(error, name)
+            self.assertEqual(states, {"Qm1": "unreachable"}, name)
+        # A status without a usable block lag still counts by its synced flag
+        self.assertEqual(self.check("garbled-status"), (None, {"Qm1": "synced"}))
+
+    def test_no_url(self):
+        self.assertEqual(indexer_status.check_indexer(None, ["Qm1"], 1.0, 100), ("no url", {"Qm1": "unreachable"}))
+
+    def test_too_large(self):
+        self.assertEqual(self.check("too-large"), ("ResponseTooLarge", {"Qm1": "unreachable"}))
+
+    def test_trickling_response_hits_the_deadline(self):
+        started = time.monotonic()
+        error, states = self.check("trickle", timeout=0.5)
+        self.assertEqual(states, {"Qm1": "unreachable"})
+        self.assertIn(error, ("Timeout", "ReadTimeout"))
+        # Deadline plus at most one read timeout
+        self.assertLess(time.monotonic() - started, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Adaptive page and alias batch sizing, and the per-key token bucket.
+
+Run with `python -m unittest discover tests` (or pytest).
+"""
+import unittest
+
+from network_metrics.client import TokenBucket
+from network_metrics.fetch import AliasBatchSizer, PageSizer
+
+
+class PageSizerTest(unittest.TestCase):
+    def sizer(self, start: int = 100, minimum: int = 10, maximum: int = 1000) -> PageSizer:
+        return PageSizer(start, minimum, maximum, target_seconds=2.0, target_bytes=1_000_000)
+
+    def test_start_is_clamped(self):
+        self.assertEqual(self.sizer(start=5000).size, 1000)
+        self.assertEqual(self.sizer(start=1).size, 10)
+        # A minimum above the maximum is lowered to it, and never below one
+        inverted = self.sizer(start=100, minimum=500, maximum=200)
+        self.assertEqual((inverted.minimum, inverted.size), (200, 200))
+        self.assertEqual(self.sizer(start=0, minimum=0).minimum, 1)
+
+    def test_grows_to_the_ceiling(self):
+        sizer = self.sizer()
+        sizes = []
+        for _ in range(10):
+            sizer.observe(0.1, 1000)
+            sizes.append(sizer.size)
+        self.assertEqual(sizes[:3], [150, 225, 337])
+        self.assertEqual(sizer.size, 1000)
+
+    def test_holds_between_half_and_full_target(self):
+        sizer = self.sizer()
+        sizer.observe(1.5, 1000)
+        sizer.observe(0.1, 600_000)
+        self.assertEqual(sizer.size, 100)
+
+    def test_shrinks_to_the_floor(self):
+        sizer = self.sizer()
+        sizer.observe(3.0, 1000)
+        self.assertEqual(sizer.size, 50)
+        sizer.observe(0.1, 2_000_000)
+        self.assertEqual(sizer.size, 25)
+        self.assertTrue(sizer.shrink())
+        self.assertEqual(sizer.size, 12)
+        self.assertTrue(sizer.shrink())
+        self.assertEqual(sizer.size, 10)
+        self.assertFalse(sizer.shrink())
+        self.assertEqual(sizer.size, 10)
+
+
+class AliasBatchSizerTest(unittest.TestCase):
+    def test_start_is_clamped(self):
+        self.assertEqual(AliasBatchSizer(20, 8, 1000).size, 8)
+        self.assertEqual(AliasBatchSizer(0, 8, 1000).size, 1)
+        self.assertEqual(AliasBatchSizer(4, 0, 1000).maximum, 1)
+
+    def test_grows_at_most_doubling_up_to_the_maximum(self):
+        sizer = AliasBatchSizer(1, 8, 1_000_000)
+        sizes = []
+        for _ in range(5):
+            sizer.observe(1000 * sizer.size, sizer.size)
+            sizes.append(sizer.size)
+        self.assertEqual(sizes, [2, 4, 8, 8, 8])
+
+    def test_follows_the_byte_target(self):
+        sizer = AliasBatchSizer(8, 16, 1_000_000)
+        # 300 kB pages: three fit the target
+        sizer.observe(2_400_000, 8)
+        self.assertEqual(sizer.size, 3)
+        # Pages larger than the whole target still send one at a time
+        sizer.observe(6_000_000, 3)
+        self.assertEqual(sizer.size, 1)
+        # Empty responses do not divide by zero
+        sizer.observe(0, 0)
+        self.assertEqual(sizer.size, 2)
+
+    def test_shrinks_to_one_page(self):
+        sizer = AliasBatchSizer(5, 8, 1000)
+        self.assertTrue(sizer.shrink())
+        self.assertEqual(sizer.size, 2)
+        self.assertTrue(sizer.shrink())
+        self.assertEqual(sizer.size, 1)
+        self.assertFalse(sizer.shrink())
+        self.assertEqual(sizer.size, 1)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_starts_full(self):
+        bucket = TokenBucket(2.0, 3)
+        now = bucket.updated
+        for _ in range(3):
+            self.assertEqual(bucket.wait_time(now), 0.0)
+            bucket.take()
+        self.assertAlmostEqual(bucket.wait_time(now), 0.5)
+        self.assertEqual(TokenBucket(1.0, 0).capacity, 1)
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(4.0, 2)
+        now = bucket.updated
+        bucket.take()
+        bucket.take()
+        self.assertAlmostEqual(bucket.wait_time(now + 0.125), 0.125)
+        bucket.refill(now + 100)
+        self.assertEqual(bucket.tokens, 2)
+
+    def test_debt_after_a_burst(self):
+        # take() without waiting leaves the bucket negative; the wait covers the debt
+        bucket = TokenBucket(1.0, 1)
+        now = bucket.updated
+        bucket.take()
+        bucket.take()
+        self.assertAlmostEqual(bucket.wait_time(now), 2.0)
+        self.assertAlmostEqual(bucket.wait_time(now + 1.5), 0.5)
+        self.assertEqual(bucket.wait_time(now + 2.0), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
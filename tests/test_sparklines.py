@@ -0,0 +1,49 @@
+"""LTTB downsampling of the sparkline series.
+
+Run with `python -m unittest discover tests` (or pytest).
+"""
+import unittest
+
+from network_metrics.sparklines import lttb
+
+
+class LttbTest(unittest.TestCase):
+    def test_short_series_is_kept(self):
+        self.assertEqual(lttb([], 48), [])
+        points = [(n, n * n) for n in range(10)]
+        self.assertEqual(lttb(points, 10), points)
+        self.assertEqual(lttb(points, 48), points)
+        self.assertIsNot(lttb(points, 48), points)
+
+    def test_threshold_below_three_keeps_everything(self):
+        points = [(n, n % 3) for n in range(20)]
+        self.assertEqual(lttb(points, 2), points)
+        self.assertEqual(lttb(points, 0), points)
+
+    def test_downsampled_shape(self):
+        points = [(n, (n * 37) % 11) for n in range(1000)]
+        for threshold in (3, 4, 48, 999):
+            sampled = lttb(points, threshold)
+            self.assertEqual(len(sampled), threshold)
+            self.assertEqual(sampled[0], points[0])
+            self.assertEqual(sampled[-1], points[-1])
+            xs = [x for x, _ in sampled]
+            self.assertEqual(xs, sorted(set(xs)))
+            self.assertTrue(set(sampled) <= set(points))
+
+    def test_keeps_a_spike(self):
+        points = [(n, 0) for n in range(500)]
+        points[250] = (250, 100)
+        self.assertIn((250, 100), lttb(points, 20))
+
+    def test_uneven_x_spacing(self):
+        # Daily snapshots followed by hourly points, as load_series builds them
+        points = [(day * 86400.0, 100 + day) for day in range(30)]
+        points += [(30 * 86400.0 + hour * 3600.0, 130 + hour % 5) for hour in range(200)]
+        sampled = lttb(points, 48)
+        self.assertEqual(len(sampled), 48)
+        self.assertEqual((sampled[0], sampled[-1]), (points[0], points[-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()